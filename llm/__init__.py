@@ -0,0 +1,31 @@
+"""
+LLM, multi-agent and voice pipelines for YappAI.
+
+Public names are resolved lazily on first access, so ``import llm`` and
+``from llm import LLMClient`` never import the Whisper backend or torch.
+"""
+import importlib
+from typing import Any
+
+_EXPORTS = {
+    "LLMClient": ".llm_client",
+    "LLMConfig": ".llm_client",
+    "ConversationManager": ".llm_client",
+    "metrics": ".metrics",
+    "MetricsRegistry": ".metrics",
+    "MemoryIndex": ".memory",
+    "TranscriptIndex": ".transcript_index",
+    "StatsAggregator": ".aggregates",
+    "Lane": ".lanes",
+    "LaneScheduler": ".lanes",
+    "lane_scope": ".lanes",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,40 @@
+"""Multi-agent framework: agent base classes, specialized agents and the orchestrator."""
+import importlib
+from typing import Any
+
+_EXPORTS = {
+    "Agent": ".base_agent",
+    "AgentRole": ".base_agent",
+    "AgentCapability": ".base_agent",
+    "AgentState": ".base_agent",
+    "SpecializedAgent": ".base_agent",
+    "LeaderAgent": ".specialized_agents",
+    "AnalystAgent": ".specialized_agents",
+    "CreativeAgent": ".specialized_agents",
+    "MultiAgentOrchestrator": ".multi_agent_orchestrator",
+    "Task": ".multi_agent_orchestrator",
+    "GroupState": ".multi_agent_orchestrator",
+    "EventBus": ".event_bus",
+    "SubscriptionConfig": ".event_bus",
+    "AgentSpec": ".worker_pool",
+    "DistributedOrchestrator": ".worker_pool",
+    "RemoteAgentError": ".worker_pool",
+    "MapReduceAnalyzer": ".map_reduce",
+    "AnalysisCache": ".map_reduce",
+    "AgentPool": ".agent_pool",
+    "PersonaAgent": ".agent_pool",
+    "PersonaSpec": ".agent_pool",
+    "PersonaProfile": ".agent_pool",
+    "AcceptanceCache": ".assignment",
+    "balanced_assignment": ".assignment",
+    "score_matrix": ".assignment",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
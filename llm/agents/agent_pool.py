@@ -0,0 +1,363 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .base_agent import SpecializedAgent, AgentRole, AgentCapability, AgentState
+from ..metrics import metrics
+from ..serialization import canonical_json, file_stem, get_serializer
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PersonaSpec:
+    """
+    Everything needed to build a persona agent, and nothing more.
+
+    A registered spec costs a few strings and a small dict; the agent, its
+    LLM prompt and its history only exist while the persona is active.
+    """
+    persona_id: str
+    name: str
+    system_prompt: str = ""  # may contain ``{placeholders}`` filled from ``variables``
+    template: Optional[str] = None  # prompt manager template used instead of ``system_prompt``
+    variables: Dict[str, Any] = field(default_factory=dict)
+    capabilities: Dict[str, float] = field(default_factory=dict)  # capability name -> confidence
+    role: str = AgentRole.SPECIALIST.value
+    llm_tier: Optional[str] = None
+
+    @classmethod
+    def from_persona(cls, persona: Any, capabilities: Dict[str, float], **kwargs: Any) -> "PersonaSpec":
+        """Spec for a tournament ``Persona``, keyed by its name."""
+        return cls(persona.name, persona.name, system_prompt=persona.system_prompt, capabilities=capabilities, **kwargs)
+
+def _capabilities(spec: PersonaSpec) -> List[AgentCapability]:
+    return [
+        AgentCapability(name=name, description=name, confidence=confidence, required_resources=[])
+        for name, confidence in spec.capabilities.items()
+    ]
+
+class PersonaAgent(SpecializedAgent):
+    """
+    An agent playing a persona, such as a buyer or a sales rep.
+
+    Task assignments and messages are answered in character by the LLM,
+    with the persona's recent exchanges as context. The history is capped,
+    and ``checkpoint``/``restore`` move it (and the agent's performance
+    metrics) in and out of storage when the pool evicts the agent.
+    """
+
+    def __init__(
+        self,
+        spec: PersonaSpec,
+        llm_client: Any,
+        system_prompt: str,
+        max_history: int = 50,
+        context_turns: int = 3
+    ):
+        """
+        Args:
+            spec: Persona to play; its ``persona_id`` becomes the agent id
+            llm_client: Client shared by the pool
+            system_prompt: The rendered system prompt
+            max_history: Exchanges kept in the task history
+            context_turns: Recent exchanges sent along with each request
+        """
+        super().__init__(
+            name=spec.name,
+            role=AgentRole(spec.role),
+            capabilities=_capabilities(spec),
+            llm_client=llm_client,
+            specialization="persona"
+        )
+        self.id = spec.persona_id
+        self.llm_tier = spec.llm_tier
+        self.system_prompt = system_prompt
+        self.max_history = max_history
+        self.context_turns = context_turns
+
+    def process_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer a task assignment or a message in character."""
+        if message.get("type") == "task_assignment":
+            content = self.respond(message.get("description", ""))
+            return {
+                "type": "task_completion",
+                "task_id": message.get("task_id"),
+                "content": content,
+                "status": "success"
+            }
+        content = self.respond(str(message.get("content", "")))
+        return {"type": "response", "content": content, "status": "success"}
+
+    def respond(self, text: str) -> str:
+        """One in-character reply to ``text``, recorded in the history."""
+        messages = [{"role": "system", "content": self.system_prompt}] + self.recall(text)
+        for entry in self._task_history[-self.context_turns:]:
+            messages.append({"role": "user", "content": entry["input"]})
+            messages.append({"role": "assistant", "content": entry["output"]})
+        messages.append({"role": "user", "content": text})
+        content = self.llm_client.call_api(messages)
+        self.add_to_history({"input": text, "output": content})
+        return content
+
+    def can_handle_task(self, task: Dict[str, Any]) -> bool:
+        """Determine if the persona can handle a specific task."""
+        return any(
+            cap.name in task.get("required_capabilities", [])
+            for cap in self.capabilities
+        )
+
+    def add_to_history(self, task: Dict[str, Any]) -> None:
+        """Add an exchange to the history, dropping the oldest beyond ``max_history``."""
+        super().add_to_history(task)
+        if len(self._task_history) > self.max_history:
+            del self._task_history[:len(self._task_history) - self.max_history]
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """State to keep while the agent is evicted."""
+        return {
+            "history": self._task_history,
+            "performance_metrics": self.state.performance_metrics
+        }
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        """Resume from a ``checkpoint``."""
+        self._task_history = list(state.get("history", []))[-self.max_history:]
+        self.state.performance_metrics.update(state.get("performance_metrics", {}))
+
+class PersonaProfile:
+    """
+    A registered persona as task assignment sees it, without building its
+    agent: its id, capabilities and task test, and no performance history.
+    """
+
+    def __init__(self, spec: PersonaSpec):
+        self.id = spec.persona_id
+        self.name = spec.name
+        self.capabilities = _capabilities(spec)
+        self.state = AgentState()
+
+    can_handle_task = PersonaAgent.can_handle_task
+
+class AgentPool:
+    """
+    Persona agents built on first use and evicted when idle.
+
+    Registering a persona stores only its ``PersonaSpec`` and indexes its
+    capabilities. ``acquire`` builds the agent (restoring any checkpoint)
+    the first time it is needed; ``evict`` checkpoints and drops agents idle
+    for ``idle_timeout`` or, least recently used first, beyond
+    ``max_active``. Memory held per persona and the work of finding
+    candidates for a task therefore follow the active agents and the
+    personas with the right capabilities, not everything registered.
+
+    Checkpoints are kept in memory as compact JSON, or written atomically
+    to ``checkpoint_dir`` so they survive restarts.
+    """
+
+    def __init__(
+        self,
+        llm_client: Any,
+        idle_timeout: Optional[float] = 300.0,
+        max_active: int = 256,
+        checkpoint_dir: Optional[str] = None,
+        prompt_manager: Optional[Any] = None,
+        max_history: int = 50
+    ):
+        """
+        Args:
+            llm_client: Client shared by every persona agent
+            idle_timeout: Seconds without use before an agent is evicted; None never
+            max_active: Agents kept built at once
+            checkpoint_dir: Directory for checkpoints; None keeps them in memory
+            prompt_manager: Renders ``PersonaSpec.template`` prompts
+            max_history: Exchanges each agent keeps
+        """
+        self.llm_client = llm_client
+        self.idle_timeout = idle_timeout
+        self.max_active = max_active
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else None
+        if self.checkpoint_dir is not None:
+            self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self.prompt_manager = prompt_manager
+        self.max_history = max_history
+        self._specs: Dict[str, PersonaSpec] = {}
+        self._by_capability: Dict[str, Dict[str, float]] = {}  # capability -> persona id -> confidence
+        self._active: "OrderedDict[str, PersonaAgent]" = OrderedDict()  # least recently used first
+        self._last_used: Dict[str, float] = {}
+        self._checkpoints: Dict[str, bytes] = {}
+        self._serializer = get_serializer("json")
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def __contains__(self, persona_id: str) -> bool:
+        return persona_id in self._specs
+
+    @property
+    def active(self) -> Dict[str, PersonaAgent]:
+        """The agents currently built, by persona id."""
+        with self._lock:
+            return dict(self._active)
+
+    def register(self, spec: PersonaSpec) -> None:
+        """Register (or replace) a persona without building it."""
+        with self._lock:
+            if spec.persona_id in self._specs:
+                self._unindex(self._specs[spec.persona_id])
+            self._specs[spec.persona_id] = spec
+            for name, confidence in spec.capabilities.items():
+                self._by_capability.setdefault(name, {})[spec.persona_id] = confidence
+
+    def register_many(self, specs: Iterable[PersonaSpec]) -> None:
+        for spec in specs:
+            self.register(spec)
+
+    def unregister(self, persona_id: str) -> None:
+        """Forget a persona, its agent and its checkpoint."""
+        with self._lock:
+            spec = self._specs.pop(persona_id, None)
+            if spec is not None:
+                self._unindex(spec)
+            self._active.pop(persona_id, None)
+            self._last_used.pop(persona_id, None)
+            self._checkpoints.pop(persona_id, None)
+        if self.checkpoint_dir is not None:
+            self._checkpoint_path(persona_id).unlink(missing_ok=True)
+
+    def _unindex(self, spec: PersonaSpec) -> None:
+        for name in spec.capabilities:
+            holders = self._by_capability.get(name)
+            if holders is not None:
+                holders.pop(spec.persona_id, None)
+                if not holders:
+                    del self._by_capability[name]
+
+    def candidates(self, required_capabilities: List[str], limit: int = 1) -> List[str]:
+        """
+        Personas with any of the capabilities, best total confidence first.
+
+        Only the capability index is read, so the cost follows the personas
+        holding those capabilities rather than all registered ones.
+        """
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for name in required_capabilities:
+                for persona_id, confidence in self._by_capability.get(name, {}).items():
+                    totals[persona_id] = totals.get(persona_id, 0.0) + confidence
+        ranked = sorted((persona_id for persona_id, total in totals.items() if total > 0), key=totals.get, reverse=True)
+        return ranked[:limit]
+
+    def profile(self, persona_id: str) -> Optional[PersonaProfile]:
+        """What assignment needs to score the persona, or None if it is not registered."""
+        with self._lock:
+            spec = self._specs.get(persona_id)
+        return PersonaProfile(spec) if spec is not None else None
+
+    def acquire(self, persona_id: str) -> Optional[PersonaAgent]:
+        """
+        The persona's agent, built and restored from its checkpoint if needed.
+
+        Returns:
+            Optional[PersonaAgent]: None if the persona is not registered
+        """
+        with self._lock:
+            agent = self._active.get(persona_id)
+            if agent is not None:
+                self._active.move_to_end(persona_id)
+                self._last_used[persona_id] = time.monotonic()
+                return agent
+            spec = self._specs.get(persona_id)
+            if spec is None:
+                return None
+            agent = PersonaAgent(spec, self.llm_client, self._render(spec), self.max_history)
+            state = self._load_checkpoint(persona_id)
+            if state is not None:
+                agent.restore(state)
+            self._active[persona_id] = agent
+            self._last_used[persona_id] = time.monotonic()
+        metrics.inc("agent_pool_materialized_total", labels={"source": "checkpoint" if state is not None else "spec"})
+        return agent
+
+    def touch(self, persona_id: str) -> None:
+        """Mark an active agent as just used."""
+        with self._lock:
+            if persona_id in self._active:
+                self._active.move_to_end(persona_id)
+                self._last_used[persona_id] = time.monotonic()
+
+    def evict(self, is_busy: Optional[Callable[[str], bool]] = None) -> List[PersonaAgent]:
+        """
+        Checkpoint and drop idle agents, and the least recently used beyond ``max_active``.
+
+        Args:
+            is_busy: Agents for which this returns True are kept, e.g. ones
+                with unfinished tasks
+
+        Returns:
+            List[PersonaAgent]: The evicted agents
+        """
+        now = time.monotonic()
+        evicted: List[PersonaAgent] = []
+        with self._lock:
+            excess = len(self._active) - self.max_active
+            for persona_id in list(self._active):
+                idle = self.idle_timeout is not None and now - self._last_used[persona_id] > self.idle_timeout
+                if excess <= 0 and not idle:
+                    # Later agents were used more recently still
+                    break
+                if is_busy is not None and is_busy(persona_id):
+                    continue
+                agent = self._active.pop(persona_id)
+                del self._last_used[persona_id]
+                self._save_checkpoint(persona_id, agent.checkpoint())
+                evicted.append(agent)
+                excess -= 1
+                metrics.inc("agent_pool_evicted_total", labels={"reason": "idle" if idle else "capacity"})
+        return evicted
+
+    def _render(self, spec: PersonaSpec) -> str:
+        """The persona's system prompt with its variables filled in."""
+        if spec.template is not None and self.prompt_manager is not None:
+            return self.prompt_manager.get_template(spec.template).format(**spec.variables)
+        return spec.system_prompt.format_map(spec.variables) if spec.variables else spec.system_prompt
+
+    def _checkpoint_path(self, persona_id: str) -> Path:
+        return self.checkpoint_dir / f"{file_stem(persona_id)}.json"
+
+    def _save_checkpoint(self, persona_id: str, state: Dict[str, Any]) -> None:
+        data = canonical_json(state).encode("utf-8")
+        if self.checkpoint_dir is None:
+            self._checkpoints[persona_id] = data
+            return
+        path = self._checkpoint_path(persona_id)
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def _load_checkpoint(self, persona_id: str) -> Optional[Dict[str, Any]]:
+        if self.checkpoint_dir is None:
+            data = self._checkpoints.pop(persona_id, None)
+            return self._serializer.loads(data) if data is not None else None
+        path = self._checkpoint_path(persona_id)
+        if not path.exists():
+            return None
+        try:
+            return self._serializer.loads(path.read_bytes())
+        except Exception as e:
+            logger.warning("Ignoring unreadable agent checkpoint %s: %s", path, e)
+            return None
+
+    def get_stats(self) -> Dict[str, int]:
+        """Registered personas, built agents and stored checkpoints."""
+        if self.checkpoint_dir is not None:
+            stored = sum(1 for _ in self.checkpoint_dir.glob("*.json"))
+        else:
+            stored = len(self._checkpoints)
+        with self._lock:
+            return {"registered": len(self._specs), "active": len(self._active), "checkpoints": stored}
@@ -0,0 +1,194 @@
+import logging
+import threading
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class AcceptanceCache:
+    """
+    Answers of ``can_handle_task`` per agent and kind of task, kept between
+    scoring passes so each agent is asked about a kind once. An agent's
+    answers are dropped when its capabilities change; call ``forget`` when
+    it leaves.
+    """
+
+    def __init__(self):
+        self._kinds: Dict[FrozenSet[str], int] = {}
+        # Per agent id: its capability names, and per known kind 0 (not asked), 1 (accepts) or 2 (refuses)
+        self._answers: Dict[str, Tuple[Tuple[str, ...], np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def forget(self, agent_id: str) -> None:
+        with self._lock:
+            self._answers.pop(agent_id, None)
+
+    def refused(self, agents: Sequence[Any], kinds: Sequence[FrozenSet[str]], eligible: np.ndarray) -> np.ndarray:
+        """Agents x kinds mask of the ``eligible`` pairs whose agent refuses the kind."""
+        with self._lock:
+            ids = np.fromiter(
+                (self._kinds.setdefault(kind, len(self._kinds)) for kind in kinds),
+                dtype=np.int64,
+                count=len(kinds)
+            )
+            size = len(self._kinds)
+            rows = []
+            for agent in agents:
+                names = tuple(cap.name for cap in agent.capabilities)
+                entry = self._answers.get(agent.id)
+                if entry is None or entry[0] != names:
+                    entry = (names, np.zeros(size, dtype=np.int8))
+                elif entry[1].size < size:
+                    entry = (names, np.r_[entry[1], np.zeros(size - entry[1].size, dtype=np.int8)])
+                self._answers[agent.id] = entry
+                rows.append(entry[1])
+            table = np.stack(rows)[:, ids] if rows else np.zeros((0, len(kinds)), dtype=np.int8)
+            for a, k in zip(*np.nonzero(eligible & (table == 0))):
+                task = {"required_capabilities": sorted(kinds[k])}
+                table[a, k] = rows[a][ids[k]] = 1 if agents[a].can_handle_task(task) else 2
+        return eligible & (table == 2)
+
+def score_matrix(
+    agents: Sequence[Any],
+    tasks: Sequence[Any],
+    accepts: Optional[AcceptanceCache] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score every agent against every kind of task at once.
+
+    Tasks needing the same set of capabilities score the same, so they share
+    a column: the matrix is agents x distinct capability sets, which stays
+    small however many tasks arrive. An agent's score is the sum of its
+    confidences in the required capabilities, times the mean of its
+    performance metrics (1.0 when it has none yet). Only agents with a
+    positive score whose ``can_handle_task`` accepts the kind can take a
+    task, as with the per-task greedy placement.
+
+    Args:
+        agents: Agents with ``capabilities``, ``state.performance_metrics``
+            and ``can_handle_task``
+        tasks: Tasks with ``required_capabilities``
+        accepts: Cache of ``can_handle_task`` answers shared between calls;
+            without one, every agent is asked about every kind it scores on
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Agents x kinds scores, and each task's kind
+    """
+    kinds: Dict[FrozenSet[str], int] = {}
+    task_kinds = np.fromiter(
+        (kinds.setdefault(frozenset(task.required_capabilities), len(kinds)) for task in tasks),
+        dtype=np.int64,
+        count=len(tasks)
+    )
+    vocabulary: Dict[str, int] = {}
+    rows: List[int] = []
+    cols: List[int] = []
+    for kind, names in enumerate(kinds):
+        for name in names:
+            rows.append(vocabulary.setdefault(name, len(vocabulary)))
+            cols.append(kind)
+    required = np.zeros((len(vocabulary), len(kinds)))
+    required[rows, cols] = 1.0
+
+    confidence = np.zeros((len(agents), len(vocabulary)))
+    performance = np.ones(len(agents))
+    for a, agent in enumerate(agents):
+        for cap in agent.capabilities:
+            k = vocabulary.get(cap.name)
+            if k is not None:
+                confidence[a, k] += cap.confidence
+        values = agent.state.performance_metrics
+        if values:
+            performance[a] = sum(values.values()) / len(values)
+
+    scores = (confidence @ required) * performance[:, None]
+    accepts = AcceptanceCache() if accepts is None else accepts
+    scores[accepts.refused(agents, list(kinds), scores > 0)] = 0.0
+    return scores, task_kinds
+
+def _water_level(load: np.ndarray, n: int) -> int:
+    """Lowest load level at which ``n`` more tasks fit on agents with these loads."""
+    load = np.sort(load)
+    below = np.arange(1, load.size + 1)
+    levels = np.ceil((n + np.cumsum(load)) / below)
+    # The level fills the k least loaded agents without reaching the next one
+    fits = levels <= np.r_[load[1:], np.inf]
+    return int(levels[np.argmax(fits)])
+
+def balanced_assignment(
+    scores: np.ndarray,
+    kinds: Optional[np.ndarray] = None,
+    load: Optional[np.ndarray] = None,
+    priority: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Assign a batch of tasks to agents, balancing load against suitability.
+
+    Agents are filled up to a common load level: the lowest level, counting
+    the tasks they already hold, at which the batch fits, as in water filling. Each round, every
+    unassigned task proposes to its best-scoring agent that still has room,
+    and each agent keeps as many proposals as it has room for, higher
+    priority and then higher score first. Agents that fill up drop out and
+    the rest of the tasks propose again. When the tasks left only fit agents
+    that are full, the level is raised until one of them has room. A round
+    is a handful of NumPy operations over the agents x kinds matrix and the
+    unassigned tasks, so thousands of tasks over hundreds of agents take
+    milliseconds.
+
+    Args:
+        scores: Agents x kinds suitability; agents scoring 0 or less cannot
+            take tasks of that kind
+        kinds: Column of ``scores`` for each task; defaults to one column per task
+        load: Tasks each agent already holds
+        priority: Task priorities; higher wins a contested agent
+
+    Returns:
+        np.ndarray: The agent index for each task, or -1 if no agent can take it
+    """
+    n_agents, n_kinds = scores.shape
+    kinds = np.arange(n_kinds) if kinds is None else np.asarray(kinds, dtype=np.int64)
+    assignment = np.full(kinds.size, -1, dtype=np.int64)
+    if n_agents == 0 or kinds.size == 0:
+        return assignment
+    load = np.zeros(n_agents, dtype=np.int64) if load is None else np.asarray(load, dtype=np.int64).copy()
+    priority = np.zeros(kinds.size) if priority is None else np.asarray(priority, dtype=np.float64)
+
+    eligible = scores > 0
+    remaining = np.flatnonzero(eligible.any(axis=0)[kinds])
+    if remaining.size == 0:
+        return assignment
+    level = _water_level(load[eligible[:, np.unique(kinds[remaining])].any(axis=1)], remaining.size)
+    # Kinds x agents; an agent that fills up has its column zeroed until the level rises
+    open_scores = np.where(eligible, scores, 0.0).T.copy()
+    closed = np.zeros(n_agents, dtype=bool)
+
+    while remaining.size:
+        room = level - load
+        newly_closed = (room <= 0) & ~closed
+        if newly_closed.any():
+            open_scores[:, newly_closed] = 0.0
+            closed |= newly_closed
+        best_agent = open_scores.argmax(axis=1)
+        best_score = open_scores[np.arange(n_kinds), best_agent]
+        task_kinds = kinds[remaining]
+        proposing = best_score[task_kinds] > 0
+        if not proposing.any():
+            # Every agent that fits what is left is full at this level
+            level = max(level, load[eligible[:, np.unique(task_kinds)].any(axis=1)].min()) + 1
+            reopened = closed & (level - load > 0)
+            open_scores[:, reopened] = np.where(eligible[reopened], scores[reopened], 0.0).T
+            closed &= ~reopened
+            continue
+        tasks = remaining[proposing]
+        agents = best_agent[task_kinds[proposing]]
+        # Group proposals by agent, best first within each agent
+        order = np.lexsort((-best_score[task_kinds[proposing]], -priority[tasks], agents))
+        tasks, agents = tasks[order], agents[order]
+        starts = np.flatnonzero(np.r_[True, agents[1:] != agents[:-1]])
+        rank = np.arange(agents.size) - np.repeat(starts, np.diff(np.r_[starts, agents.size]))
+        accept = rank < room[agents]
+        assignment[tasks[accept]] = agents[accept]
+        load += np.bincount(agents[accept], minlength=n_agents)
+        remaining = remaining[assignment[remaining] < 0]
+    return assignment
@@ -41,6 +41,10 @@ class AgentState:
 class Agent(ABC):
     """Abstract base class for all agents."""
     
+    # Model tier this agent's LLM calls start at when the client is a
+    # ModelCascade (e.g. "fast" or "large"); None uses the cascade default
+    llm_tier: Optional[str] = None
+    
     def __init__(
         self,
         name: str,
@@ -55,6 +59,11 @@ class Agent(ABC):
         self.llm_client = llm_client
         self.state = AgentState()
         self._observers: List[Callable] = []
+        self._event_bus: Optional[Any] = None
+        self._subscriptions: Dict[Callable, Any] = {}
+        self.memory: Optional[Any] = None
+        self.memory_top_k = 3
+        self.memory_scope: Optional[Dict[str, Any]] = None
         
     @abstractmethod
     def process_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
@@ -66,16 +75,63 @@ class Agent(ABC):
         """Determine if the agent can handle a specific task."""
         pass
     
+    def attach_event_bus(self, event_bus: Any) -> None:
+        """
+        Deliver this agent's events through an event bus instead of inline.
+        
+        Existing and future observers become bus subscriptions filtered to
+        this agent, so a slow observer no longer stalls the agent.
+        """
+        self._event_bus = event_bus
+        for observer in self._observers:
+            self._subscribe(observer)
+            
+    def attach_memory(self, memory: Any, top_k: int = 3, scope: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Give the agent a ``MemoryIndex`` to recall past sessions from.
+        
+        Args:
+            memory: Index searched for snippets relevant to each request
+            top_k: Snippets added to a prompt
+            scope: Metadata filter, e.g. ``{"rep_id": ...}``
+        """
+        self.memory = memory
+        self.memory_top_k = top_k
+        self.memory_scope = scope
+        
+    def recall(self, query: str) -> List[Dict[str, str]]:
+        """System messages with the memory snippets most relevant to ``query``."""
+        if self.memory is None:
+            return []
+        from ..memory import format_snippets
+        block = format_snippets(self.memory.search(query, self.memory_top_k, where=self.memory_scope))
+        return [{"role": "system", "content": block}] if block else []
+        
+    def _subscribe(self, observer: Callable) -> None:
+        self._subscriptions[observer] = self._event_bus.subscribe(
+            observer,
+            predicate=lambda source, event: source is self,
+            name=getattr(observer, "__name__", "observer")
+        )
+        
     def add_observer(self, observer: Callable) -> None:
         """Add an observer to be notified of state changes."""
         self._observers.append(observer)
+        if self._event_bus is not None:
+            self._subscribe(observer)
         
     def remove_observer(self, observer: Callable) -> None:
         """Remove an observer."""
         self._observers.remove(observer)
+        subscription = self._subscriptions.pop(observer, None)
+        if subscription is not None:
+            self._event_bus.unsubscribe(subscription)
         
     def notify_observers(self, event: str, data: Any) -> None:
         """Notify all observers of a state change."""
+        if self._event_bus is not None:
+            self._event_bus.publish(self, event, data)
+            return
         for observer in self._observers:
             observer(self, event, data)
             
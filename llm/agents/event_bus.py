@@ -0,0 +1,212 @@
+import time
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, FrozenSet, List, Optional, Tuple
+
+from ..metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+Observer = Callable[[Any, str, Any], None]
+Predicate = Callable[[Any, str], bool]
+
+@dataclass
+class SubscriptionConfig:
+    """Delivery settings for one event bus subscriber."""
+    max_queue: int = 1000
+    overflow: str = "drop_oldest"  # "drop_oldest", "drop_newest" or "block"
+    coalesce_events: FrozenSet[str] = frozenset({"state_changed"})
+    debounce: float = 0.0  # seconds to hold coalescible events so bursts merge
+
+@dataclass
+class SubscriptionStats:
+    """Counters for one subscriber."""
+    delivered: int = 0
+    coalesced: int = 0
+    dropped: int = 0
+    errors: int = 0
+
+class Subscription:
+    """
+    A subscriber with its own bounded queue and delivery thread.
+
+    Coalescible events from the same source replace each other while queued,
+    so the subscriber only sees the latest one. A slow subscriber only ever
+    delays itself; the overflow policy decides what happens when its queue
+    is full.
+    """
+
+    def __init__(self, name: str, callback: Observer, predicate: Optional[Predicate], config: SubscriptionConfig):
+        self.name = name
+        self.callback = callback
+        self.predicate = predicate
+        self.config = config
+        self.stats = SubscriptionStats()
+        # Entries are ("event", (source, event, data)) or ("key", key, enqueued_at)
+        self._queue: Deque[Tuple] = deque()
+        self._latest: Dict[Tuple[int, str], Tuple[Any, str, Any]] = {}
+        self._condition = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"event-bus-{name}", daemon=True)
+        self._thread.start()
+
+    def offer(self, source: Any, event: str, data: Any) -> None:
+        """Queue an event for delivery according to the subscription policy."""
+        if self.predicate is not None and not self.predicate(source, event):
+            return
+        item = (source, event, data)
+        with self._condition:
+            if event in self.config.coalesce_events:
+                key = (id(source), event)
+                if key in self._latest:
+                    self._latest[key] = item
+                    self.stats.coalesced += 1
+                    metrics.inc("event_bus_coalesced_total", labels={"subscriber": self.name})
+                    return
+                entry = ("key", key, time.monotonic())
+            else:
+                entry = ("event", item)
+
+            if len(self._queue) >= self.config.max_queue:
+                if self.config.overflow == "block":
+                    while len(self._queue) >= self.config.max_queue and not self._closed:
+                        self._condition.wait()
+                elif self.config.overflow == "drop_newest":
+                    self._dropped()
+                    return
+                else:
+                    dropped = self._queue.popleft()
+                    if dropped[0] == "key":
+                        self._latest.pop(dropped[1], None)
+                    self._dropped()
+
+            if entry[0] == "key":
+                self._latest[entry[1]] = item
+            self._queue.append(entry)
+            self._condition.notify_all()
+
+    def _dropped(self) -> None:
+        self.stats.dropped += 1
+        metrics.inc("event_bus_dropped_total", labels={"subscriber": self.name})
+
+    def _run(self) -> None:
+        """Delivery loop."""
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if self._closed and not self._queue:
+                    return
+                entry = self._queue[0]
+            if entry[0] == "key" and self.config.debounce > 0:
+                remaining = entry[2] + self.config.debounce - time.monotonic()
+                if remaining > 0:
+                    time.sleep(remaining)
+            with self._condition:
+                self._queue.popleft()
+                item = entry[1] if entry[0] == "event" else self._latest.pop(entry[1], None)
+                self._busy = item is not None
+                self._condition.notify_all()
+            if item is None:
+                continue
+            try:
+                self.callback(*item)
+                self.stats.delivered += 1
+            except Exception as e:
+                self.stats.errors += 1
+                logger.error("Event subscriber %s failed on %s: %s", self.name, item[1], e)
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def idle(self) -> bool:
+        """True when nothing is queued or being delivered."""
+        with self._condition:
+            return not self._queue and not self._busy
+
+    def close(self) -> None:
+        """Deliver what is queued, then stop the delivery thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout=5)
+
+class EventBus:
+    """
+    Publish/subscribe bus with queued, non-blocking delivery.
+
+    Publishing only enqueues; every subscriber is called from its own
+    delivery thread, so a slow observer cannot stall the publisher.
+    """
+
+    def __init__(self, default_config: Optional[SubscriptionConfig] = None):
+        """Initialize the bus with default subscription settings."""
+        self.default_config = default_config or SubscriptionConfig()
+        self._subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(
+        self,
+        callback: Observer,
+        predicate: Optional[Predicate] = None,
+        config: Optional[SubscriptionConfig] = None,
+        name: Optional[str] = None
+    ) -> Subscription:
+        """
+        Subscribe to events.
+
+        Args:
+            callback: Called as ``callback(source, event, data)``
+            predicate: Optional ``predicate(source, event)`` filter
+            config: Delivery settings; defaults to the bus defaults
+            name: Name used in logs and metrics
+
+        Returns:
+            Subscription: Handle for ``unsubscribe``
+        """
+        subscription = Subscription(
+            name or getattr(callback, "__name__", "subscriber"),
+            callback,
+            predicate,
+            config or self.default_config
+        )
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscriber after delivering its queued events."""
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+        subscription.close()
+
+    def publish(self, source: Any, event: str, data: Any) -> None:
+        """Queue an event for every matching subscriber."""
+        metrics.inc("event_bus_published_total")
+        for subscription in self._subscriptions:
+            subscription.offer(source, event, data)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every subscriber has drained its queue.
+
+        Returns:
+            bool: False if the timeout expired first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not all(s.idle() for s in self._subscriptions):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def close(self) -> None:
+        """Stop every subscriber."""
+        with self._lock:
+            subscriptions, self._subscriptions = self._subscriptions, []
+        for subscription in subscriptions:
+            subscription.close()
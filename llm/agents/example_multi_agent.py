@@ -8,8 +8,6 @@ from ..llm_client import LLMClient, LLMConfig
 from .multi_agent_orchestrator import MultiAgentOrchestrator, Task
 from .specialized_agents import LeaderAgent, AnalystAgent, CreativeAgent
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def create_agents(llm_client: Any) -> Dict[str, Any]:
@@ -65,6 +63,9 @@ def handle_group_event(orchestrator: MultiAgentOrchestrator, event: str, data: A
         logger.info(f"Task completed: {data}")
 
 def main():
+    # Configure logging
+    logging.basicConfig(level=logging.INFO)
+    
     # Initialize LLM client
     llm_client = LLMClient(LLMConfig(
         api_url=os.getenv("LLM_API_URL", "https://api.inflection.ai/v1/chat/completions"),
@@ -0,0 +1,274 @@
+import zlib
+import logging
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..metrics import metrics
+from ..serialization import cache_key, to_prompt_text
+
+logger = logging.getLogger(__name__)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English)."""
+    return max(1, len(text) // 4)
+
+def _split_items(data: Any) -> Tuple[str, List[str]]:
+    """
+    Split analysis input into a shared header and a list of items.
+
+    A dict's longest non-empty list (e.g. transcript segments) becomes the
+    items and the remaining keys the header; a list is used as is; anything
+    else is split into lines.
+    """
+    if isinstance(data, dict):
+        lists = [(key, value) for key, value in data.items() if isinstance(value, list) and value]
+        if lists:
+            key, items = max(lists, key=lambda kv: len(kv[1]))
+            header = {k: v for k, v in data.items() if k != key}
+            return (to_prompt_text(header) if header else ""), [to_prompt_text(item) for item in items]
+    if isinstance(data, list):
+        return "", [to_prompt_text(item) for item in data]
+    return "", [line for line in to_prompt_text(data).splitlines() if line.strip()]
+
+def _split_long_item(item: str, max_tokens: int) -> List[str]:
+    """Break an item that exceeds the budget on its own into word runs."""
+    pieces: List[str] = []
+    words: List[str] = []
+    for word in item.split():
+        if words and estimate_tokens(" ".join(words + [word])) > max_tokens:
+            pieces.append(" ".join(words))
+            words = []
+        words.append(word)
+    if words:
+        pieces.append(" ".join(words))
+    return pieces
+
+def chunk_transcript(data: Any, max_tokens: int, boundary_modulus: int = 4) -> Tuple[str, List[str]]:
+    """
+    Split a transcript into chunks of at most ``max_tokens``.
+
+    Boundaries are content-defined: once a chunk is half full it ends after
+    any item whose hash is divisible by ``boundary_modulus``. An edit therefore
+    only changes the chunks around it; later boundaries fall on the same
+    items as before, so their chunks (and cached analyses) are reused.
+
+    The header is prepended to every chunk, so it counts against each
+    chunk's budget; a header taking more than half the budget is chunked
+    with the items instead.
+
+    Args:
+        data: Transcript as text, a list of segments or a dict holding one
+        max_tokens: Token budget per chunk, header included
+        boundary_modulus: Controls the average chunk size between half and full budget
+
+    Returns:
+        Tuple[str, List[str]]: Header shared by every chunk (possibly empty),
+            and the chunk texts
+    """
+    header, items = _split_items(data)
+    if header and estimate_tokens(header) > max_tokens // 2:
+        items = [line for line in header.splitlines() if line.strip()] + items
+        header = ""
+    max_tokens -= estimate_tokens(header) if header else 0
+    chunks: List[str] = []
+    current: List[str] = []
+    tokens = 0
+    for item in items:
+        for piece in (_split_long_item(item, max_tokens) if estimate_tokens(item) > max_tokens else [item]):
+            size = estimate_tokens(piece)
+            if current and tokens + size > max_tokens:
+                chunks.append("\n".join(current))
+                current, tokens = [], 0
+            current.append(piece)
+            tokens += size
+            if tokens >= max_tokens // 2 and zlib.crc32(piece.encode("utf-8")) % boundary_modulus == 0:
+                chunks.append("\n".join(current))
+                current, tokens = [], 0
+    if current:
+        chunks.append("\n".join(current))
+    return header, chunks
+
+class AnalysisCache:
+    """Thread-safe LRU cache of chunk and reduce results keyed by prompt content."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class MapReduceAnalyzer:
+    """
+    Analyze a long transcript as concurrent chunk analyses merged by a reduce step.
+
+    Input that fits in one chunk is analyzed with a single call, as before.
+    Longer input is chunked, chunks are analyzed in parallel and the partial
+    insights merged; if the partials themselves exceed the budget they are
+    reduced in groups until one answer remains. Every chunk and reduce
+    result is cached by its prompt, so re-analyzing an edited transcript
+    only calls the LLM for the chunks that changed.
+    """
+
+    def __init__(
+        self,
+        llm_client: Any,
+        max_chunk_tokens: int = 3000,
+        max_concurrency: int = 4,
+        cache: Optional[AnalysisCache] = None
+    ):
+        """
+        Args:
+            llm_client: Client (or router) used for every call
+            max_chunk_tokens: Token budget of each chunk's content
+            max_concurrency: Chunk analyses in flight at once
+            cache: Shared result cache; a private one is created if omitted
+        """
+        self.llm_client = llm_client
+        self.max_chunk_tokens = max_chunk_tokens
+        self.max_concurrency = max_concurrency
+        self.cache = cache if cache is not None else AnalysisCache()
+
+    def _call(self, system: str, content: str) -> Tuple[str, bool]:
+        """Call the LLM through the cache; returns the answer and whether it was cached."""
+        messages = [{"role": "system", "content": system}, {"role": "user", "content": content}]
+        key = cache_key({"model": getattr(getattr(self.llm_client, "config", None), "model", None), "messages": messages})
+        cached = self.cache.get(key)
+        if cached is not None:
+            metrics.inc("analysis_cache_hits_total")
+            return cached, True
+        metrics.inc("analysis_cache_misses_total")
+        answer = self.llm_client.call_api(messages)
+        self.cache.put(key, answer)
+        return answer, False
+
+    @staticmethod
+    def _single_prompt(analysis_type: str) -> str:
+        return f"You are a data analyst. Analyze the following data for {analysis_type} insights:"
+
+    @staticmethod
+    def _map_prompt(analysis_type: str) -> str:
+        # No part numbers: the prompt must depend only on the chunk's content
+        # so an edit elsewhere in the transcript keeps this cache key
+        return (
+            f"You are a data analyst. The following is one part of a longer transcript. "
+            f"Extract the {analysis_type} insights it contains, concisely:"
+        )
+
+    @staticmethod
+    def _reduce_prompt(analysis_type: str) -> str:
+        return (
+            f"You are a data analyst. The following are {analysis_type} insights extracted from "
+            f"consecutive parts of one transcript. Merge them into a single analysis, removing repetition:"
+        )
+
+    def stream(self, data: Any, analysis_type: str = "general") -> Iterator[Dict[str, Any]]:
+        """
+        Analyze ``data``, yielding partial results as chunks finish.
+
+        Yields:
+            Dict[str, Any]: ``partial_analysis`` items (``chunk``, ``total``,
+                ``content``, ``cached``) in completion order, then a final
+                ``analysis_result`` with ``chunks`` and ``cached_chunks``
+        """
+        text = to_prompt_text(data)
+        if estimate_tokens(text) <= self.max_chunk_tokens:
+            content, cached = self._call(self._single_prompt(analysis_type), text)
+            yield self._final(content, analysis_type, 1, int(cached))
+            return
+
+        header, chunks = chunk_transcript(data, self.max_chunk_tokens)
+        if not chunks:
+            content, cached = self._call(self._single_prompt(analysis_type), text)
+            yield self._final(content, analysis_type, 1, int(cached))
+            return
+        prefix = f"{header}\n\n" if header else ""
+
+        partials: List[Optional[str]] = [None] * len(chunks)
+        cached_chunks = 0
+        with metrics.span("analysis_map"), ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            # Run each call in a copy of this context so deadlines propagate
+            futures = {
+                pool.submit(
+                    contextvars.copy_context().run,
+                    self._call, self._map_prompt(analysis_type), prefix + chunk
+                ): i
+                for i, chunk in enumerate(chunks)
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                partials[i], cached = future.result()
+                cached_chunks += cached
+                yield {
+                    "type": "partial_analysis",
+                    "chunk": i,
+                    "total": len(chunks),
+                    "content": partials[i],
+                    "cached": cached
+                }
+
+        with metrics.span("analysis_reduce"):
+            content = self._reduce(partials, analysis_type)
+        yield self._final(content, analysis_type, len(chunks), cached_chunks)
+
+    def _reduce(self, partials: List[str], analysis_type: str) -> str:
+        """Merge partial analyses, in budget-sized groups if needed."""
+        while True:
+            groups: List[List[str]] = [[]]
+            tokens = 0
+            for partial in partials:
+                size = estimate_tokens(partial)
+                if groups[-1] and tokens + size > self.max_chunk_tokens:
+                    groups.append([])
+                    tokens = 0
+                groups[-1].append(partial)
+                tokens += size
+            merged = [
+                self._call(
+                    self._reduce_prompt(analysis_type),
+                    "\n\n".join(f"Part {i + 1}:\n{text}" for i, text in enumerate(group))
+                )[0] if len(group) > 1 else group[0]
+                for group in groups
+            ]
+            if len(merged) == 1:
+                return merged[0]
+            if len(merged) == len(partials):
+                # Each partial alone fills the budget; merge them all at once
+                return self._call(self._reduce_prompt(analysis_type), "\n\n".join(merged))[0]
+            partials = merged
+
+    @staticmethod
+    def _final(content: str, analysis_type: str, chunks: int, cached_chunks: int) -> Dict[str, Any]:
+        return {
+            "type": "analysis_result",
+            "content": content,
+            "analysis_type": analysis_type,
+            "status": "completed",
+            "chunks": chunks,
+            "cached_chunks": cached_chunks
+        }
+
+    def analyze(self, data: Any, analysis_type: str = "general") -> Dict[str, Any]:
+        """Analyze ``data`` and return only the final result."""
+        result: Dict[str, Any] = {}
+        for result in self.stream(data, analysis_type):
+            pass
+        return result
@@ -1,10 +1,20 @@
-from typing import List, Dict, Any, Optional, Set, Callable
+from typing import List, Dict, Any, Optional, Set, Callable, Tuple, FrozenSet, TYPE_CHECKING
 from dataclasses import dataclass
 import logging
 import uuid
+import threading
+from contextlib import nullcontext
 from datetime import datetime
 from .base_agent import Agent, AgentRole, AgentState
 from .specialized_agents import LeaderAgent, AnalystAgent, CreativeAgent
+from .event_bus import EventBus
+from ..metrics import metrics
+from ..serialization import Serializer, get_serializer
+from ..deadlines import AdmissionController, Deadline, DeadlineExceeded, LoadShedError, deadline_scope
+from ..cascade import workload_scope
+
+if TYPE_CHECKING:
+    from .agent_pool import AgentPool
 
 logger = logging.getLogger(__name__)
 
@@ -41,93 +51,328 @@ class GroupState:
 class MultiAgentOrchestrator:
     """Orchestrates multiple agents working together on tasks."""
     
-    def __init__(self, llm_client: Any):
-        """Initialize the orchestrator with an LLM client."""
+    def __init__(
+        self,
+        llm_client: Any,
+        event_bus: Optional[EventBus] = None,
+        admission: Optional[AdmissionController] = None,
+        stats_window: int = 100,
+        assignment_window: Optional[float] = None,
+        agent_pool: Optional["AgentPool"] = None
+    ):
+        """
+        Initialize the orchestrator with an LLM client.
+        
+        Args:
+            llm_client: LLM client shared by the orchestrator
+            event_bus: Optional bus for queued, coalesced observer delivery;
+                without one, observers are called inline
+            admission: Optional admission controller rejecting tasks whose
+                deadline cannot be met under the current load
+            stats_window: Recent performance scores kept per agent and rep
+                for percentiles
+            assignment_window: Seconds to collect added tasks before
+                assigning them together; None assigns each task as it is added
+            agent_pool: Optional pool of persona agents, added to the
+                orchestrator when first given a task and removed when the
+                pool evicts them
+        """
         self.llm_client = llm_client
+        self.event_bus = event_bus
+        self.admission = admission
         self.agents: Dict[str, Agent] = {}
         self.tasks: Dict[str, Task] = {}
         self.groups: Dict[str, Set[str]] = {}
         self.state = GroupState()
         self._observers: List[Callable] = []
         self._message_history: List[Dict[str, Any]] = []
+        # Performance scores per agent and per rep (responses carrying a
+        # "rep_id"), plus the sum of the mean performance of active agents,
+        # so group performance is O(1). NumPy is only imported here, not at
+        # package import.
+        from ..aggregates import StatsAggregator
+        self.agent_stats = StatsAggregator(window=stats_window)
+        self.rep_stats = StatsAggregator(window=stats_window)
+        self._active_agents: Set[str] = set()
+        self._active_performance_total = 0.0
+        self._active_task_count = 0
+        self._agent_load: Dict[str, int] = {}  # assigned, unfinished tasks per agent
+        self._accepts: Optional[Any] = None  # AcceptanceCache, created with the first plan
+        self.assignment_window = assignment_window
+        self.agent_pool = agent_pool
+        self._pending_tasks: List[Task] = []
+        self._pending_tasks_lock = threading.Lock()
+        self._pending_timer: Optional[threading.Timer] = None
+        self._aggregate_lock = threading.RLock()
+        self._subscriptions: Dict[Callable, Any] = {}
+        if event_bus is not None:
+            # One subscription for all agents; bursts of state_changed coalesce
+            self._agent_subscription = event_bus.subscribe(
+                self._handle_agent_event,
+                predicate=lambda source, event: isinstance(source, Agent) and source.id in self.agents,
+                name="orchestrator"
+            )
         
     def add_agent(self, agent: Agent) -> None:
         """Add an agent to the orchestrator."""
         self.agents[agent.id] = agent
-        agent.add_observer(self._handle_agent_event)
-        logger.info(f"Added agent: {agent.name} ({agent.role.value})")
+        if self.event_bus is not None:
+            agent.attach_event_bus(self.event_bus)
+        else:
+            agent.add_observer(self._handle_agent_event)
+        self._sync_agent_activity(agent)
+        logger.info("Added agent: %s (%s)", agent.name, agent.role.value)
         
     def remove_agent(self, agent_id: str) -> None:
         """Remove an agent from the orchestrator."""
+        self._detach_agent(agent_id, keep_stats=False)
+        
+    def _detach_agent(self, agent_id: str, keep_stats: bool) -> None:
+        """Drop an agent, keeping its performance history if it may come back."""
         if agent_id in self.agents:
             agent = self.agents[agent_id]
-            agent.remove_observer(self._handle_agent_event)
+            if self.event_bus is None:
+                agent.remove_observer(self._handle_agent_event)
+            with self._aggregate_lock:
+                if agent_id in self._active_agents:
+                    self._active_agents.discard(agent_id)
+                    self._active_performance_total -= self._mean_performance(agent_id)
+                if not keep_stats:
+                    self.agent_stats.remove(agent_id)
+                self._agent_load.pop(agent_id, None)
+            if self._accepts is not None:
+                self._accepts.forget(agent_id)
             del self.agents[agent_id]
-            logger.info(f"Removed agent: {agent.name}")
+            self._update_group_state()
+            logger.info("Removed agent: %s", agent.name)
             
     def create_group(self, name: str, agent_ids: List[str]) -> str:
         """Create a new agent group."""
         group_id = str(uuid.uuid4())
         self.groups[group_id] = set(agent_ids)
-        logger.info(f"Created group {name} with {len(agent_ids)} agents")
+        logger.info("Created group %s with %d agents", name, len(agent_ids))
         return group_id
         
     def add_task(self, task: Task) -> None:
-        """Add a new task to be performed."""
+        """
+        Add a new task to be performed.
+        
+        With an ``assignment_window`` the task waits for the rest of the
+        window's tasks and is assigned together with them; otherwise it is
+        assigned now.
+        """
+        if not self._admit_task(task):
+            return
+        logger.info("Added task: %s", task.description)
+        if self.assignment_window is None:
+            self._assign_tasks([task])
+            return
+        with self._pending_tasks_lock:
+            self._pending_tasks.append(task)
+            if self._pending_timer is None:
+                self._pending_timer = threading.Timer(self.assignment_window, self.assign_pending)
+                self._pending_timer.daemon = True
+                self._pending_timer.start()
+                
+    def add_tasks(self, tasks: List[Task]) -> None:
+        """Add a burst of tasks and assign them together in one pass."""
+        admitted = [task for task in tasks if self._admit_task(task)]
+        logger.info("Added %d tasks", len(admitted))
+        self._assign_tasks(admitted)
+        
+    def assign_pending(self) -> None:
+        """Assign the tasks collected in the current assignment window now."""
+        with self._pending_tasks_lock:
+            tasks, self._pending_tasks = self._pending_tasks, []
+            if self._pending_timer is not None:
+                self._pending_timer.cancel()
+                self._pending_timer = None
+        if tasks:
+            self._assign_tasks(tasks)
+        
+    def _admit_task(self, task: Task) -> bool:
+        """Record a task and check its deadline; returns whether it should be assigned."""
         self.tasks[task.id] = task
-        self._assign_task(task)
-        logger.info(f"Added task: {task.description}")
-        
-    def _assign_task(self, task: Task) -> None:
-        """Assign a task to the most suitable agent."""
-        best_agent = None
-        best_score = 0
-        
-        for agent in self.agents.values():
-            if agent.can_handle_task(task):
-                score = self._calculate_agent_score(agent, task)
-                if score > best_score:
-                    best_score = score
-                    best_agent = agent
-                    
-        if best_agent:
-            task.assigned_agent = best_agent.id
-            task.status = "assigned"
-            self._send_message_to_agent(best_agent.id, {
+        if task.status == "assigned":
+            with self._aggregate_lock:
+                self._active_task_count += 1
+                if task.assigned_agent is not None:
+                    self._agent_load[task.assigned_agent] = self._agent_load.get(task.assigned_agent, 0) + 1
+        if task.deadline is not None:
+            deadline = Deadline.from_datetime(task.deadline)
+            if deadline.expired:
+                self._set_task_status(task, "expired")
+                logger.warning("Task %s arrived after its deadline", task.id)
+                return False
+            if self.admission is not None:
+                try:
+                    self.admission.admit(deadline)
+                except LoadShedError as e:
+                    self._set_task_status(task, "rejected")
+                    logger.warning("Rejected task %s: %s", task.id, e)
+                    return False
+        return True
+        
+    def plan_assignments(self, tasks: List[Task]) -> Dict[str, Optional[str]]:
+        """
+        Choose an agent for each task without assigning anything.
+        
+        All tasks are placed together: suitability comes from a score matrix
+        of agents x kinds of task (capability confidences times performance),
+        and the tasks are spread so agents end up with even loads, counting
+        the tasks they already hold. See ``balanced_assignment``.
+        
+        Returns:
+            Dict[str, Optional[str]]: Agent id per task id (None if no agent can take it)
+        """
+        return self._balanced_plan(list(self.agents.values()), tasks)
+        
+    def _balanced_plan(self, agents: List[Any], tasks: List[Task]) -> Dict[str, Optional[str]]:
+        """Place tasks over these agents (or stand-ins with the same attributes) in one pass."""
+        from .assignment import AcceptanceCache, score_matrix, balanced_assignment
+        
+        if self._accepts is None:
+            self._accepts = AcceptanceCache()
+        with metrics.span("task_assignment"):
+            scores, kinds = score_matrix(agents, tasks, self._accepts)
+            with self._aggregate_lock:
+                load = [self._agent_load.get(agent.id, 0) for agent in agents]
+            choice = balanced_assignment(scores, kinds, load, [task.priority for task in tasks])
+        return {
+            task.id: agents[a].id if a >= 0 else None
+            for task, a in zip(tasks, choice.tolist())
+        }
+        
+    def _assign_tasks(self, tasks: List[Task]) -> None:
+        """Assign tasks to agents in one pass, then send out the assignments."""
+        if not tasks:
+            return
+        if self.agent_pool is not None:
+            plan = self._plan_with_pool(tasks)
+        else:
+            plan = self.plan_assignments(tasks)
+        assigned: List[Task] = []
+        for task in tasks:
+            agent_id = plan[task.id]
+            if agent_id is None:
+                logger.warning("No suitable agent found for task %s", task.id)
+                continue
+            task.assigned_agent = agent_id
+            self._set_task_status(task, "assigned")
+            assigned.append(task)
+        metrics.inc("tasks_assigned_total", len(assigned))
+        
+        for task in sorted(assigned, key=lambda task: -task.priority):
+            self._send_message_to_agent(task.assigned_agent, {
                 "type": "task_assignment",
                 "task_id": task.id,
                 "description": task.description,
-                "required_capabilities": task.required_capabilities
+                "required_capabilities": task.required_capabilities,
+                "deadline": task.deadline
             })
-            logger.info(f"Assigned task {task.id} to agent {best_agent.name}")
-        else:
-            logger.warning(f"No suitable agent found for task {task.id}")
-            
-    def _calculate_agent_score(self, agent: Agent, task: Task) -> float:
-        """Calculate how suitable an agent is for a task."""
-        score = 0.0
-        
-        # Check capabilities
-        for cap in agent.capabilities:
-            if cap.name in task.required_capabilities:
-                score += cap.confidence
-                
-        # Consider current workload
-        if agent.state.current_task:
-            score *= 0.5
+            logger.info("Assigned task %s to agent %s", task.id, task.assigned_agent)
+        if self.agent_pool is not None:
+            self.evict_idle_agents()
             
-        # Consider performance metrics
-        if agent.state.performance_metrics:
-            avg_performance = sum(agent.state.performance_metrics.values()) / len(agent.state.performance_metrics)
-            score *= avg_performance
+    def _plan_with_pool(self, tasks: List[Task]) -> Dict[str, Optional[str]]:
+        """
+        Plan tasks over the active agents, bringing in pooled personas as needed.
+        
+        A task naming a pooled persona in ``assigned_agent`` goes to that
+        persona. Tasks no active agent can take are placed again, together,
+        over the active agents plus the registered personas with the best
+        confidence in each kind of task (found through the pool's capability
+        index), balancing load as ``plan_assignments`` does. Only the
+        personas that win tasks are built.
+        """
+        pool = self.agent_pool
+        plan: Dict[str, Optional[str]] = {}
+        open_tasks: List[Task] = []
+        for task in tasks:
+            if task.assigned_agent is not None and (task.assigned_agent in self.agents or task.assigned_agent in pool):
+                plan[task.id] = task.assigned_agent if self._activate(task.assigned_agent) else None
+            else:
+                open_tasks.append(task)
+        if open_tasks:
+            plan.update(self.plan_assignments(open_tasks))
+        unplaced = [task for task in open_tasks if plan[task.id] is None]
+        if not unplaced:
+            return plan
+        
+        # Enough candidates per kind for its tasks to spread out, up to the pool's size
+        counts: Dict[FrozenSet[str], int] = {}
+        for task in unplaced:
+            kind = frozenset(task.required_capabilities)
+            counts[kind] = counts.get(kind, 0) + 1
+        profiles: Dict[str, Any] = {}
+        for kind, count in counts.items():
+            for persona_id in pool.candidates(sorted(kind), limit=min(count, pool.max_active)):
+                if persona_id not in self.agents and persona_id not in profiles:
+                    profile = pool.profile(persona_id)
+                    if profile is not None:
+                        profiles[persona_id] = profile
+        if not profiles:
+            return plan
+        placed = self._balanced_plan(list(self.agents.values()) + list(profiles.values()), unplaced)
+        for task in unplaced:
+            agent_id = placed[task.id]
+            plan[task.id] = agent_id if agent_id is not None and self._activate(agent_id) else None
+        return plan
+        
+    def _activate(self, agent_id: str) -> bool:
+        """Make sure an agent is present, building it from the pool if needed."""
+        if agent_id in self.agents:
+            self.agent_pool.touch(agent_id)
+            return True
+        agent = self.agent_pool.acquire(agent_id)
+        if agent is None:
+            return False
+        self.add_agent(agent)
+        return True
+        
+    def evict_idle_agents(self) -> int:
+        """
+        Remove pooled agents the pool evicts (idle, or beyond its size);
+        agents with unfinished tasks stay. Returns how many were removed.
+        """
+        if self.agent_pool is None:
+            return 0
+        with self._aggregate_lock:
+            busy = {agent_id for agent_id, load in self._agent_load.items() if load > 0}
+        evicted = self.agent_pool.evict(is_busy=busy.__contains__)
+        for agent in evicted:
+            self._detach_agent(agent.id, keep_stats=True)
+        return len(evicted)
             
-        return score
+    def _set_task_status(self, task: Task, status: str) -> None:
+        """Change a task's status, keeping the active task count and agent loads in step."""
+        with self._aggregate_lock:
+            if task.status == "assigned":
+                self._active_task_count -= 1
+                if task.assigned_agent in self._agent_load:
+                    self._agent_load[task.assigned_agent] -= 1
+            if status == "assigned":
+                self._active_task_count += 1
+                if task.assigned_agent is not None:
+                    self._agent_load[task.assigned_agent] = self._agent_load.get(task.assigned_agent, 0) + 1
+            task.status = status
         
     def _send_message_to_agent(self, agent_id: str, message: Dict[str, Any]) -> None:
         """Send a message to a specific agent."""
         if agent_id in self.agents:
             agent = self.agents[agent_id]
-            response = agent.process_message(message)
+            tracker = self.admission.track() if self.admission is not None else nullcontext()
+            try:
+                with deadline_scope(message.get("deadline")), tracker, \
+                        workload_scope(type(agent).__name__, agent.llm_tier), \
+                        metrics.span("agent_message", {"role": agent.role.value}):
+                    response = agent.process_message(message)
+            except DeadlineExceeded as e:
+                task = self.tasks.get(message.get("task_id"))
+                if task is not None:
+                    self._set_task_status(task, "expired")
+                logger.warning("Message to %s cancelled at deadline: %s", agent.name, e)
+                return
             self._message_history.append({
                 "timestamp": datetime.now(),
                 "from": "orchestrator",
@@ -143,22 +388,49 @@ class MultiAgentOrchestrator:
             task_id = response.get("task_id")
             if task_id in self.tasks:
                 task = self.tasks[task_id]
-                task.status = "completed"
+                self._set_task_status(task, "completed")
                 self._update_performance_metrics(agent, response)
-                logger.info(f"Task {task_id} completed by {agent.name}")
+                logger.info("Task %s completed by %s", task_id, agent.name)
                 
     def _update_performance_metrics(self, agent: Agent, response: Dict[str, Any]) -> None:
         """Update performance metrics for an agent."""
         if "performance_score" in response:
-            if "task_performance" not in agent.state.performance_metrics:
-                agent.state.performance_metrics["task_performance"] = []
-            agent.state.performance_metrics["task_performance"].append(
-                response["performance_score"]
-            )
+            score = float(response["performance_score"])
+            self._record_performance(agent, score)
+            # performance_metrics holds floats: keep the running mean, not a list
+            agent.state.performance_metrics["task_performance"] = self._mean_performance(agent.id)
+            if response.get("rep_id") is not None:
+                self.rep_stats.record(response["rep_id"], score)
+            
+    def _mean_performance(self, agent_id: str) -> float:
+        """Mean recorded performance score of an agent (0.0 if none)."""
+        return self.agent_stats.mean(agent_id)
+        
+    def _record_performance(self, agent: Agent, score: float) -> None:
+        """Fold a new performance score into the running aggregates."""
+        with self._aggregate_lock:
+            old_mean = self._mean_performance(agent.id)
+            self.agent_stats.record(agent.id, score)
+            if agent.id in self._active_agents:
+                self._active_performance_total += self._mean_performance(agent.id) - old_mean
+        metrics.observe("agent_task_performance", score, {"role": agent.role.value})
+        self._update_group_state()
+        
+    def _sync_agent_activity(self, agent: Agent) -> None:
+        """Keep the active-agent aggregates in line with the agent's state."""
+        with self._aggregate_lock:
+            was_active = agent.id in self._active_agents
+            if agent.state.is_active and not was_active:
+                self._active_agents.add(agent.id)
+                self._active_performance_total += self._mean_performance(agent.id)
+            elif not agent.state.is_active and was_active:
+                self._active_agents.discard(agent.id)
+                self._active_performance_total -= self._mean_performance(agent.id)
             
     def _handle_agent_event(self, agent: Agent, event: str, data: Any) -> None:
         """Handle events from agents."""
         if event == "state_changed":
+            self._sync_agent_activity(agent)
             self._update_group_state()
         elif event == "history_updated":
             self._message_history.append({
@@ -170,29 +442,47 @@ class MultiAgentOrchestrator:
             
     def _update_group_state(self) -> None:
         """Update the overall group state."""
-        active_tasks = sum(1 for task in self.tasks.values() if task.status == "assigned")
-        self.state.current_task = active_tasks > 0
-        
-        # Calculate group performance metrics
-        total_performance = 0
-        active_agents = 0
-        for agent in self.agents.values():
-            if agent.state.is_active:
-                active_agents += 1
-                if agent.state.performance_metrics:
-                    total_performance += sum(agent.state.performance_metrics.values()) / len(agent.state.performance_metrics)
-                    
-        if active_agents > 0:
-            self.state.performance_metrics["group_performance"] = total_performance / active_agents
+        # Task counts and performance come from incrementally kept aggregates
+        with self._aggregate_lock:
+            self.state.current_task = self._active_task_count > 0
+            if self._active_agents:
+                self.state.performance_metrics["group_performance"] = (
+                    self._active_performance_total / len(self._active_agents)
+                )
             
     def get_group_performance(self) -> Dict[str, float]:
         """Get the current group performance metrics."""
         return self.state.performance_metrics.copy()
         
+    def get_leaderboard(self, n: int = 10, by: str = "agent", metric: str = "mean", min_count: int = 1) -> List[Tuple[str, float]]:
+        """
+        Top ``n`` agents (by id) or reps by performance.
+        
+        Args:
+            n: Entries to return
+            by: "agent" or "rep"
+            metric: "mean", "total", "count", "last" or a windowed percentile like "p50"
+            min_count: Minimum scores recorded to be ranked
+        """
+        stats = self.rep_stats if by == "rep" else self.agent_stats
+        return stats.top(n, metric, min_count)
+        
     def get_message_history(self) -> List[Dict[str, Any]]:
         """Get the message history."""
         return self._message_history.copy()
         
+    def export_message_history(self, serializer: Optional[Serializer] = None) -> bytes:
+        """
+        Serialize the message history for storage or transfer.
+        
+        Args:
+            serializer: Serializer to use; defaults to the fastest available one
+            
+        Returns:
+            bytes: The encoded history
+        """
+        return (serializer or get_serializer()).dumps(self._message_history)
+        
     def clear_message_history(self) -> None:
         """Clear the message history."""
         self._message_history.clear()
@@ -200,12 +490,24 @@ class MultiAgentOrchestrator:
     def add_observer(self, observer: Callable) -> None:
         """Add an observer to be notified of group state changes."""
         self._observers.append(observer)
+        if self.event_bus is not None:
+            self._subscriptions[observer] = self.event_bus.subscribe(
+                observer,
+                predicate=lambda source, event: source is self,
+                name=getattr(observer, "__name__", "observer")
+            )
         
     def remove_observer(self, observer: Callable) -> None:
         """Remove an observer."""
         self._observers.remove(observer)
+        subscription = self._subscriptions.pop(observer, None)
+        if subscription is not None:
+            self.event_bus.unsubscribe(subscription)
         
     def notify_observers(self, event: str, data: Any) -> None:
         """Notify all observers of a state change."""
+        if self.event_bus is not None:
+            self.event_bus.publish(self, event, data)
+            return
         for observer in self._observers:
             observer(self, event, data) 
\ No newline at end of file
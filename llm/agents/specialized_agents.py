@@ -1,16 +1,21 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 from dataclasses import dataclass
 import logging
 from .base_agent import (
     Agent, SpecializedAgent, AgentRole, AgentCapability,
     AgentState
 )
+from ..metrics import metrics
+from ..serialization import to_prompt_text
+from .map_reduce import MapReduceAnalyzer, AnalysisCache
 
 logger = logging.getLogger(__name__)
 
 class LeaderAgent(SpecializedAgent):
     """Agent responsible for coordinating and leading group activities."""
     
+    llm_tier = "fast"
+    
     def __init__(self, name: str, llm_client: Any):
         capabilities = [
             AgentCapability(
@@ -70,12 +75,13 @@ class LeaderAgent(SpecializedAgent):
     def _handle_conflict(self, message: Dict[str, Any]) -> Dict[str, Any]:
         """Handle conflict resolution requests."""
         # Use LLM to generate conflict resolution strategy
+        content = to_prompt_text(message)
         resolution = self.llm_client.call_api([{
             "role": "system",
             "content": "You are a conflict resolution expert. Help resolve the following conflict:"
-        }, {
+        }] + self.recall(content) + [{
             "role": "user",
-            "content": str(message)
+            "content": content
         }])
         
         return {
@@ -93,9 +99,29 @@ class LeaderAgent(SpecializedAgent):
         }
 
 class AnalystAgent(SpecializedAgent):
-    """Agent responsible for analyzing data and providing insights."""
+    """
+    Agent responsible for analyzing data and providing insights.
     
-    def __init__(self, name: str, llm_client: Any):
+    Data longer than ``max_chunk_tokens`` is analyzed map-reduce style:
+    chunks are analyzed concurrently, each finished chunk is published to
+    observers as an ``analysis_partial`` event, and the partial insights are
+    merged into one result. Chunk results are cached, so re-analyzing an
+    edited transcript only reprocesses the chunks that changed. With a
+    ``search_index`` (a ``TranscriptIndex``), results for a known call are
+    indexed for full-text search.
+    """
+    
+    llm_tier = "large"
+    
+    def __init__(
+        self,
+        name: str,
+        llm_client: Any,
+        max_chunk_tokens: int = 3000,
+        max_concurrency: int = 4,
+        cache: Optional[AnalysisCache] = None,
+        search_index: Optional[Any] = None
+    ):
         capabilities = [
             AgentCapability(
                 name="data_analysis",
@@ -118,6 +144,8 @@ class AnalystAgent(SpecializedAgent):
             specialization="analysis"
         )
         self._analysis_history: List[Dict[str, Any]] = []
+        self.search_index = search_index
+        self._analyzer = MapReduceAnalyzer(llm_client, max_chunk_tokens, max_concurrency, cache)
         
     def process_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
         """Process incoming messages and provide analysis."""
@@ -135,27 +163,55 @@ class AnalystAgent(SpecializedAgent):
         
     def _handle_analysis_request(self, message: Dict[str, Any]) -> Dict[str, Any]:
         """Handle data analysis requests."""
-        data = message.get("data", {})
-        analysis_type = message.get("analysis_type", "general")
-        
-        # Use LLM to analyze the data
-        analysis = self.llm_client.call_api([{
-            "role": "system",
-            "content": f"You are a data analyst. Analyze the following data for {analysis_type} insights:"
-        }, {
-            "role": "user",
-            "content": str(data)
-        }])
+        result: Dict[str, Any] = {}
+        for result in self.stream_analysis(
+            message.get("data", {}),
+            message.get("analysis_type", "general"),
+            message.get("call_id")
+        ):
+            if result["type"] == "partial_analysis":
+                self.notify_observers("analysis_partial", result)
+        return result
         
-        result = {
-            "type": "analysis_result",
-            "content": analysis,
-            "analysis_type": analysis_type,
-            "status": "completed"
-        }
+    def stream_analysis(
+        self,
+        data: Any,
+        analysis_type: str = "general",
+        call_id: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Analyze data, yielding each chunk's partial analysis as it finishes.
         
-        self._analysis_history.append(result)
-        return result
+        Args:
+            data: Transcript text, a list of segments or a dict holding one
+            analysis_type: Kind of insights to look for
+            call_id: Call the data comes from; defaults to ``data["call_id"]``
+                when ``data`` is a dict
+            
+        Yields:
+            Dict[str, Any]: ``partial_analysis`` items, then the final
+                ``analysis_result`` (also recorded in the analysis history
+                and, if attached, the agent's memory and the search index)
+        """
+        if call_id is None and isinstance(data, dict):
+            call_id = data.get("call_id")
+        for result in self._analyzer.stream(data, analysis_type):
+            if result["type"] == "analysis_result":
+                self._analysis_history.append(result)
+                if self.memory is not None:
+                    self.memory.add_analysis(result, self.memory_scope)
+                self._index(result, call_id)
+            yield result
+            
+    def _index(self, result: Dict[str, Any], call_id: Optional[str]) -> None:
+        """Add a result to the search index; indexing failures never fail the analysis."""
+        if self.search_index is None or call_id is None:
+            return
+        try:
+            self.search_index.add_analysis(call_id, result, self.memory_scope)
+        except Exception as e:
+            metrics.inc("search_index_errors_total", labels={"source": "analysis"})
+            logger.error("Error indexing analysis of %s: %s", call_id, e)
         
     def _handle_general_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
         """Handle general messages."""
@@ -216,12 +272,13 @@ class CreativeAgent(SpecializedAgent):
         parameters = message.get("parameters", {})
         
         # Use LLM to generate creative content
+        prompt = to_prompt_text(parameters)
         content = self.llm_client.call_api([{
             "role": "system",
             "content": f"You are a creative content generator. Generate {request_type} content with the following parameters:"
-        }, {
+        }] + self.recall(prompt) + [{
             "role": "user",
-            "content": str(parameters)
+            "content": prompt
         }])
         
         result = {
@@ -0,0 +1,333 @@
+import os
+import uuid
+import queue
+import logging
+import importlib
+import threading
+import multiprocessing
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Union, Type, Tuple
+
+from ..llm_client import LLMClient, LLMConfig
+from ..metrics import metrics
+from .base_agent import Agent
+from .multi_agent_orchestrator import MultiAgentOrchestrator, Task
+from ..deadlines import DeadlineExceeded, deadline_scope
+from ..cascade import workload_scope
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class AgentSpec:
+    """Picklable description of an agent to be built inside a worker process."""
+    agent_class: Union[str, Type[Agent]]  # class or "module:ClassName"
+    name: str
+    llm_config: Optional[LLMConfig] = None
+    agent_id: Optional[str] = None
+
+    @property
+    def class_path(self) -> str:
+        """Importable "module:ClassName" path of the agent class."""
+        if isinstance(self.agent_class, str):
+            return self.agent_class
+        return f"{self.agent_class.__module__}:{self.agent_class.__qualname__}"
+
+def _load_agent_class(path: str) -> Type[Agent]:
+    """Import an agent class from a "module:ClassName" path."""
+    module_name, _, class_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+def _build_agent(spec: AgentSpec, default_config: Optional[LLMConfig], llm_client: Optional[Any] = None) -> Agent:
+    """Instantiate an agent from its spec, pinning it to the spec's id."""
+    agent = _load_agent_class(spec.class_path)(
+        spec.name,
+        llm_client if llm_client is not None else LLMClient(spec.llm_config or default_config)
+    )
+    if spec.agent_id:
+        agent.id = spec.agent_id
+    return agent
+
+def _worker_main(
+    worker_index: int,
+    inbox: "multiprocessing.Queue",
+    outbox: "multiprocessing.Queue",
+    default_config: Optional[LLMConfig]
+) -> None:
+    """
+    Worker process loop.
+
+    Each worker owns a disjoint partition of the agents and its own LLM
+    clients, so calls for agents in different workers never contend.
+    """
+    agents: Dict[str, Agent] = {}
+
+    def forward_event(agent: Agent, event: str, data: Any) -> None:
+        outbox.put(("event", agent.id, event, data))
+
+    while True:
+        command = inbox.get()
+        kind = command[0]
+        if kind == "stop":
+            break
+        if kind == "add":
+            spec = command[1]
+            try:
+                agent = _build_agent(spec, default_config)
+                agent.add_observer(forward_event)
+                agents[agent.id] = agent
+            except Exception as e:
+                logger.error("Worker %d failed to build agent %s: %s", worker_index, spec.name, e)
+        elif kind == "remove":
+            agents.pop(command[1], None)
+        elif kind == "message":
+            _, request_id, agent_id, message = command
+            agent = agents.get(agent_id)
+            try:
+                if agent is None:
+                    raise KeyError(f"Agent {agent_id} is not hosted by worker {worker_index}")
+                with deadline_scope(message.get("deadline")), \
+                        workload_scope(type(agent).__name__, agent.llm_tier):
+                    response = agent.process_message(message)
+                outbox.put(("result", request_id, agent_id, response))
+            except DeadlineExceeded as e:
+                outbox.put(("expired", request_id, agent_id, str(e)))
+            except Exception as e:
+                outbox.put(("error", request_id, agent_id, f"{type(e).__name__}: {e}"))
+
+class RemoteAgentError(Exception):
+    """Raised when an agent fails to process a message inside a worker."""
+    pass
+
+class DistributedOrchestrator(MultiAgentOrchestrator):
+    """
+    Multi-agent orchestrator that runs agents in a pool of worker processes.
+
+    Agents are registered as ``AgentSpec`` objects and partitioned across
+    workers; the orchestrator keeps a local shadow of each agent, which never
+    processes messages, for task scoring and state tracking. Messages are dispatched over per-worker
+    multiprocessing queues and return ``Future`` objects; results and agent
+    observer events flow back over a shared queue and are applied by a
+    collector thread.
+    """
+
+    def __init__(
+        self,
+        llm_client: Any,
+        num_workers: Optional[int] = None,
+        llm_config: Optional[LLMConfig] = None,
+        start_method: str = "spawn"
+    ):
+        """
+        Initialize the orchestrator.
+
+        Args:
+            llm_client: LLM client used by the orchestrator itself
+            num_workers: Number of worker processes (defaults to CPU count)
+            llm_config: Default LLM config for agents built in the workers
+            start_method: multiprocessing start method
+        """
+        super().__init__(llm_client)
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.llm_config = llm_config or getattr(llm_client, "config", None)
+        self._context = multiprocessing.get_context(start_method)
+        self._inboxes: List[Any] = []
+        self._outbox: Any = None
+        self._processes: List[Any] = []
+        self._collector: Optional[threading.Thread] = None
+        self._agent_worker: Dict[str, int] = {}
+        self._worker_load: List[int] = [0] * self.num_workers
+        self._pending: Dict[str, Tuple[Future, Dict[str, Any]]] = {}
+        self._lock = threading.RLock()
+        self._running = False
+
+    def start(self) -> "DistributedOrchestrator":
+        """Start the worker processes and the result collector."""
+        if self._running:
+            return self
+        self._outbox = self._context.Queue()
+        for index in range(self.num_workers):
+            inbox = self._context.Queue()
+            process = self._context.Process(
+                target=_worker_main,
+                args=(index, inbox, self._outbox, self.llm_config),
+                daemon=True
+            )
+            process.start()
+            self._inboxes.append(inbox)
+            self._processes.append(process)
+        self._running = True
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        logger.info("Started %d agent worker processes", self.num_workers)
+        return self
+
+    def shutdown(self, timeout: Optional[float] = 10.0) -> None:
+        """Wait for pending work, then stop workers and the collector."""
+        if not self._running:
+            return
+        self.wait(timeout)
+        for inbox in self._inboxes:
+            inbox.put(("stop",))
+        for process in self._processes:
+            process.join(timeout)
+        self._running = False
+        self._outbox.put(("stop",))
+        self._collector.join(timeout)
+        self._inboxes, self._processes = [], []
+
+    def __enter__(self) -> "DistributedOrchestrator":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.shutdown()
+
+    def add_agent_spec(self, spec: AgentSpec) -> Agent:
+        """
+        Register an agent to run in the worker pool.
+
+        Args:
+            spec: Description of the agent to build
+
+        Returns:
+            Agent: The local shadow agent used for scoring and state tracking
+        """
+        if not self._running:
+            self.start()
+        shadow = _build_agent(spec, self.llm_config, llm_client=self.llm_client)
+        spec.agent_id = shadow.id
+        with self._lock:
+            worker = min(range(self.num_workers), key=lambda i: self._worker_load[i])
+            self._worker_load[worker] += 1
+            self._agent_worker[shadow.id] = worker
+            super().add_agent(shadow)
+        self._inboxes[worker].put(("add", spec))
+        return shadow
+
+    def add_agent(self, agent: Agent) -> None:
+        """Agents must be registered through ``add_agent_spec`` in distributed mode."""
+        raise TypeError("DistributedOrchestrator hosts agents in workers; use add_agent_spec()")
+
+    def remove_agent(self, agent_id: str) -> None:
+        """Remove an agent from the orchestrator and its worker."""
+        with self._lock:
+            worker = self._agent_worker.pop(agent_id, None)
+            if worker is not None:
+                self._worker_load[worker] -= 1
+                self._inboxes[worker].put(("remove", agent_id))
+            super().remove_agent(agent_id)
+
+    def add_task(self, task: Task) -> None:
+        """Add a new task; its assignment message is dispatched asynchronously."""
+        with self._lock:
+            super().add_task(task)
+
+    def add_tasks(self, tasks: List[Task]) -> None:
+        """Add a burst of tasks, assigned together; messages are dispatched asynchronously."""
+        with self._lock:
+            super().add_tasks(tasks)
+
+    def assign_pending(self) -> None:
+        """Assign the tasks collected in the current assignment window now."""
+        with self._lock:
+            super().assign_pending()
+
+    def _send_message_to_agent(self, agent_id: str, message: Dict[str, Any]) -> Optional[Future]:
+        """Dispatch a message to the worker hosting the agent."""
+        worker = self._agent_worker.get(agent_id)
+        if worker is None:
+            return None
+        request_id = str(uuid.uuid4())
+        future: Future = Future()
+        with self._lock:
+            self._pending[request_id] = (future, message)
+        metrics.inc("agent_worker_dispatch_total", labels={"worker": worker})
+        self._inboxes[worker].put(("message", request_id, agent_id, message))
+        return future
+
+    def send_message(self, agent_id: str, message: Dict[str, Any]) -> Future:
+        """
+        Send a message to an agent.
+
+        Returns:
+            Future: Resolves to the agent's response dictionary; fails with
+                ``DeadlineExceeded`` if the message's deadline passed in the
+                worker, or ``RemoteAgentError`` if the agent raised
+
+        Raises:
+            KeyError: If the agent is not registered
+        """
+        future = self._send_message_to_agent(agent_id, message)
+        if future is None:
+            raise KeyError(f"Unknown agent: {agent_id}")
+        return future
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Block until every dispatched message has been answered."""
+        with self._lock:
+            pending = [future for future, _ in self._pending.values()]
+        for future in pending:
+            try:
+                future.result(timeout)
+            except Exception:
+                pass
+
+    def _collect(self) -> None:
+        """Apply results and observer events coming back from the workers."""
+        while True:
+            try:
+                item = self._outbox.get(timeout=0.5)
+            except queue.Empty:
+                if not self._running:
+                    return
+                continue
+            kind = item[0]
+            if kind == "stop":
+                return
+            try:
+                if kind == "event":
+                    self._apply_event(*item[1:])
+                else:
+                    self._apply_result(kind, *item[1:])
+            except Exception as e:
+                logger.error("Error handling worker %s: %s", kind, e)
+
+    def _apply_result(self, kind: str, request_id: str, agent_id: str, payload: Any) -> None:
+        """Resolve a pending future and feed the response into the orchestrator."""
+        with self._lock:
+            future, message = self._pending.pop(request_id, (None, None))
+            agent = self.agents.get(agent_id)
+            if kind == "result" and agent is not None:
+                self._message_history.append({
+                    "timestamp": datetime.now(),
+                    "from": "orchestrator",
+                    "to": agent_id,
+                    "message": message,
+                    "response": payload
+                })
+                self._handle_agent_response(agent, payload)
+            elif kind != "result" and message is not None:
+                # Release the task's slot, as the in-process path does
+                task = self.tasks.get(message.get("task_id"))
+                if task is not None and task.status == "assigned":
+                    self._set_task_status(task, "expired" if kind == "expired" else "failed")
+                logger.warning("Message to %s %s: %s", agent_id, "cancelled at deadline" if kind == "expired" else "failed", payload)
+        if future is None:
+            return
+        if kind == "result":
+            future.set_result(payload)
+        elif kind == "expired":
+            future.set_exception(DeadlineExceeded(payload))
+        else:
+            future.set_exception(RemoteAgentError(payload))
+
+    def _apply_event(self, agent_id: str, event: str, data: Any) -> None:
+        """Mirror a worker agent's event onto its local shadow and observers."""
+        with self._lock:
+            agent = self.agents.get(agent_id)
+            if agent is None:
+                return
+            if event == "state_changed":
+                agent.state = data
+            agent.notify_observers(event, data)
@@ -0,0 +1,253 @@
+import json
+import threading
+import logging
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = ("count", "total", "total_sq", "minimum", "maximum", "last")
+
+class StatsAggregator:
+    """
+    Incremental per-key score statistics in columnar NumPy arrays.
+
+    Each key (an agent id, a rep id, ...) owns one row. Recording a score
+    updates that row's running count, sum, sum of squares, min, max and last
+    value, and writes the score into the row of a fixed-size ring buffer
+    holding the key's most recent ``window`` scores: O(1) per score.
+    Percentiles are read from the ring buffer, for one key or for all keys
+    at once.
+
+    Top-N queries on ``mean``, ``total``, ``count`` or ``last`` are cached
+    and the cache is only invalidated by an update that can change the
+    answer (a key already in it, or one whose new value reaches it), so
+    repeated leaderboard reads do not rescan.
+    """
+
+    RANKABLE = ("mean", "total", "count", "last")
+
+    def __init__(self, window: int = 100, initial_capacity: int = 64):
+        """
+        Args:
+            window: Recent scores kept per key for percentiles
+            initial_capacity: Rows preallocated before the first resize
+        """
+        self.window = window
+        self._index: Dict[Hashable, int] = {}
+        self._keys: List[Optional[Hashable]] = []
+        self._free: List[int] = []
+        self._lock = threading.RLock()
+        self._allocate(initial_capacity)
+        # (metric, n, min_count) -> (rows best first, value of the last row)
+        self._top_cache: Dict[Tuple[str, int, int], Tuple[List[int], float]] = {}
+
+    def _allocate(self, capacity: int) -> None:
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.total = np.zeros(capacity, dtype=np.float64)
+        self.total_sq = np.zeros(capacity, dtype=np.float64)
+        self.minimum = np.full(capacity, np.inf)
+        self.maximum = np.full(capacity, -np.inf)
+        self.last = np.zeros(capacity, dtype=np.float64)
+        self.recent = np.full((capacity, self.window), np.nan)
+
+    def _grow(self) -> None:
+        old = {name: getattr(self, name) for name in _COLUMNS + ("recent",)}
+        size = len(self.count)
+        self._allocate(max(1, 2 * size))
+        for name, column in old.items():
+            getattr(self, name)[:size] = column
+
+    def _row(self, key: Hashable) -> int:
+        row = self._index.get(key)
+        if row is not None:
+            return row
+        if self._free:
+            row = self._free.pop()
+            self._keys[row] = key
+        else:
+            row = len(self._keys)
+            if row >= len(self.count):
+                self._grow()
+            self._keys.append(key)
+        self._index[key] = row
+        return row
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._index
+
+    def keys(self) -> List[Hashable]:
+        return list(self._index)
+
+    def record(self, key: Hashable, score: float) -> None:
+        """Fold one score into ``key``'s statistics."""
+        with self._lock:
+            row = self._row(key)
+            n = self.count[row]
+            self.count[row] = n + 1
+            self.total[row] += score
+            self.total_sq[row] += score * score
+            self.minimum[row] = min(self.minimum[row], score)
+            self.maximum[row] = max(self.maximum[row], score)
+            self.last[row] = score
+            self.recent[row, n % self.window] = score
+            self._invalidate(row)
+
+    def remove(self, key: Hashable) -> None:
+        """Drop a key and free its row for reuse."""
+        with self._lock:
+            row = self._index.pop(key, None)
+            if row is None:
+                return
+            self._keys[row] = None
+            self._free.append(row)
+            self.count[row] = 0
+            self.total[row] = self.total_sq[row] = self.last[row] = 0.0
+            self.minimum[row], self.maximum[row] = np.inf, -np.inf
+            self.recent[row] = np.nan
+            self._invalidate(row, removed=True)
+
+    def _value(self, metric: str, row: int) -> float:
+        if metric == "mean":
+            return float(self.total[row] / self.count[row]) if self.count[row] else 0.0
+        return float(getattr(self, metric)[row])
+
+    def _invalidate(self, row: int, removed: bool = False) -> None:
+        """Drop cached leaderboards that the update of ``row`` can change."""
+        for cache_key, (rows, threshold) in list(self._top_cache.items()):
+            metric, n, min_count = cache_key
+            if row in rows or (
+                not removed
+                and self.count[row] >= min_count
+                and (len(rows) < n or self._value(metric, row) >= threshold)
+            ):
+                del self._top_cache[cache_key]
+
+    def mean(self, key: Hashable) -> float:
+        """Mean of all scores for ``key`` (0.0 if unknown)."""
+        with self._lock:
+            row = self._index.get(key)
+            return self._value("mean", row) if row is not None else 0.0
+
+    def percentile(self, key: Hashable, q: float) -> Optional[float]:
+        """``q``-th percentile of ``key``'s last ``window`` scores, or None if it has none."""
+        with self._lock:
+            row = self._index.get(key)
+            if row is None or self.count[row] == 0:
+                return None
+            filled = min(self.count[row], self.window)
+            return float(np.percentile(self.recent[row, :filled], q))
+
+    def summary(self, key: Hashable) -> Dict[str, float]:
+        """All statistics for one key."""
+        with self._lock:
+            row = self._index.get(key)
+            if row is None or self.count[row] == 0:
+                return {"count": 0}
+            n = int(self.count[row])
+            mean = self.total[row] / n
+            filled = self.recent[row, :min(n, self.window)]
+            p50, p95 = np.percentile(filled, [50, 95])
+            return {
+                "count": n,
+                "mean": float(mean),
+                "stddev": float(np.sqrt(max(0.0, self.total_sq[row] / n - mean * mean))),
+                "min": float(self.minimum[row]),
+                "max": float(self.maximum[row]),
+                "last": float(self.last[row]),
+                "p50": float(p50),
+                "p95": float(p95)
+            }
+
+    def percentiles(self, q: float) -> Dict[Hashable, float]:
+        """``q``-th windowed percentile of every key, computed in one vectorized pass."""
+        with self._lock:
+            rows = np.fromiter(self._index.values(), dtype=np.int64, count=len(self._index))
+            if len(rows) == 0:
+                return {}
+            valid = rows[self.count[rows] > 0]
+            if len(valid) == 0:
+                return {}
+            values = np.nanpercentile(self.recent[valid], q, axis=1)
+            return {self._keys[row]: float(value) for row, value in zip(valid, values)}
+
+    def top(self, n: int = 10, metric: str = "mean", min_count: int = 1) -> List[Tuple[Hashable, float]]:
+        """
+        Leaderboard of the ``n`` best keys.
+
+        Args:
+            n: Entries to return
+            metric: "mean", "total", "count" or "last" (cached), or "pNN"
+                for a windowed percentile such as "p50" (computed per query)
+            min_count: Keys with fewer scores are not ranked
+
+        Returns:
+            List[Tuple[Hashable, float]]: (key, value), best first
+        """
+        if metric.startswith("p") and metric[1:].replace(".", "", 1).isdigit():
+            with self._lock:
+                ranked = sorted(
+                    ((key, value) for key, value in self.percentiles(float(metric[1:])).items()
+                     if self.count[self._index[key]] >= min_count),
+                    key=lambda kv: kv[1],
+                    reverse=True
+                )
+            return ranked[:n]
+        if metric not in self.RANKABLE:
+            raise ValueError(f"Unknown leaderboard metric: {metric}")
+
+        with self._lock:
+            cache_key = (metric, n, min_count)
+            cached = self._top_cache.get(cache_key)
+            if cached is None:
+                metrics.inc("stats_leaderboard_rebuilds_total")
+                size = len(self._keys)
+                counts = self.count[:size]
+                if metric == "mean":
+                    values = np.divide(self.total[:size], counts, out=np.zeros(size), where=counts > 0)
+                else:
+                    values = getattr(self, metric)[:size].astype(np.float64)
+                values = np.where(counts >= max(1, min_count), values, -np.inf)
+                k = min(n, size)
+                rows = np.argpartition(-values, k - 1)[:k] if k else np.array([], dtype=np.int64)
+                rows = [int(row) for row in rows[np.argsort(-values[rows])] if np.isfinite(values[row])]
+                threshold = self._value(metric, rows[-1]) if rows else -np.inf
+                cached = (rows, threshold)
+                self._top_cache[cache_key] = cached
+            return [(self._keys[row], self._value(metric, row)) for row in cached[0]]
+
+    def save(self, path: str) -> None:
+        """Persist a snapshot as a compressed ``.npz`` file (NumPy adds the suffix if missing)."""
+        with self._lock:
+            size = len(self._keys)
+            keys = json.dumps([self._keys[row] for row in range(size)])
+            np.savez_compressed(
+                path,
+                keys=np.array(keys),
+                window=np.array(self.window),
+                **{name: getattr(self, name)[:size] for name in _COLUMNS + ("recent",)}
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "StatsAggregator":
+        """Restore a snapshot written by ``save``. Keys come back as JSON types (str, int, ...)."""
+        if not path.endswith(".npz"):
+            path += ".npz"
+        with np.load(path) as data:
+            keys = json.loads(str(data["keys"]))
+            stats = cls(window=int(data["window"]), initial_capacity=max(1, len(keys)))
+            for name in _COLUMNS + ("recent",):
+                getattr(stats, name)[:len(keys)] = data[name]
+        stats._keys = keys
+        for row, key in enumerate(keys):
+            if key is None:
+                stats._free.append(row)
+            else:
+                stats._index[key] = row
+        return stats
@@ -0,0 +1,110 @@
+import json
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+class WebSocketClient:
+    """
+    Drive an ASGI application's WebSocket endpoint in process.
+
+    No server or socket is involved; messages pass through queues, and the
+    outgoing one is bounded so a slow reader pushes back on the application
+    the way a full socket buffer would.
+    """
+
+    def __init__(self, app: Callable, path: str, query: str = "", buffer: int = 16):
+        self.app = app
+        self.scope = {
+            "type": "websocket",
+            "path": path,
+            "query_string": query.encode("latin-1"),
+            "headers": []
+        }
+        self._to_app: asyncio.Queue = asyncio.Queue()
+        self._from_app: asyncio.Queue = asyncio.Queue(buffer)
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(self) -> "WebSocketClient":
+        """
+        Open the connection.
+
+        Raises:
+            ConnectionRefusedError: If the application closes instead of accepting
+        """
+        self._task = asyncio.ensure_future(self.app(self.scope, self._to_app.get, self._from_app.put))
+        await self._to_app.put({"type": "websocket.connect"})
+        message = await self._from_app.get()
+        if message["type"] == "websocket.close":
+            await self._task
+            raise ConnectionRefusedError(f"WebSocket refused with code {message.get('code')}")
+        return self
+
+    async def send_bytes(self, data: bytes) -> None:
+        await self._to_app.put({"type": "websocket.receive", "bytes": data})
+
+    async def send_json(self, obj: Any) -> None:
+        await self._to_app.put({"type": "websocket.receive", "text": json.dumps(obj)})
+
+    async def receive_json(self) -> Dict[str, Any]:
+        """
+        Next message from the application.
+
+        Raises:
+            ConnectionError: If the application closed the connection
+        """
+        message = await self._from_app.get()
+        if message["type"] == "websocket.close":
+            raise ConnectionError(f"WebSocket closed with code {message.get('code')}")
+        return json.loads(message["text"])
+
+    async def close(self) -> None:
+        await self._to_app.put({"type": "websocket.disconnect", "code": 1000})
+        if self._task is not None:
+            while not self._task.done():
+                # Keep draining so the application is never stuck on a full buffer
+                try:
+                    await asyncio.wait_for(self._from_app.get(), 0.05)
+                except asyncio.TimeoutError:
+                    pass
+            self._task.result()
+
+async def http_request(
+    app: Callable,
+    method: str,
+    path: str,
+    body: Any = None
+) -> Tuple[int, Dict[str, str], List[bytes]]:
+    """
+    Send one HTTP request to an ASGI application in process.
+
+    Returns:
+        Tuple[int, Dict[str, str], List[bytes]]: Status, headers and the
+            body chunks in the order they were sent
+    """
+    data = json.dumps(body).encode("utf-8") if body is not None else b""
+    requests = [{"type": "http.request", "body": data, "more_body": False}]
+    finished = asyncio.Event()
+    status = 0
+    headers: Dict[str, str] = {}
+    chunks: List[bytes] = []
+
+    async def receive() -> Dict[str, Any]:
+        if requests:
+            return requests.pop()
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            headers.update((k.decode(), v.decode()) for k, v in message.get("headers", []))
+        elif message["type"] == "http.response.body":
+            if message.get("body"):
+                chunks.append(message["body"])
+            if not message.get("more_body"):
+                finished.set()
+
+    scope = {"type": "http", "method": method, "path": path, "query_string": b"", "headers": []}
+    await app(scope, receive, send)
+    finished.set()
+    return status, headers, chunks
@@ -0,0 +1,179 @@
+import json
+import time
+import random
+import argparse
+import threading
+import logging
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+class _Server(ThreadingHTTPServer):
+    # The default backlog of 5 drops bursts of concurrent connects, which
+    # then wait a second for the SYN retransmit
+    request_queue_size = 128
+
+@dataclass
+class MockServerConfig:
+    """Configuration for the mock chat-completions server."""
+    latency: float = 0.02  # seconds before the first byte
+    jitter: float = 0.0  # uniform +/- seconds added to latency
+    error_rate: float = 0.0  # fraction of requests answered with HTTP 500
+    token_delay: float = 0.0  # seconds between streamed tokens
+    reply: str = "This is a mock reply from the benchmark server."
+    echo: bool = False  # reply with the last user message instead
+
+class MockLLMServer:
+    """
+    Local OpenAI-style chat-completions server for offline benchmarks.
+
+    Supports plain and streamed (``"stream": true``, server-sent events)
+    responses with configurable latency and error rate.
+    """
+
+    def __init__(self, config: Optional[MockServerConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        """Create the server; ``port=0`` picks a free port."""
+        self.config = config or MockServerConfig()
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Chat-completions URL of the running server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    def start(self) -> "MockLLMServer":
+        """Start serving in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    def _reply_for(self, payload: Dict[str, Any]) -> str:
+        """Build the reply text for a request payload."""
+        if self.config.echo:
+            users = [m for m in payload.get("messages", []) if m.get("role") == "user"]
+            if users:
+                return users[-1].get("content", "")
+        return self.config.reply
+
+    def _make_handler(self):
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                try:
+                    self._handle_post()
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client gave up (deadline, hedge loser); nothing to answer
+                    self.close_connection = True
+
+            def _handle_post(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                with server._lock:
+                    server.requests_served += 1
+
+                config = server.config
+                delay = config.latency + random.uniform(-config.jitter, config.jitter)
+                time.sleep(max(0.0, delay))
+
+                if random.random() < config.error_rate:
+                    self._send_json(500, {"error": {"message": "mock upstream error"}})
+                    return
+
+                reply = server._reply_for(payload)
+                usage = {
+                    "prompt_tokens": sum(len(str(m.get("content", "")).split()) for m in payload.get("messages", [])),
+                    "completion_tokens": len(reply.split()),
+                }
+                if payload.get("stream"):
+                    self._send_stream(reply, payload.get("model", "mock"), config.token_delay)
+                else:
+                    self._send_json(200, {
+                        "id": "mock-completion",
+                        "object": "chat.completion",
+                        "model": payload.get("model", "mock"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": reply},
+                            "finish_reason": "stop"
+                        }],
+                        "usage": usage
+                    })
+
+            def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, reply: str, model: str, token_delay: float) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                words = reply.split(" ")
+                for i, word in enumerate(words):
+                    chunk = {
+                        "object": "chat.completion.chunk",
+                        "model": model,
+                        "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}}]
+                    }
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    if token_delay:
+                        time.sleep(token_delay)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+            def log_message(self, format, *args):
+                logger.debug("mock llm server: " + format, *args)
+
+        return _Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a mock chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = MockLLMServer(MockServerConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        token_delay=args.token_delay
+    ), host=args.host, port=args.port)
+    print(f"Mock LLM server listening on {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,766 @@
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import tempfile
+import subprocess
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+from ..llm_client import LLMClient, LLMConfig, ConversationManager
+from ..metrics import Histogram, Counter
+from ..prompts.prompt_manager import FileBasedPromptManager
+from ..serialization import to_prompt_text, get_serializer
+from .mock_llm_server import MockLLMServer, MockServerConfig
+from ..voice.fake_whisper import FakeWhisperModel, write_sample_wav
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "prompts" / "templates"
+DEFAULT_THRESHOLDS = Path(__file__).parent / "thresholds.json"
+REPO_ROOT = Path(__file__).parent.parent.parent
+
+# Modules that must stay unloaded after importing the text-only entry points
+HEAVY_MODULES = ("torch", "whisper", "numba", "tiktoken")
+
+IMPORT_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import llm
+from llm import LLMClient, ConversationManager
+from llm.agents import MultiAgentOrchestrator, LeaderAgent, AnalystAgent, CreativeAgent
+from llm.voice import VoiceLLMOrchestrator, WhisperClient
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "heavy": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+@dataclass
+class BenchmarkResult:
+    """Outcome of one benchmark scenario."""
+    name: str
+    operations: int
+    errors: int
+    seconds: float
+    latency: Dict[str, float]
+    peak_memory_bytes: int
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        """Operations per second."""
+        return self.operations / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "operations": self.operations,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 4),
+            "throughput": round(self.throughput, 2),
+            "p50_ms": round(self.latency["p50"] * 1000, 3),
+            "p95_ms": round(self.latency["p95"] * 1000, 3),
+            "p99_ms": round(self.latency["p99"] * 1000, 3),
+            "peak_memory_mb": round(self.peak_memory_bytes / (1024 * 1024), 3),
+            **self.extra
+        }
+
+def measure(name: str, operation: Callable[[int], Any], iterations: int, concurrency: int = 1) -> BenchmarkResult:
+    """
+    Run an operation repeatedly and collect latency, throughput and memory.
+
+    Args:
+        name: Scenario name
+        operation: Callable receiving the iteration index
+        iterations: Number of operations to run
+        concurrency: Number of operations in flight at once
+
+    Returns:
+        BenchmarkResult: Collected measurements
+    """
+    histogram = Histogram(window=max(iterations, 1))
+    errors = Counter()
+
+    def run_one(i: int) -> None:
+        start = time.perf_counter()
+        try:
+            operation(i)
+        except Exception as e:
+            errors.inc()
+            logger.debug("Operation %d of %s failed: %s", i, name, e)
+        histogram.observe(time.perf_counter() - start)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(run_one, range(iterations)))
+    else:
+        for i in range(iterations):
+            run_one(i)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return BenchmarkResult(
+        name=name,
+        operations=iterations,
+        errors=int(errors.value),
+        seconds=elapsed,
+        latency=histogram.snapshot(),
+        peak_memory_bytes=peak
+    )
+
+def bench_template_render(args: argparse.Namespace, server_url: str) -> BenchmarkResult:
+    """Render the voice assistant template with a growing conversation history."""
+    template = FileBasedPromptManager(str(TEMPLATES_DIR)).get_template("voice_assistant")
+    history = [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"turn {i} " * 20}
+        for i in range(args.history)
+    ]
+    return measure(
+        "template_render",
+        lambda i: template.format(user_input=f"question {i}", conversation_history=history),
+        args.iterations * 100
+    )
+
+def bench_dual_agents(args: argparse.Namespace, server_url: str) -> BenchmarkResult:
+    """Run full dual-agent conversations against the mock server."""
+    client = LLMClient(LLMConfig(api_url=server_url, api_key="bench", model="mock"))
+    manager = ConversationManager(client)
+    result = measure(
+        "dual_agents",
+        lambda i: manager.run_dual_agents(
+            agent1_system_prompt="You are a sales rep practicing a discovery call.",
+            agent2_system_prompt="You are a skeptical buyer.",
+            initial_message="Hi, do you have a few minutes?",
+            turns=args.turns
+        ),
+        args.iterations,
+        concurrency=args.concurrency
+    )
+    result.extra["llm_calls_per_op"] = 2 * args.turns
+    return result
+
+def bench_orchestrator_fanout(args: argparse.Namespace, server_url: str) -> BenchmarkResult:
+    """Add tasks to a multi-agent orchestrator and run each one's LLM request."""
+    from ..agents.multi_agent_orchestrator import MultiAgentOrchestrator, Task
+    from ..agents.specialized_agents import LeaderAgent, AnalystAgent, CreativeAgent
+
+    client = LLMClient(LLMConfig(api_url=server_url, api_key="bench", model="mock"))
+    orchestrator = MultiAgentOrchestrator(client)
+    for i in range(args.agents):
+        for agent_cls in (LeaderAgent, AnalystAgent, CreativeAgent):
+            orchestrator.add_agent(agent_cls(f"{agent_cls.__name__} {i}", client))
+
+    def run_task(i: int) -> None:
+        analysis = i % 2 == 0
+        task = Task(
+            id=f"bench_task_{i}",
+            description=f"Benchmark task {i}",
+            required_capabilities=["data_analysis"] if analysis else ["content_generation"],
+            priority=1
+        )
+        orchestrator.add_task(task)
+        if task.assigned_agent:
+            orchestrator._send_message_to_agent(task.assigned_agent, {
+                "type": "analysis_request" if analysis else "creative_request",
+                "data": {"task": task.description},
+                "parameters": {"task": task.description}
+            })
+
+    result = measure("orchestrator_fanout", run_task, args.iterations * 10, concurrency=args.concurrency)
+    result.extra["agents"] = len(orchestrator.agents)
+    return result
+
+def bench_voice_pipeline(args: argparse.Namespace, server_url: str) -> BenchmarkResult:
+    """Transcribe a sample WAV with a fake Whisper model and answer it via the mock server."""
+    from ..voice.whisper_client import WhisperConfig
+    from ..voice.voice_llm_orchestrator import VoiceLLMOrchestrator, VoiceLLMConfig
+
+    orchestrator = VoiceLLMOrchestrator(
+        FileBasedPromptManager(str(TEMPLATES_DIR)),
+        VoiceLLMConfig(
+            whisper_config=WhisperConfig(
+                model_name="fake",
+                decoding=args.whisper_decoding,
+                chunk_seconds=args.chunk_seconds
+            ),
+            llm_config=LLMConfig(api_url=server_url, api_key="bench", model="mock")
+        )
+    )
+    orchestrator.whisper_client._model = FakeWhisperModel(
+        realtime_factor=args.whisper_rtf,
+        low_confidence_every=args.low_confidence_every
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wav_path = write_sample_wav(os.path.join(tmp, "sample.wav"), seconds=args.audio_seconds)
+
+        def run_turn(i: int) -> None:
+            orchestrator.process_audio_file(wav_path)
+            if len(orchestrator.conversation_history) > 2 * args.history:
+                orchestrator.clear_conversation_history()
+
+        result = measure("voice_pipeline", run_turn, args.iterations)
+    result.extra["audio_seconds"] = args.audio_seconds
+    result.extra["whisper_decoding"] = args.whisper_decoding
+    return result
+
+def bench_import_time(args: argparse.Namespace, server_url: str) -> BenchmarkResult:
+    """Import the package's entry points in a fresh interpreter and time it."""
+    import_seconds = Histogram(window=max(args.iterations, 1))
+
+    def import_once(i: int) -> None:
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE],
+            cwd=str(REPO_ROOT),
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout
+        probe = json.loads(output.strip().splitlines()[-1])
+        import_seconds.observe(probe["seconds"])
+        if probe["heavy"]:
+            raise RuntimeError(f"Heavy modules imported eagerly: {probe['heavy']}")
+
+    # Latency here includes interpreter startup; the in-process import time is reported separately
+    result = measure("import_time", import_once, args.iterations)
+    snapshot = import_seconds.snapshot()
+    result.extra["import_p50_ms"] = round(snapshot["p50"] * 1000, 3)
+    result.extra["import_p95_ms"] = round(snapshot["p95"] * 1000, 3)
+    return result
+
+def make_transcript_payload(segments: int) -> Dict[str, Any]:
+    """Build an analysis payload shaped like a long diarized call transcript."""
+    return {
+        "call_id": "bench-call",
+        "participants": ["rep", "buyer"],
+        "segments": [
+            {
+                "speaker": "rep" if i % 2 == 0 else "buyer",
+                "start": round(i * 4.2, 2),
+                "end": round(i * 4.2 + 3.9, 2),
+                "text": f"segment {i} where we talk about pricing, timelines and next steps for the rollout",
+                "sentiment": 0.1 * (i % 7)
+            }
+            for i in range(segments)
+        ]
+    }
+
+def _time_per_call(func: Callable[[], Any], repeat: int) -> float:
+    """Mean seconds per call of a zero-argument function."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+def bench_serialization(args: argparse.Namespace, server_url: str) -> BenchmarkResult:
+    """Compare str() against canonical JSON and the binary format on a large transcript."""
+    payload = make_transcript_payload(args.segments)
+    serializer = get_serializer()
+    encoded = serializer.dumps(payload)
+
+    result = measure("serialization", lambda i: to_prompt_text(payload), args.iterations)
+    repeat = max(args.iterations, 1)
+    result.extra.update({
+        "segments": args.segments,
+        "repr_bytes": len(str(payload).encode("utf-8")),
+        "prompt_json_bytes": len(to_prompt_text(payload).encode("utf-8")),
+        "binary_format": serializer.name,
+        "binary_bytes": len(encoded),
+        "repr_ms": round(_time_per_call(lambda: str(payload), repeat) * 1000, 3),
+        "binary_dumps_ms": round(_time_per_call(lambda: serializer.dumps(payload), repeat) * 1000, 3),
+        "binary_loads_ms": round(_time_per_call(lambda: serializer.loads(encoded), repeat) * 1000, 3),
+    })
+    return result
+
+def bench_router(args: argparse.Namespace, server_url: str) -> BenchmarkResult:
+    """Route calls over three mock endpoints with fast, slow and jittery latency profiles."""
+    from ..router import LLMRouter, RouterConfig
+
+    profiles = {
+        "fast": MockServerConfig(latency=args.latency),
+        "slow": MockServerConfig(latency=args.latency * 5),
+        "jittery": MockServerConfig(latency=args.latency * 2, jitter=args.latency * 2),
+    }
+    servers = {name: MockLLMServer(config).start() for name, config in profiles.items()}
+    try:
+        router = LLMRouter.from_urls(
+            [server.url for server in servers.values()],
+            api_key="bench",
+            model="mock",
+            config=RouterConfig(policy=args.router_policy, initial_latency=args.latency)
+        )
+        messages = [{"role": "user", "content": "How should I handle a pricing objection?"}]
+        result = measure(
+            "router",
+            lambda i: router.call_api(messages, interactive=args.hedge),
+            args.iterations * 5,
+            concurrency=args.concurrency
+        )
+        router.close()
+        result.extra.update({
+            f"{name}_share": round(server.requests_served / max(result.operations, 1), 3)
+            for name, server in servers.items()
+        })
+    finally:
+        for server in servers.values():
+            server.stop()
+    return result
+
+def bench_coalescing(args: argparse.Namespace, server_url: str) -> BenchmarkResult:
+    """Issue bursts of identical concurrent calls, as when a batch re-scores one transcript."""
+    server = MockLLMServer(MockServerConfig(latency=args.latency)).start()
+    try:
+        # Scoring is deterministic, so identical requests may share an answer
+        client = LLMClient(LLMConfig(api_url=server.url, api_key="bench", model="mock", temperature=0.0))
+        burst = max(args.concurrency, 8)
+
+        def rescore(i: int) -> None:
+            messages = [{"role": "user", "content": f"Score transcript {i // burst}"}]
+            client.call_api(messages)
+
+        result = measure("coalescing", rescore, args.iterations * burst, concurrency=burst)
+        result.extra.update({
+            "upstream_requests": server.requests_served,
+            "coalesced_calls": client.coalesced_calls,
+        })
+    finally:
+        server.stop()
+    return result
+
+def bench_server(args: argparse.Namespace, server_url: str) -> BenchmarkResult:
+    """
+    Load-test the ASGI service in process: concurrent live-assist WebSockets
+    stream audio frames and read back transcripts and streamed tokens.
+    """
+    import asyncio
+    import numpy as np
+    from ..server import PipelineService, ServiceConfig
+    from ..voice.whisper_client import WhisperClient, WhisperConfig
+    from .asgi_client import WebSocketClient
+
+    server = MockLLMServer(MockServerConfig(latency=args.latency, token_delay=args.token_delay)).start()
+    whisper = WhisperClient(WhisperConfig(model_name="fake"))
+    whisper._model = FakeWhisperModel(realtime_factor=args.whisper_rtf)
+    service = PipelineService(
+        llm_client=LLMClient(LLMConfig(api_url=server.url, api_key="bench", model="mock")),
+        whisper_client=whisper,
+        config=ServiceConfig(max_inflight=args.server_inflight, partial_interval=1.0)
+    )
+    t = np.arange(int(args.audio_seconds * 16000)) / 16000
+    pcm = (8000 * np.sin(2 * np.pi * 220 * t)).astype("<i2").tobytes()
+    frame = 16000 // 4 * 2  # 250 ms
+
+    turn_seconds = Histogram(window=max(args.iterations * args.turns, 1))
+    first_token = Histogram(window=max(args.iterations * args.turns, 1))
+    errors = Counter()
+
+    async def session(slots: asyncio.Semaphore) -> None:
+        async with slots:
+            ws = await WebSocketClient(service, "/voice").connect()
+            try:
+                for turn in range(args.turns):
+                    start = time.perf_counter()
+                    for offset in range(0, len(pcm), frame):
+                        await ws.send_bytes(pcm[offset:offset + frame])
+                    await ws.send_json({"type": "end"})
+                    tokens = 0
+                    while True:
+                        event = await ws.receive_json()
+                        if event["type"] == "token":
+                            tokens += 1
+                            if tokens == 1:
+                                first_token.observe(time.perf_counter() - start)
+                        elif event["type"] == "error":
+                            errors.inc()
+                            break
+                        elif event["type"] == "response":
+                            break
+                    turn_seconds.observe(time.perf_counter() - start)
+            finally:
+                await ws.close()
+
+    async def run_all() -> None:
+        slots = asyncio.Semaphore(args.connections)
+        await asyncio.gather(*(session(slots) for _ in range(args.iterations)))
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        asyncio.run(run_all())
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        service.close()
+        server.stop()
+
+    first = first_token.snapshot()
+    return BenchmarkResult(
+        name="server",
+        operations=turn_seconds.count,
+        errors=int(errors.value),
+        seconds=elapsed,
+        latency=turn_seconds.snapshot(),
+        peak_memory_bytes=peak,
+        extra={
+            "connections": args.connections,
+            "first_token_p50_ms": round(first["p50"] * 1000, 3),
+            "first_token_p95_ms": round(first["p95"] * 1000, 3),
+            "upstream_requests": server.requests_served
+        }
+    )
+
+def bench_sessions(args: argparse.Namespace, server_url: str) -> BenchmarkResult:
+    """
+    Hold many concurrent voice sessions over one shared LLM client; half of
+    them are evicted to the session cap along the way.
+    """
+    from ..voice.sessions import MultiSessionVoiceOrchestrator, SessionConfig
+
+    server = MockLLMServer(MockServerConfig(latency=0.0)).start()
+    try:
+        orchestrator = MultiSessionVoiceOrchestrator(
+            FileBasedPromptManager(str(TEMPLATES_DIR)),
+            session_config=SessionConfig(max_sessions=max(args.sessions // 2, 1), max_history_messages=2 * args.history),
+            llm_client=LLMClient(LLMConfig(api_url=server.url, api_key="bench", model="mock"))
+        )
+
+        def run_turn(i: int) -> None:
+            orchestrator.process_text(f"caller-{i % args.sessions}", f"Turn {i // args.sessions} of this call")
+
+        result = measure(
+            "sessions",
+            run_turn,
+            args.sessions * args.turns,
+            concurrency=max(args.concurrency, 16)
+        )
+        stats = orchestrator.get_stats()
+        result.extra.update({
+            "sessions": args.sessions,
+            "resident_sessions": stats["sessions"],
+            "history_chars_per_session": round(stats["history_chars"] / max(stats["sessions"], 1), 1),
+            "upstream_requests": server.requests_served
+        })
+    finally:
+        server.stop()
+    return result
+
+def bench_assignment(args: argparse.Namespace, server_url: str) -> BenchmarkResult:
+    """
+    Plan a burst of tasks over hundreds of agents in one pass and compare
+    the makespan (most tasks on one agent) with per-task best-score placement.
+    """
+    import numpy as np
+    from ..agents.base_agent import AgentCapability
+    from ..agents.multi_agent_orchestrator import MultiAgentOrchestrator, Task
+    from ..agents.specialized_agents import AnalystAgent
+    from ..agents.assignment import score_matrix
+
+    rng = np.random.default_rng(0)
+    capabilities = [f"skill_{k}" for k in range(12)]
+    orchestrator = MultiAgentOrchestrator(None)
+    for i in range(args.assign_agents):
+        agent = AnalystAgent(f"Agent {i}", None)
+        agent.capabilities = [
+            AgentCapability(name, name, float(rng.uniform(0.3, 1.0)), [])
+            for name in rng.choice(capabilities, size=3, replace=False)
+        ]
+        orchestrator.add_agent(agent)
+    tasks = [
+        Task(
+            id=f"task_{i}",
+            description=f"Task {i}",
+            required_capabilities=list(rng.choice(capabilities, size=2, replace=False)),
+            priority=int(rng.integers(1, 4))
+        )
+        for i in range(args.assign_tasks)
+    ]
+
+    plans: List[Dict[str, Optional[str]]] = []
+    result = measure("assignment", lambda i: plans.append(orchestrator.plan_assignments(tasks)), args.iterations)
+
+    agents = list(orchestrator.agents.values())
+    scores, kinds = score_matrix(agents, tasks)
+    # The per-task placement picks the best-scoring agent every time
+    greedy = scores.argmax(axis=0)[kinds[scores.max(axis=0)[kinds] > 0]]
+    placed = [agent_id for agent_id in plans[-1].values() if agent_id is not None]
+    result.extra.update({
+        "agents": len(agents),
+        "tasks": len(tasks),
+        "assigned": len(placed),
+        "makespan": int(np.unique(placed, return_counts=True)[1].max()) if placed else 0,
+        "greedy_makespan": int(np.bincount(greedy).max()) if greedy.size else 0
+    })
+    return result
+
+def bench_lanes(args: argparse.Namespace, server_url: str) -> BenchmarkResult:
+    """
+    Measure interactive LLM latency while a batch backfill saturates the
+    client, with interactive and batch lanes and with one shared queue.
+    """
+    import threading
+    from ..lanes import INTERACTIVE, BATCH, Lane, LaneScheduler, lane_scope
+
+    config = LLMConfig(api_url=server_url, api_key="bench", model="mock", coalesce_requests=False)
+    schedulers = {
+        "shared": LaneScheduler([Lane(INTERACTIVE)], capacity=args.lane_capacity),
+        "lanes": LaneScheduler.standard(args.lane_capacity)
+    }
+    results: Dict[str, BenchmarkResult] = {}
+    batch_rate: Dict[str, float] = {}
+    for mode, scheduler in schedulers.items():
+        client = LLMClient(config, lanes=scheduler)
+        stop = threading.Event()
+        completed = Counter()
+
+        def backfill(worker: int) -> None:
+            with lane_scope(BATCH):
+                while not stop.is_set():
+                    client.call_api([{"role": "user", "content": f"Backfill {worker}"}])
+                    completed.inc()
+
+        workers = [threading.Thread(target=backfill, args=(w,), daemon=True) for w in range(4 * args.lane_capacity)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        time.sleep(0.2)  # let the backlog build
+
+        def live_turn(i: int) -> None:
+            with lane_scope(INTERACTIVE):
+                client.call_api([{"role": "user", "content": f"Live turn {i}"}])
+
+        try:
+            results[mode] = measure("lanes", live_turn, args.iterations * 5, concurrency=2)
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join()
+        batch_rate[mode] = round(completed.value / (time.perf_counter() - start), 1)
+
+    result = results["lanes"]
+    result.extra.update({
+        "capacity": args.lane_capacity,
+        "shared_p99_ms": results["shared"].to_dict()["p99_ms"],
+        "batch_calls_per_s": batch_rate["lanes"],
+        "shared_batch_calls_per_s": batch_rate["shared"]
+    })
+    return result
+
+def bench_agent_pool(args: argparse.Namespace, server_url: str) -> BenchmarkResult:
+    """
+    Register thousands of buyer personas and give tasks to a random few;
+    only the pool's active agents are built and scanned.
+    """
+    from ..agents.agent_pool import AgentPool, PersonaSpec
+    from ..agents.multi_agent_orchestrator import MultiAgentOrchestrator, Task
+
+    server = MockLLMServer(MockServerConfig(latency=0.0)).start()
+    try:
+        client = LLMClient(LLMConfig(api_url=server.url, api_key="bench", model="mock"))
+        pool = AgentPool(client, max_active=args.pool_active)
+        pool.register_many(
+            PersonaSpec(
+                f"buyer-{i}",
+                f"Buyer {i}",
+                "You are {name}, a buyer who pushes back on price.",
+                variables={"name": f"Buyer {i}"},
+                capabilities={"buyer_roleplay": 0.5 + (i % 10) / 20}
+            )
+            for i in range(args.personas)
+        )
+        orchestrator = MultiAgentOrchestrator(client, agent_pool=pool)
+
+        def give_task(i: int) -> None:
+            persona = f"buyer-{(i * 7919) % args.personas}"
+            task = Task(f"task_{i}", f"Raise objection {i}", ["buyer_roleplay"], 1, assigned_agent=persona)
+            orchestrator.add_task(task)
+            if task.status != "completed":
+                raise RuntimeError(f"Task {task.id} ended {task.status}")
+
+        result = measure("agent_pool", give_task, args.iterations * 50)
+        stats = pool.get_stats()
+        result.extra.update({
+            "personas": stats["registered"],
+            "active_agents": stats["active"],
+            "orchestrator_agents": len(orchestrator.agents),
+            "checkpoints": stats["checkpoints"]
+        })
+    finally:
+        server.stop()
+    return result
+
+def bench_transcript_search(args: argparse.Namespace, server_url: str) -> BenchmarkResult:
+    """
+    Index a corpus of call transcripts with Zipf-distributed words, then run
+    word, prefix, phrase and filtered queries against the on-disk index.
+    """
+    import numpy as np
+    from ..transcript_index import TranscriptIndex
+
+    rng = np.random.default_rng(0)
+    vocabulary = np.array([f"w{i}" for i in range(20000)])
+    ranks = (rng.zipf(1.2, size=(args.search_calls, 12, 10)) - 1) % vocabulary.size
+    with tempfile.TemporaryDirectory() as path:
+        index = TranscriptIndex(path, flush_docs=1000, flush_seconds=None)
+        start = time.perf_counter()
+        for call in range(args.search_calls):
+            segments = [
+                {"text": " ".join(vocabulary[ranks[call, s]]), "start": 4.0 * s, "end": 4.0 * s + 4.0}
+                for s in range(ranks.shape[1])
+            ]
+            index.add_transcript(f"call-{call}", segments, {"rep_id": f"rep-{call % 50}"})
+        index.flush()
+        index_seconds = time.perf_counter() - start
+
+        phrases = [
+            '"{}"'.format(" ".join(vocabulary[ranks[call, 3, 2:5]]))
+            for call in rng.integers(0, args.search_calls, size=64)
+        ]
+        queries = [
+            lambda i: index.search("w1"),
+            lambda i: index.search(f"w{100 + i % 500}"),
+            lambda i: index.search(f"w{1 + i % 9}*"),
+            lambda i: index.search(phrases[i % len(phrases)]),
+            lambda i: index.search(f"w{2 + i % 40}", where={"rep_id": f"rep-{i % 50}"})
+        ]
+
+        def query(i: int) -> None:
+            if not queries[i % len(queries)](i // len(queries)) and i % len(queries) == 3:
+                raise RuntimeError(f"No hit for {phrases[i // len(queries) % len(phrases)]}")
+
+        result = measure("transcript_search", query, args.iterations * 25)
+        stats = index.get_stats()
+        result.extra.update({
+            "calls": stats["documents"],
+            "segments": stats["segments"],
+            "index_seconds": round(index_seconds, 2),
+            "bytes_per_call": round(stats["bytes"] / max(stats["documents"], 1), 1)
+        })
+    return result
+
+SCENARIOS: Dict[str, Callable[[argparse.Namespace, str], BenchmarkResult]] = {
+    "template_render": bench_template_render,
+    "dual_agents": bench_dual_agents,
+    "orchestrator_fanout": bench_orchestrator_fanout,
+    "voice_pipeline": bench_voice_pipeline,
+    "import_time": bench_import_time,
+    "serialization": bench_serialization,
+    "router": bench_router,
+    "coalescing": bench_coalescing,
+    "server": bench_server,
+    "sessions": bench_sessions,
+    "assignment": bench_assignment,
+    "lanes": bench_lanes,
+    "agent_pool": bench_agent_pool,
+    "transcript_search": bench_transcript_search,
+}
+
+def check_thresholds(results: List[BenchmarkResult], thresholds: Dict[str, Dict[str, float]]) -> List[str]:
+    """
+    Compare results against regression thresholds.
+
+    Supported keys per scenario: ``max_p95_ms``, ``max_p99_ms``,
+    ``min_throughput``, ``max_peak_memory_mb``, ``max_import_p95_ms`` and
+    ``max_error_rate``.
+
+    Returns:
+        List[str]: Human-readable descriptions of every violated threshold
+    """
+    violations = []
+    for result in results:
+        limits = thresholds.get(result.name, {})
+        row = result.to_dict()
+        checks = [
+            ("max_p95_ms", row["p95_ms"], lambda v, lim: v <= lim),
+            ("max_p99_ms", row["p99_ms"], lambda v, lim: v <= lim),
+            ("min_throughput", row["throughput"], lambda v, lim: v >= lim),
+            ("max_peak_memory_mb", row["peak_memory_mb"], lambda v, lim: v <= lim),
+            ("max_import_p95_ms", row.get("import_p95_ms", 0.0), lambda v, lim: v <= lim),
+            ("max_error_rate", result.errors / max(result.operations, 1), lambda v, lim: v <= lim),
+        ]
+        for key, value, ok in checks:
+            if key in limits and not ok(value, limits[key]):
+                violations.append(f"{result.name}: {key} violated ({value} vs {limits[key]})")
+    return violations
+
+def run(args: argparse.Namespace) -> List[BenchmarkResult]:
+    """Start the mock server and run the selected scenarios."""
+    server_config = MockServerConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate
+    )
+    results = []
+    with MockLLMServer(server_config) as server:
+        for name in args.scenarios:
+            logger.info("Running scenario %s", name)
+            try:
+                results.append(SCENARIOS[name](args, server.url))
+            except ImportError as e:
+                logger.warning("Skipping %s: %s", name, e)
+    return results
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the llm package")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--turns", type=int, default=3, help="turns per dual-agent conversation")
+    parser.add_argument("--agents", type=int, default=3, help="agents per role in the fan-out scenario")
+    parser.add_argument("--history", type=int, default=10, help="conversation history length")
+    parser.add_argument("--latency", type=float, default=0.02, help="mock LLM latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--segments", type=int, default=2000, help="transcript segments in the serialization payload")
+    parser.add_argument("--audio-seconds", type=float, default=5.0)
+    parser.add_argument("--whisper-rtf", type=float, default=0.02, help="fake Whisper real-time factor")
+    parser.add_argument("--whisper-decoding", choices=["fixed", "adaptive"], default="fixed")
+    parser.add_argument("--low-confidence-every", type=int, default=4,
+                        help="every Nth greedy segment of the fake Whisper model fails the confidence thresholds")
+    parser.add_argument("--chunk-seconds", type=float, help="enable long-audio mode with chunks this long")
+    parser.add_argument("--router-policy", choices=["ewma", "least_outstanding"], default="ewma")
+    parser.add_argument("--hedge", action="store_true", help="send router calls as hedged interactive requests")
+    parser.add_argument("--connections", type=int, default=16, help="concurrent WebSockets in the server scenario")
+    parser.add_argument("--server-inflight", type=int, default=32, help="service worker slots in the server scenario")
+    parser.add_argument("--sessions", type=int, default=2000, help="distinct callers in the sessions scenario")
+    parser.add_argument("--assign-agents", type=int, default=200, help="agents in the assignment scenario")
+    parser.add_argument("--assign-tasks", type=int, default=5000, help="tasks per burst in the assignment scenario")
+    parser.add_argument("--lane-capacity", type=int, default=8, help="LLM slots shared by the lanes scenario")
+    parser.add_argument("--personas", type=int, default=10000, help="registered personas in the agent pool scenario")
+    parser.add_argument("--pool-active", type=int, default=64, help="agents the pool keeps built")
+    parser.add_argument("--search-calls", type=int, default=20000, help="calls indexed in the transcript search scenario")
+    parser.add_argument("--token-delay", type=float, default=0.002, help="seconds between streamed mock tokens")
+    parser.add_argument("--thresholds", default=str(DEFAULT_THRESHOLDS))
+    parser.add_argument("--no-thresholds", action="store_true")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+    args = parse_args(argv)
+
+    results = run(args)
+    rows = [result.to_dict() for result in results]
+    for row in rows:
+        print(json.dumps(row))
+    if args.output:
+        Path(args.output).write_text(json.dumps(rows, indent=2))
+
+    if args.no_thresholds:
+        return 0
+    thresholds = json.loads(Path(args.thresholds).read_text())
+    violations = check_thresholds(results, thresholds)
+    for violation in violations:
+        print(f"REGRESSION {violation}", file=sys.stderr)
+    return 1 if violations else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
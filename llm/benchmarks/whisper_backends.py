@@ -0,0 +1,145 @@
+"""
+Compare Whisper backends on one recording: real-time factor and word error rate.
+
+    python -m llm.benchmarks.whisper_backends --audio call.wav --reference call.txt \\
+        --backends openai faster-whisper --model base --threads 4
+
+Without ``--audio`` a synthetic sample WAV is generated and only the fake
+backend is meaningful; backends whose engine is not installed are skipped.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from ..voice.backends import available_backends
+from ..voice.whisper_client import WhisperClient, WhisperConfig
+from ..voice.fake_whisper import FakeWhisperModel, audio_duration, write_sample_wav
+
+logger = logging.getLogger(__name__)
+
+def _normalize(text: str) -> List[str]:
+    """Lowercase words with punctuation stripped."""
+    words = []
+    for word in text.lower().split():
+        word = "".join(ch for ch in word if ch.isalnum() or ch == "'")
+        if word:
+            words.append(word)
+    return words
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """
+    Word error rate: word-level edit distance divided by reference length.
+
+    Args:
+        reference: Ground-truth transcript
+        hypothesis: Transcript to score
+
+    Returns:
+        float: (substitutions + deletions + insertions) / reference words
+    """
+    ref, hyp = _normalize(reference), _normalize(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+def compare_backends(
+    audio_path: str,
+    reference: Optional[str],
+    backends: List[str],
+    config: WhisperConfig,
+    repeats: int = 1
+) -> List[Dict[str, Any]]:
+    """
+    Transcribe ``audio_path`` with each backend under the same config.
+
+    Model load time is reported separately; the real-time factor is the best
+    decode time over ``repeats`` divided by the audio duration.
+
+    Returns:
+        List[Dict[str, Any]]: One row per backend
+    """
+    duration = audio_duration(audio_path)
+    installed = set(available_backends())
+    rows = []
+    for name in backends:
+        if name not in installed:
+            logger.warning("Skipping %s: engine not installed", name)
+            rows.append({"backend": name, "skipped": True})
+            continue
+        client = WhisperClient(WhisperConfig(**{**vars(config), "backend": name}))
+        start = time.perf_counter()
+        client.model
+        load_seconds = time.perf_counter() - start
+
+        best = float("inf")
+        text = ""
+        for _ in range(repeats):
+            start = time.perf_counter()
+            text = client.transcribe_audio_file(audio_path)
+            best = min(best, time.perf_counter() - start)
+        row = {
+            "backend": name,
+            "load_seconds": round(load_seconds, 3),
+            "decode_seconds": round(best, 3),
+            "audio_seconds": round(duration, 3),
+            "rtf": round(best / duration, 4) if duration else None,
+            "wer": round(word_error_rate(reference, text), 4) if reference is not None else None
+        }
+        rows.append(row)
+    return rows
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description="Compare Whisper backends on a WAV file")
+    parser.add_argument("--audio", help="WAV file; a synthetic sample is generated if omitted")
+    parser.add_argument("--reference", help="reference transcript, as text or a path to a text file")
+    parser.add_argument("--backends", nargs="+", default=["fake", "openai", "faster-whisper"])
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--beam-size", type=int, default=5)
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--threads", type=int, default=0, help="CPU threads per backend; 0 keeps the default")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--repeats", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    reference = args.reference
+    if reference and os.path.exists(reference):
+        with open(reference) as f:
+            reference = f.read()
+    config = WhisperConfig(
+        model_name=args.model,
+        language=args.language,
+        beam_size=args.beam_size,
+        compute_type=args.compute_type,
+        cpu_threads=args.threads,
+        device=args.device
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        audio = args.audio
+        if audio is None:
+            audio = write_sample_wav(os.path.join(tmp, "sample.wav"))
+            if reference is None:
+                reference = FakeWhisperModel(realtime_factor=0).transcribe(audio)["text"]
+        for row in compare_backends(audio, reference, args.backends, config, args.repeats):
+            print(json.dumps(row))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
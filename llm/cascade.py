@@ -0,0 +1,176 @@
+import re
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .llm_client import LLMClient, LLMConfig
+from .metrics import metrics
+from .deadlines import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+Validator = Callable[[List[Dict[str, str]], str], bool]
+
+@dataclass
+class Tier:
+    """One model in the cascade, e.g. a small fast model or the large default."""
+    name: str
+    config: LLMConfig
+
+@dataclass
+class TierStats:
+    """Rolling statistics for one tier."""
+    requests: int = 0
+    escalations: int = 0
+    errors: int = 0
+    total_latency: float = 0.0
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.escalations / self.requests if self.requests else 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.requests if self.requests else 0.0
+
+_current_workload: contextvars.ContextVar = contextvars.ContextVar("llm_workload", default=None)
+
+@contextmanager
+def workload_scope(workload: Optional[str], tier: Optional[str] = None) -> Iterator[None]:
+    """
+    Label the LLM calls made in a block, so a ``ModelCascade`` can pick their tier.
+
+    Args:
+        workload: Label such as an agent class name or ``"template:<name>"``;
+            ``None`` keeps the enclosing label
+        tier: Tier the workload declares for itself; the cascade's
+            ``assignments`` for the label take precedence
+    """
+    if workload is None:
+        yield
+        return
+    token = _current_workload.set((workload, tier))
+    try:
+        yield
+    finally:
+        _current_workload.reset(token)
+
+_UNSURE = re.compile(
+    r"\b(i'?m not sure|i am not sure|i don'?t know|i do not know|i cannot|i can'?t help|unable to)\b",
+    re.IGNORECASE
+)
+
+def default_validator(messages: List[Dict[str, str]], answer: str) -> bool:
+    """Accept answers that are non-empty and do not open with a refusal or hedge."""
+    text = answer.strip()
+    return bool(text) and not _UNSURE.search(text[:200])
+
+class ModelCascade:
+    """
+    Sends each call to the cheapest adequate model and escalates on failure.
+
+    Tiers are ordered from fastest to largest. A call starts at the tier
+    chosen for its workload (see ``workload_scope``) and moves up one tier
+    whenever the answer fails the validator or the call errors; the last
+    tier's answer is returned as is. Exposes the same ``call_api`` method as
+    ``LLMClient`` so agents and the voice pipeline can use it unchanged.
+    """
+
+    def __init__(
+        self,
+        tiers: List[Tier],
+        assignments: Optional[Dict[str, str]] = None,
+        validator: Optional[Validator] = None,
+        default_tier: Optional[str] = None
+    ):
+        """
+        Args:
+            tiers: Tiers from fastest to largest
+            assignments: Workload label (agent class, ``"template:<name>"``, ...) to tier name
+            validator: ``validator(messages, answer)`` returning False to escalate
+            default_tier: Tier for unlabelled calls; defaults to the fastest
+        """
+        if not tiers:
+            raise ValueError("ModelCascade needs at least one tier")
+        self.tiers = tiers
+        self.assignments = dict(assignments or {})
+        self.validator = validator or default_validator
+        self.default_tier = default_tier or tiers[0].name
+        self._positions = {tier.name: i for i, tier in enumerate(tiers)}
+        if self.default_tier not in self._positions:
+            raise ValueError(f"Unknown default tier: {self.default_tier}")
+        self._clients = {tier.name: LLMClient(tier.config) for tier in tiers}
+        self._stats = {tier.name: TierStats() for tier in tiers}
+        self._lock = threading.Lock()
+
+    @property
+    def config(self) -> LLMConfig:
+        """Config of the default tier, for code that inspects ``client.config``."""
+        return self.tiers[self._positions[self.default_tier]].config
+
+    def get_stats(self) -> Dict[str, TierStats]:
+        """Snapshot of per-tier statistics."""
+        with self._lock:
+            return {name: TierStats(**vars(stats)) for name, stats in self._stats.items()}
+
+    def resolve_tier(self, workload: Optional[str] = None, declared: Optional[str] = None) -> str:
+        """
+        Tier a workload starts at: its assignment, else the tier it declares,
+        else the label itself if it names a tier, else the default tier.
+        """
+        if workload is None:
+            workload, declared = _current_workload.get() or (None, None)
+        for tier in (self.assignments.get(workload), declared, workload):
+            if tier in self._positions:
+                return tier
+        return self.default_tier
+
+    def call_api(self, messages: List[Dict[str, str]], tier: Optional[str] = None) -> str:
+        """
+        Call the tier chosen for this workload, escalating while answers fail validation.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+            tier: Start at this tier instead of the one resolved from the workload
+
+        Returns:
+            str: The first accepted answer, or the largest tier's answer
+        """
+        start_at = self._positions[tier] if tier in self._positions else self._positions[self.resolve_tier()]
+        for position in range(start_at, len(self.tiers)):
+            current = self.tiers[position]
+            top = position == len(self.tiers) - 1
+            stats = self._stats[current.name]
+            began = time.perf_counter()
+            try:
+                with metrics.span("llm_cascade_call", {"tier": current.name}):
+                    answer = self._clients[current.name].call_api(messages)
+            except DeadlineExceeded:
+                raise  # a larger model would only be later
+            except Exception as e:
+                with self._lock:
+                    stats.requests += 1
+                    stats.errors += 1
+                    stats.total_latency += time.perf_counter() - began
+                    if not top:
+                        stats.escalations += 1
+                if top:
+                    raise
+                metrics.inc("llm_cascade_escalations_total", labels={"tier": current.name, "reason": "error"})
+                logger.warning("Tier %s failed, escalating: %s", current.name, e)
+                continue
+            accepted = top or self.validator(messages, answer)
+            with self._lock:
+                stats.requests += 1
+                stats.total_latency += time.perf_counter() - began
+                if not accepted:
+                    stats.escalations += 1
+            if accepted:
+                return answer
+            metrics.inc("llm_cascade_escalations_total", labels={"tier": current.name, "reason": "invalid"})
+            logger.info("Tier %s answer failed validation, escalating", current.name)
+        raise RuntimeError("unreachable: the largest tier always answers or raises")
@@ -0,0 +1,184 @@
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional, Iterator, Union
+
+try:
+    from .metrics import metrics
+except ImportError:  # imported as a top-level module (e.g. example.py)
+    from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when work is started or still running after its deadline."""
+    pass
+
+class LoadShedError(RuntimeError):
+    """Raised when admission control rejects work that could not finish in time."""
+    pass
+
+class Deadline:
+    """A point in time by which a piece of work must finish."""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, expires_at: float):
+        """Create a deadline at an absolute ``time.monotonic()`` value."""
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        """Deadline a number of seconds from now."""
+        return cls(time.monotonic() + seconds)
+
+    @classmethod
+    def from_datetime(cls, when: datetime) -> "Deadline":
+        """Deadline at a wall-clock time, such as ``Task.deadline``."""
+        now = datetime.now(when.tzinfo) if when.tzinfo else datetime.now()
+        return cls.after((when - now).total_seconds())
+
+    def remaining(self) -> float:
+        """Seconds left (negative once expired)."""
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, stage: str = "work") -> None:
+        """Raise ``DeadlineExceeded`` if the deadline has passed."""
+        if self.expired:
+            metrics.inc("deadline_exceeded_total", labels={"stage": stage})
+            raise DeadlineExceeded(f"Deadline exceeded before {stage}")
+
+    def timeout(self, default: Optional[float] = None) -> Optional[float]:
+        """
+        Timeout to pass to a blocking call: the smaller of ``default`` and the
+        time left, 0.0 once expired (which ``requests`` rejects; check first).
+        """
+        remaining = max(0.0, self.remaining())
+        return remaining if default is None else min(default, remaining)
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.3f}s)"
+
+_current_deadline: contextvars.ContextVar = contextvars.ContextVar("llm_deadline", default=None)
+
+def current_deadline() -> Optional[Deadline]:
+    """The deadline of the work running in this context, if any."""
+    return _current_deadline.get()
+
+def clear_deadline() -> None:
+    """
+    Drop the deadline in this context, e.g. in a copied context for shared
+    work that must not end at the deadline of whichever caller started it.
+    """
+    _current_deadline.set(None)
+
+@contextmanager
+def deadline_scope(deadline: Union[Deadline, datetime, float, None]) -> Iterator[Optional[Deadline]]:
+    """
+    Run a block under a deadline that nested LLM and Whisper calls honour.
+
+    The tighter of the new and any enclosing deadline wins. Accepts a
+    ``Deadline``, a wall-clock ``datetime`` or a timeout in seconds; ``None``
+    keeps the enclosing deadline.
+    """
+    if isinstance(deadline, datetime):
+        deadline = Deadline.from_datetime(deadline)
+    elif isinstance(deadline, (int, float)):
+        deadline = Deadline.after(deadline)
+    enclosing = _current_deadline.get()
+    if deadline is None or (enclosing is not None and enclosing.expires_at <= deadline.expires_at):
+        deadline = enclosing
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+class AdmissionController:
+    """
+    Admission control based on projected queue wait.
+
+    Tracks in-flight work and an EWMA of service time. New work whose
+    projected completion (queue wait plus one service time) would land after
+    its deadline is rejected, or admitted as degraded work when the caller
+    can accept a cheaper answer that fits.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        initial_service_time: float = 1.0,
+        degraded_speedup: float = 2.0,
+        ewma_alpha: float = 0.2,
+        name: str = "default"
+    ):
+        """
+        Args:
+            max_concurrency: Work items served in parallel
+            initial_service_time: Assumed seconds per item before measurements
+            degraded_speedup: How much faster a degraded item is expected to be
+            ewma_alpha: Weight of the newest service-time sample
+            name: Label for metrics
+        """
+        self.max_concurrency = max_concurrency
+        self.service_time = initial_service_time
+        self.degraded_speedup = degraded_speedup
+        self.ewma_alpha = ewma_alpha
+        self.name = name
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def projected_latency(self) -> float:
+        """Expected seconds until a newly admitted item completes."""
+        with self._lock:
+            waves = self.in_flight // self.max_concurrency
+            return (waves + 1) * self.service_time
+
+    def admit(self, deadline: Optional[Deadline], degradable: bool = False) -> str:
+        """
+        Decide whether to take new work.
+
+        Args:
+            deadline: Deadline of the work (``None`` is always accepted)
+            degradable: Whether a cheaper, degraded answer is acceptable
+
+        Returns:
+            str: "accept" or "degrade"
+
+        Raises:
+            LoadShedError: If the work cannot finish before its deadline
+        """
+        if deadline is None:
+            return "accept"
+        remaining = deadline.remaining()
+        projected = self.projected_latency()
+        if projected <= remaining:
+            return "accept"
+        if degradable and projected / self.degraded_speedup <= remaining:
+            metrics.inc("admission_degraded_total", labels={"controller": self.name})
+            return "degrade"
+        metrics.inc("admission_rejected_total", labels={"controller": self.name})
+        raise LoadShedError(
+            f"Projected latency {projected:.2f}s exceeds remaining {max(0.0, remaining):.2f}s"
+        )
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Count a work item as in flight and fold its duration into the EWMA."""
+        with self._lock:
+            self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.in_flight -= 1
+                self.service_time = (1 - self.ewma_alpha) * self.service_time + self.ewma_alpha * elapsed
@@ -1,7 +1,11 @@
 import sys
+import logging
 from llm_client import LLMClient, ConversationManager
 
 def main():
+    # Configure logging
+    logging.basicConfig(level=logging.INFO)
+    
     # Initialize the LLM client
     client = LLMClient()
     
@@ -0,0 +1,253 @@
+import time
+import logging
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+try:
+    from .metrics import metrics, Histogram
+    from .deadlines import DeadlineExceeded, LoadShedError, current_deadline
+except ImportError:  # imported as a top-level module (e.g. example.py)
+    from metrics import metrics, Histogram
+    from deadlines import DeadlineExceeded, LoadShedError, current_deadline
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+@dataclass
+class Lane:
+    """A class of traffic with its own queue and reserved concurrency."""
+    name: str
+    reserved: int = 0  # slots only this lane may use, unless it lends them
+    limit: Optional[int] = None  # most slots the lane may hold at once, borrowed ones included
+    lendable: bool = True  # whether other lanes may borrow reserved slots while this lane has no queue
+    target_p99: Optional[float] = None  # seconds; reported by ``stats`` to check isolation
+
+@dataclass
+class _LaneState:
+    lane: Lane
+    running: int = 0
+    waiters: Deque[threading.Event] = field(default_factory=deque)
+    latency: Histogram = field(default_factory=lambda: Histogram(window=2048))
+    completed: int = 0
+    borrowed: int = 0
+
+_current_lane: contextvars.ContextVar = contextvars.ContextVar("llm_lane", default=None)
+
+def current_lane() -> Optional[str]:
+    """The lane of the work running in this context, if any."""
+    return _current_lane.get()
+
+@contextmanager
+def lane_scope(lane: Optional[str]) -> Iterator[None]:
+    """
+    Run a block's LLM and Whisper calls in a lane, e.g. ``"interactive"`` or ``"batch"``.
+
+    ``None`` keeps the enclosing lane. Worker threads started with
+    ``contextvars.copy_context()`` inherit it.
+    """
+    if lane is None:
+        yield
+        return
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+class LaneScheduler:
+    """
+    Concurrency slots for one resource (an LLM provider, a Whisper model)
+    shared by several lanes of traffic.
+
+    Each lane has its own FIFO queue and ``reserved`` slots no other lane
+    can take while it has work waiting; slots beyond the reservations are
+    shared. A lane with an empty queue lends its idle reserved slots if it
+    is ``lendable``, so a lane is never left idle next to a backlog. When a
+    slot frees up, lanes below their reservation are served first, then the
+    lanes in the order given. A backfill therefore only ever competes with
+    live traffic for shared and borrowed slots.
+
+    Per lane, queue wait goes to ``lane_queue_seconds`` and end-to-end
+    latency (queue plus service) to ``lane_latency_seconds``.
+    """
+
+    def __init__(
+        self,
+        lanes: List[Lane],
+        capacity: Optional[int] = None,
+        default: Optional[str] = None,
+        queue_timeout: Optional[float] = None,
+        name: str = "llm"
+    ):
+        """
+        Args:
+            lanes: Lanes in priority order
+            capacity: Total slots; defaults to the sum of the reservations
+            default: Lane for calls made outside any ``lane_scope``; defaults
+                to the first lane
+            queue_timeout: Longest wait for a slot, tightened by any active
+                deadline; None waits for the deadline alone
+            name: Label for metrics, e.g. "llm" or "whisper"
+        """
+        if not lanes:
+            raise ValueError("A lane scheduler needs at least one lane")
+        reserved = sum(lane.reserved for lane in lanes)
+        self.capacity = reserved if capacity is None else capacity
+        if self.capacity < max(reserved, 1):
+            raise ValueError(f"Capacity {self.capacity} is below the {reserved} reserved slots")
+        self.default = default or lanes[0].name
+        self.queue_timeout = queue_timeout
+        self.name = name
+        self._states: Dict[str, _LaneState] = {lane.name: _LaneState(lane) for lane in lanes}
+        if self.default not in self._states:
+            raise ValueError(f"Unknown default lane: {self.default}")
+        self._running = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def standard(cls, capacity: int, interactive_share: float = 0.5, **kwargs: Any) -> "LaneScheduler":
+        """
+        An ``interactive`` and a ``batch`` lane splitting ``capacity`` slots.
+
+        Interactive work keeps its share to itself and may borrow idle batch
+        slots; batch work never takes an interactive slot, since a borrowed
+        slot is held for a whole call. With fewer than two slots nothing can
+        be reserved and interactive work is only served first.
+        """
+        if capacity < 2:
+            lanes = [Lane(INTERACTIVE, lendable=False), Lane(BATCH)]
+        else:
+            interactive = min(capacity - 1, max(1, round(capacity * interactive_share)))
+            lanes = [
+                Lane(INTERACTIVE, reserved=interactive, lendable=False),
+                Lane(BATCH, reserved=capacity - interactive)
+            ]
+        return cls(lanes, capacity=max(capacity, 1), **kwargs)
+
+    @property
+    def lanes(self) -> List[Lane]:
+        return [state.lane for state in self._states.values()]
+
+    @contextmanager
+    def slot(self, lane: Optional[str] = None) -> Iterator[str]:
+        """
+        Hold a slot of a lane for the duration of a block.
+
+        Args:
+            lane: Lane name; defaults to the lane of the enclosing
+                ``lane_scope``, then to ``default``. Unknown lanes use
+                ``default``.
+
+        Yields:
+            str: The lane the slot was taken in
+
+        Raises:
+            DeadlineExceeded: If the active deadline passes while queued
+            LoadShedError: If no slot frees up within ``queue_timeout``
+        """
+        state = self._states.get(lane or current_lane() or self.default) or self._states[self.default]
+        labels = {"scheduler": self.name, "lane": state.lane.name}
+        start = time.perf_counter()
+        self._acquire(state)
+        metrics.observe("lane_queue_seconds", time.perf_counter() - start, labels)
+        try:
+            yield state.lane.name
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                state.running -= 1
+                self._running -= 1
+                state.completed += 1
+                self._dispatch()
+            state.latency.observe(elapsed)
+            metrics.observe("lane_latency_seconds", elapsed, labels)
+
+    def _acquire(self, state: _LaneState) -> None:
+        with self._lock:
+            if not state.waiters and self._can_start(state):
+                self._start(state)
+                return
+            waiter = threading.Event()
+            state.waiters.append(waiter)
+        deadline = current_deadline()
+        timeout = deadline.timeout(self.queue_timeout) if deadline is not None else self.queue_timeout
+        if waiter.wait(timeout):
+            return
+        with self._lock:
+            if waiter.is_set():  # granted while timing out
+                return
+            state.waiters.remove(waiter)
+            # An emptied queue may free reserved slots for other lanes
+            self._dispatch()
+        metrics.inc("lane_rejected_total", labels={"scheduler": self.name, "lane": state.lane.name})
+        if deadline is not None and deadline.expired:
+            metrics.inc("deadline_exceeded_total", labels={"stage": f"{self.name}_lane_queue"})
+            raise DeadlineExceeded(f"Deadline exceeded waiting in the {state.lane.name} lane")
+        raise LoadShedError(f"No {self.name} slot in the {state.lane.name} lane within {timeout:.2f}s")
+
+    def _held_for_others(self, state: _LaneState, protected_only: bool) -> int:
+        """Unused reserved slots of the other lanes (only those not lendable right now, if asked)."""
+        return sum(
+            max(0, other.lane.reserved - other.running)
+            for other in self._states.values()
+            if other is not state and (not protected_only or not other.lane.lendable or other.waiters)
+        )
+
+    def _can_start(self, state: _LaneState) -> bool:
+        lane = state.lane
+        if lane.limit is not None and state.running >= lane.limit:
+            return False
+        free = self.capacity - self._running
+        if free <= 0:
+            return False
+        if state.running < lane.reserved:
+            return True
+        return free - self._held_for_others(state, protected_only=True) >= 1
+
+    def _start(self, state: _LaneState) -> None:
+        if state.running >= state.lane.reserved and \
+                self.capacity - self._running - self._held_for_others(state, protected_only=False) < 1:
+            state.borrowed += 1
+            metrics.inc("lane_borrowed_total", labels={"scheduler": self.name, "lane": state.lane.name})
+        state.running += 1
+        self._running += 1
+
+    def _dispatch(self) -> None:
+        """Hand freed slots to queued work: lanes below their reservation first, then by priority."""
+        while self._running < self.capacity:
+            states = [state for state in self._states.values() if state.waiters]
+            states.sort(key=lambda state: state.running >= state.lane.reserved)  # stable: keeps priority order
+            for state in states:
+                if self._can_start(state):
+                    self._start(state)
+                    state.waiters.popleft().set()
+                    break
+            else:
+                return
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per lane: slots in use, queue length, completed and borrowed slots, latency percentiles."""
+        result: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            snapshot = [(state, state.running, len(state.waiters)) for state in self._states.values()]
+        for state, running, queued in snapshot:
+            latency = state.latency.snapshot()
+            entry: Dict[str, Any] = {
+                "reserved": state.lane.reserved,
+                "running": running,
+                "queued": queued,
+                "completed": state.completed,
+                "borrowed": state.borrowed,
+                "p50": latency["p50"],
+                "p99": latency["p99"]
+            }
+            if state.lane.target_p99 is not None:
+                entry["within_target"] = latency["p99"] <= state.lane.target_p99
+            result[state.lane.name] = entry
+        return result
@@ -1,11 +1,25 @@
 import os
+import json
+import asyncio
+import threading
+import contextvars
 import requests
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+from contextlib import nullcontext
+from typing import List, Dict, Optional, Iterator, Callable, Any
+from dataclasses import dataclass, field
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+try:
+    from .metrics import metrics
+    from .serialization import cache_key
+    from .deadlines import Deadline, DeadlineExceeded, clear_deadline, current_deadline
+    from .lanes import current_lane
+except ImportError:  # imported as a top-level module (e.g. example.py)
+    from metrics import metrics
+    from serialization import cache_key
+    from deadlines import Deadline, DeadlineExceeded, clear_deadline, current_deadline
+    from lanes import current_lane
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -16,17 +30,48 @@ class LLMConfig:
     model: str
     temperature: float = 0.7
     max_tokens: int = 32000
+    coalesce_requests: bool = True  # share one upstream call between identical in-flight requests at temperature 0
+    timeout: Optional[float] = 120.0  # per-request timeout in seconds, tightened by any active deadline
+
+@dataclass
+class _Flight:
+    """An in-flight upstream call shared by every caller with the same request key."""
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Optional[str] = None
+    error: Optional[BaseException] = None
+
+@dataclass
+class _StreamFlight:
+    """An in-flight streamed call; followers replay tokens received so far."""
+    tokens: List[str] = field(default_factory=list)
+    finished: bool = False
+    error: Optional[BaseException] = None
+    readers: int = 0  # callers still reading; the upstream stream stops when none are left
+    condition: threading.Condition = field(default_factory=threading.Condition)
 
 class LLMClient:
     """Client for interacting with LLM APIs."""
     
-    def __init__(self, config: Optional[LLMConfig] = None):
-        """Initialize LLM client with configuration."""
+    def __init__(self, config: Optional[LLMConfig] = None, lanes: Optional[Any] = None):
+        """
+        Initialize LLM client with configuration.
+        
+        Args:
+            config: Endpoint and model settings; read from the environment if omitted
+            lanes: Optional ``LaneScheduler`` bounding upstream calls per lane
+                (see ``lane_scope``); without one, calls are not queued
+        """
+        self.lanes = lanes
         self.config = config or LLMConfig(
             api_url=os.getenv("LLM_API_URL", "https://api.inflection.ai/v1/chat/completions"),
             api_key=os.getenv("LLM_API_KEY", ""),
             model=os.getenv("LLM_MODEL", "Pi-3.1")
         )
+        self.coalesced_calls = 0
+        self._flights: Dict[str, _Flight] = {}
+        self._stream_flights: Dict[str, _StreamFlight] = {}
+        self._async_flights: Dict[tuple, "asyncio.Future"] = {}
+        self._flight_lock = threading.Lock()
         
     def _get_headers(self) -> Dict[str, str]:
         """Get headers for API request."""
@@ -44,10 +89,31 @@ class LLMClient:
             "max_tokens": self.config.max_tokens
         }
     
+    def _coalesces(self) -> bool:
+        """Whether identical requests may share an answer: only when sampling is deterministic."""
+        return self.config.coalesce_requests and self.config.temperature == 0
+    
+    def _request_key(self, payload: Dict) -> str:
+        """Canonical key identifying an upstream request; callers in different lanes never share one."""
+        return cache_key({"url": self.config.api_url, "payload": payload, "lane": current_lane()})
+    
+    def _mark_coalesced(self, kind: str) -> None:
+        """Count a call that was served by another caller's upstream request."""
+        with self._flight_lock:
+            self.coalesced_calls += 1
+        metrics.inc("llm_coalesced_calls_total", labels={"kind": kind})
+    
     def call_api(self, messages: List[Dict[str, str]]) -> str:
         """
         Call the LLM API with the given messages.
         
+        At temperature 0, concurrent calls with an identical request in the
+        same lane share one upstream call unless ``coalesce_requests`` is
+        disabled in the config. The request timeout is tightened to the
+        deadline of the enclosing ``deadline_scope``, if any; a caller
+        sharing another's call waits up to its own deadline, and makes its
+        own call if the other caller's deadline cut the shared one short.
+        
         Args:
             messages: List of message dictionaries with 'role' and 'content' keys
             
@@ -57,22 +123,277 @@ class LLMClient:
         Raises:
             requests.exceptions.RequestException: If the API request fails
             KeyError: If the response format is unexpected
+            DeadlineExceeded: If the active deadline passes before an answer
         """
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check("llm_call")
+        payload = self._get_payload(messages)
+        if not self._coalesces():
+            return self._call_upstream(payload)
+        
+        key = self._request_key(payload)
+        while True:
+            with self._flight_lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+            if leader:
+                break
+            if not flight.done.wait(deadline.timeout() if deadline is not None else None):
+                metrics.inc("deadline_exceeded_total", labels={"stage": "llm_coalesced_wait"})
+                raise DeadlineExceeded("Deadline exceeded waiting for a coalesced LLM call")
+            if isinstance(flight.error, DeadlineExceeded):
+                # The leader's deadline, not ours: try again under our own
+                if deadline is not None:
+                    deadline.check("llm_call")
+                continue
+            self._mark_coalesced("call")
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        
         try:
-            response = requests.post(
-                self.config.api_url,
-                headers=self._get_headers(),
-                json=self._get_payload(messages)
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data["choices"][0]["message"]["content"]
-        except requests.exceptions.RequestException as e:
-            logger.error(f"API request failed: {str(e)}")
-            raise
-        except KeyError as e:
-            logger.error(f"Unexpected response format: {str(e)}")
+            flight.result = self._call_upstream(payload)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
             raise
+        finally:
+            with self._flight_lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+    
+    async def acall_api(self, messages: List[Dict[str, str]]) -> str:
+        """
+        Call the LLM API from asyncio code without blocking the event loop.
+        
+        Identical concurrent requests on the same event loop await a single
+        shared call, under the same conditions as ``call_api``; across
+        threads they are coalesced by ``call_api``.
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+            
+        Returns:
+            str: The response content from the LLM
+        """
+        if not self._coalesces():
+            return await asyncio.to_thread(self.call_api, messages)
+        
+        loop = asyncio.get_running_loop()
+        key = (id(loop), self._request_key(self._get_payload(messages)))
+        deadline = current_deadline()
+        while True:
+            task = self._async_flights.get(key)
+            leader = task is None
+            if leader:
+                task = loop.create_task(asyncio.to_thread(self.call_api, messages))
+                self._async_flights[key] = task
+                task.add_done_callback(lambda done: self._async_flights.pop(key, None))
+                # Shield so one cancelled waiter does not cancel the shared call
+                return await asyncio.shield(task)
+            try:
+                # Followers wait only as long as their own deadline allows
+                result = await asyncio.wait_for(asyncio.shield(task), deadline.timeout() if deadline is not None else None)
+            except asyncio.TimeoutError:
+                metrics.inc("deadline_exceeded_total", labels={"stage": "llm_coalesced_wait"})
+                raise DeadlineExceeded("Deadline exceeded waiting for a coalesced LLM call")
+            except DeadlineExceeded:
+                # The leader's deadline, not ours: try again under our own
+                if deadline is not None:
+                    deadline.check("llm_call")
+                continue
+            self._mark_coalesced("async")
+            return result
+    
+    def stream_api(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """
+        Stream response tokens from the LLM API.
+        
+        At temperature 0, identical concurrent streams in the same lane share
+        one upstream stream; late joiners first receive the tokens already
+        streamed. The shared stream is not bound to any one caller's
+        deadline: each caller stops reading at its own, and the upstream
+        stream stops once no caller is left.
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+            
+        Yields:
+            str: Successive pieces of the response content
+        """
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check("llm_stream")
+        payload = dict(self._get_payload(messages), stream=True)
+        if not self._coalesces():
+            yield from self._stream_upstream(payload)
+            return
+        
+        key = self._request_key(payload)
+        with self._flight_lock:
+            flight = self._stream_flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._stream_flights[key] = _StreamFlight()
+            flight.readers += 1
+        if leader:
+            context = contextvars.copy_context()
+            context.run(clear_deadline)
+            threading.Thread(
+                target=context.run,
+                args=(self._pump_stream, key, payload, flight),
+                daemon=True
+            ).start()
+        else:
+            self._mark_coalesced("stream")
+        
+        try:
+            index = 0
+            while True:
+                with flight.condition:
+                    while index >= len(flight.tokens) and not flight.finished:
+                        if deadline is not None and deadline.expired:
+                            raise DeadlineExceeded("Deadline exceeded while streaming")
+                        flight.condition.wait(deadline.timeout() if deadline is not None else None)
+                    pending = flight.tokens[index:]
+                    finished, error = flight.finished, flight.error
+                for token in pending:
+                    yield token
+                index += len(pending)
+                if finished and index >= len(flight.tokens):
+                    if error is not None:
+                        raise error
+                    return
+        finally:
+            with self._flight_lock:
+                flight.readers -= 1
+    
+    def _pump_stream(self, key: str, payload: Dict, flight: _StreamFlight) -> None:
+        """Read an upstream stream into a shared flight buffer until it ends or nobody reads it."""
+        try:
+            for token in self._stream_upstream(payload):
+                with self._flight_lock:
+                    if flight.readers == 0:
+                        # Every caller gave up; later ones start a new stream
+                        del self._stream_flights[key]
+                        break
+                with flight.condition:
+                    flight.tokens.append(token)
+                    flight.condition.notify_all()
+        except BaseException as e:
+            flight.error = e
+        finally:
+            with self._flight_lock:
+                if self._stream_flights.get(key) is flight:
+                    del self._stream_flights[key]
+            with flight.condition:
+                flight.finished = True
+                flight.condition.notify_all()
+    
+    def _lane_slot(self):
+        """A lane slot for one upstream request, if the client has lanes."""
+        return self.lanes.slot() if self.lanes is not None else nullcontext()
+    
+    def _stream_upstream(self, payload: Dict) -> Iterator[str]:
+        """Perform a streamed (server-sent events) API request."""
+        deadline = current_deadline()
+        with self._lane_slot(), metrics.span("llm_stream_api"):
+            try:
+                with requests.post(
+                    self.config.api_url,
+                    headers=self._get_headers(),
+                    json=payload,
+                    stream=True,
+                    timeout=self._request_timeout(deadline)
+                ) as response:
+                    response.raise_for_status()
+                    for line in response.iter_lines():
+                        if deadline is not None and deadline.expired:
+                            raise DeadlineExceeded("Deadline exceeded while streaming")
+                        if not line.startswith(b"data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == b"[DONE]":
+                            break
+                        delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                        if delta:
+                            yield delta
+            except requests.exceptions.Timeout as e:
+                self._raise_timeout(deadline, e)
+            except requests.exceptions.RequestException as e:
+                metrics.inc("llm_errors_total", labels={"kind": "request"})
+                logger.error("API request failed: %s", e)
+                raise
+            except (KeyError, IndexError, ValueError) as e:
+                metrics.inc("llm_errors_total", labels={"kind": "format"})
+                logger.error("Unexpected response format: %s", e)
+                raise
+    
+    def _request_timeout(self, deadline: Optional[Deadline]) -> Optional[float]:
+        """
+        Request timeout: the configured one, tightened by the deadline.
+        
+        Raises:
+            DeadlineExceeded: If no time is left, rather than passing
+                ``requests`` a zero timeout it rejects
+        """
+        if deadline is None:
+            return self.config.timeout
+        timeout = deadline.timeout(self.config.timeout)
+        if timeout is not None and timeout <= 0:
+            metrics.inc("deadline_exceeded_total", labels={"stage": "llm_request"})
+            raise DeadlineExceeded("Deadline exceeded before LLM request")
+        return timeout
+    
+    def _raise_timeout(self, deadline: Optional[Deadline], error: Exception) -> None:
+        """Re-raise a request timeout, as DeadlineExceeded if the deadline caused it."""
+        metrics.inc("llm_errors_total", labels={"kind": "timeout"})
+        if deadline is not None and deadline.expired:
+            metrics.inc("deadline_exceeded_total", labels={"stage": "llm_call"})
+            logger.warning("LLM request cancelled at deadline: %s", error)
+            raise DeadlineExceeded("Deadline exceeded during LLM request") from error
+        logger.error("API request timed out: %s", error)
+        raise error
+    
+    def _call_upstream(self, payload: Dict) -> str:
+        """Perform a single API request."""
+        deadline = current_deadline()
+        with self._lane_slot(), metrics.span("llm_call_api"):
+            try:
+                response = requests.post(
+                    self.config.api_url,
+                    headers=self._get_headers(),
+                    json=payload,
+                    timeout=self._request_timeout(deadline)
+                )
+                response.raise_for_status()
+                data = response.json()
+                content = data["choices"][0]["message"]["content"]
+            except requests.exceptions.Timeout as e:
+                self._raise_timeout(deadline, e)
+            except requests.exceptions.RequestException as e:
+                metrics.inc("llm_errors_total", labels={"kind": "request"})
+                logger.error("API request failed: %s", e)
+                raise
+            except KeyError as e:
+                metrics.inc("llm_errors_total", labels={"kind": "format"})
+                logger.error("Unexpected response format: %s", e)
+                raise
+        if metrics.enabled:
+            self._record_usage(response, data)
+        return content
+
+    def _record_usage(self, response: requests.Response, data: Dict) -> None:
+        """Record request, byte and token counters for a completed call."""
+        metrics.inc("llm_requests_total")
+        metrics.inc("llm_request_bytes_total", len(response.request.body or b""))
+        metrics.inc("llm_response_bytes_total", len(response.content))
+        usage = data.get("usage") or {}
+        metrics.inc("llm_prompt_tokens_total", usage.get("prompt_tokens", 0))
+        metrics.inc("llm_completion_tokens_total", usage.get("completion_tokens", 0))
 
 class ConversationManager:
     """Manages conversations between multiple agents."""
@@ -86,8 +407,9 @@ class ConversationManager:
         agent1_system_prompt: str,
         agent2_system_prompt: str,
         initial_message: str,
-        turns: int = 5
-    ) -> None:
+        turns: int = 5,
+        on_turn: Optional[Callable[[Dict[str, str]], None]] = None
+    ) -> List[Dict[str, str]]:
         """
         Run a conversation between two agents.
         
@@ -96,26 +418,42 @@ class ConversationManager:
             agent2_system_prompt: System prompt for the second agent
             initial_message: Initial message to start the conversation
             turns: Number of conversation turns
+            on_turn: Called with each transcript entry as soon as it exists,
+                to stream the conversation
+            
+        Returns:
+            List[Dict[str, str]]: The transcript as ``{"speaker", "content"}``
+            entries, starting with the initial message
         """
         agent1_msgs = [{"role": "system", "content": agent1_system_prompt}]
         agent2_msgs = [{"role": "system", "content": agent2_system_prompt}]
+        transcript = [{"speaker": "user", "content": initial_message}]
+        if on_turn is not None:
+            on_turn(transcript[0])
 
         agent1_msgs.append({"role": "user", "content": initial_message})
-        logger.info(f"Starting conversation...\nAgent 1 (user): {initial_message}\n")
+        logger.info("Starting conversation...\nAgent 1 (user): %s\n", initial_message)
 
         for i in range(turns):
             # Agent 1's turn
             reply1 = self.llm_client.call_api(agent1_msgs)
-            logger.info(f"Agent 1: {reply1}\n")
+            logger.info("Agent 1: %s\n", reply1)
             agent1_msgs.append({"role": "assistant", "content": reply1})
+            transcript.append({"speaker": "agent1", "content": reply1})
+            if on_turn is not None:
+                on_turn(transcript[-1])
 
             # Agent 2's turn
             agent2_msgs.append({"role": "user", "content": reply1})
             reply2 = self.llm_client.call_api(agent2_msgs)
-            logger.info(f"Agent 2: {reply2}\n")
+            logger.info("Agent 2: %s\n", reply2)
             agent2_msgs.append({"role": "assistant", "content": reply2})
+            transcript.append({"speaker": "agent2", "content": reply2})
+            if on_turn is not None:
+                on_turn(transcript[-1])
 
             # Update Agent 1's context
             agent1_msgs.append({"role": "user", "content": reply2})
 
-        logger.info("Conversation ended.") 
\ No newline at end of file
+        logger.info("Conversation ended.")
+        return transcript
@@ -0,0 +1,218 @@
+import re
+import json
+import zlib
+import logging
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .metrics import metrics
+from .serialization import canonical_json, to_prompt_text
+
+logger = logging.getLogger(__name__)
+
+EmbeddingFn = Callable[[List[str]], np.ndarray]
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+class HashingEmbedder:
+    """
+    Dependency-free lexical embedding.
+
+    Word unigrams and bigrams are hashed into ``dim`` signed buckets with
+    sublinear term frequency, then L2-normalized, so cosine similarity
+    rewards shared vocabulary. Use a real sentence-embedding model for
+    semantic recall; this is the fallback that always works offline.
+    """
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+
+    def _features(self, text: str) -> Dict[int, float]:
+        words = _TOKEN.findall(text.lower())
+        counts: Dict[int, float] = {}
+        for term in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            h = zlib.crc32(term.encode("utf-8"))
+            bucket = h % self.dim
+            sign = 1.0 if (h >> 31) & 1 else -1.0
+            counts[bucket] = counts.get(bucket, 0.0) + sign
+        return counts
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for bucket, count in self._features(text).items():
+                vectors[row, bucket] = np.sign(count) * (1.0 + np.log(abs(count))) if count else 0.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+@dataclass
+class MemorySnippet:
+    """A stored snippet and, for search results, its similarity to the query."""
+    id: int
+    text: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    score: float = 0.0
+
+class MemoryIndex:
+    """
+    Embedded vector index over past transcripts and analyses.
+
+    Snippets are embedded once when added and kept in a contiguous NumPy
+    matrix; a search is one matrix-vector product plus a partial sort.
+    Metadata such as ``rep_id`` or ``session_id`` scopes searches, so one
+    index can hold every rep's history.
+    """
+
+    def __init__(self, embed: Optional[EmbeddingFn] = None, initial_capacity: int = 1024):
+        """
+        Args:
+            embed: Maps a list of texts to an (n, dim) array of unit vectors;
+                defaults to ``HashingEmbedder``
+            initial_capacity: Rows preallocated before the first resize
+        """
+        self.embed = embed or HashingEmbedder()
+        self._texts: List[str] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._capacity = initial_capacity
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def _append_vectors(self, vectors: np.ndarray) -> None:
+        count = len(self._texts)
+        if self._vectors is None:
+            self._vectors = np.zeros((max(self._capacity, len(vectors)), vectors.shape[1]), dtype=np.float32)
+        needed = count + len(vectors)
+        if needed > len(self._vectors):
+            grown = np.zeros((max(needed, 2 * len(self._vectors)), self._vectors.shape[1]), dtype=np.float32)
+            grown[:count] = self._vectors[:count]
+            self._vectors = grown
+        self._vectors[count:needed] = vectors
+
+    def add_many(self, texts: Sequence[str], metadata: Optional[Sequence[Dict[str, Any]]] = None) -> List[int]:
+        """
+        Embed and store snippets.
+
+        Returns:
+            List[int]: Ids of the new snippets
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        metadata = list(metadata) if metadata is not None else [{} for _ in texts]
+        with metrics.span("memory_embed"):
+            vectors = np.asarray(self.embed(texts), dtype=np.float32)
+        with self._lock:
+            first = len(self._texts)
+            self._append_vectors(vectors)
+            self._texts.extend(texts)
+            self._metadata.extend(dict(m) for m in metadata)
+            return list(range(first, first + len(texts)))
+
+    def add(self, text: str, metadata: Optional[Dict[str, Any]] = None) -> int:
+        """Embed and store one snippet; returns its id."""
+        return self.add_many([text], [metadata or {}])[0]
+
+    def add_transcript(
+        self,
+        transcript: Sequence[Any],
+        metadata: Optional[Dict[str, Any]] = None,
+        window: int = 4
+    ) -> List[int]:
+        """
+        Store a transcript as snippets of ``window`` consecutive turns.
+
+        Args:
+            transcript: Turns as strings or dicts (e.g. ``{"speaker", "content"}``)
+            metadata: Attached to every snippet, e.g. ``{"rep_id": ..., "session_id": ...}``
+            window: Turns per snippet
+        """
+        lines = [
+            f"{turn.get('speaker') or turn.get('role')}: {turn.get('content') or turn.get('text')}"
+            if isinstance(turn, dict) else to_prompt_text(turn)
+            for turn in transcript
+        ]
+        snippets = ["\n".join(lines[i:i + window]) for i in range(0, len(lines), window)]
+        base = {"source": "transcript", **(metadata or {})}
+        return self.add_many(snippets, [dict(base, turn=i * window) for i in range(len(snippets))])
+
+    def add_analysis(self, result: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None) -> int:
+        """Store an ``AnalystAgent`` result."""
+        base = {"source": "analysis", "analysis_type": result.get("analysis_type"), **(metadata or {})}
+        return self.add(to_prompt_text(result.get("content", "")), base)
+
+    def search(
+        self,
+        query: str,
+        k: int = 3,
+        where: Optional[Dict[str, Any]] = None,
+        min_score: float = 0.0
+    ) -> List[MemorySnippet]:
+        """
+        Find the snippets most similar to ``query``.
+
+        Args:
+            query: Text to match
+            k: Maximum number of snippets
+            where: Only snippets whose metadata has these key/value pairs
+            min_score: Minimum cosine similarity
+
+        Returns:
+            List[MemorySnippet]: Best first
+        """
+        if k <= 0 or not self._texts:
+            return []
+        with metrics.span("memory_search"):
+            vector = np.asarray(self.embed([query]), dtype=np.float32)[0]
+            with self._lock:
+                count = len(self._texts)
+                scores = self._vectors[:count] @ vector
+                if where:
+                    mask = np.fromiter(
+                        (all(m.get(key) == value for key, value in where.items()) for m in self._metadata),
+                        dtype=bool,
+                        count=count
+                    )
+                    scores = np.where(mask, scores, -np.inf)
+                k = min(k, count)
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+                return [
+                    MemorySnippet(int(i), self._texts[i], dict(self._metadata[i]), float(scores[i]))
+                    for i in top
+                    if np.isfinite(scores[i]) and scores[i] > min_score
+                ]
+
+    def save(self, path: str) -> None:
+        """Write the index to ``<path>.npy`` (vectors) and ``<path>.json`` (texts and metadata)."""
+        base = Path(path)
+        with self._lock:
+            count = len(self._texts)
+            vectors = self._vectors[:count] if self._vectors is not None else np.zeros((0, 0), dtype=np.float32)
+            np.save(base.with_suffix(".npy"), vectors)
+            base.with_suffix(".json").write_text(canonical_json({"texts": self._texts, "metadata": self._metadata}))
+
+    @classmethod
+    def load(cls, path: str, embed: Optional[EmbeddingFn] = None) -> "MemoryIndex":
+        """Load an index written by ``save``; ``embed`` must match the one used to build it."""
+        base = Path(path)
+        data = json.loads(base.with_suffix(".json").read_text())
+        vectors = np.load(base.with_suffix(".npy"))
+        index = cls(embed, initial_capacity=max(1024, len(vectors)))
+        if len(vectors):
+            index._append_vectors(vectors)
+        index._texts = data["texts"]
+        index._metadata = data["metadata"]
+        return index
+
+def format_snippets(snippets: Sequence[MemorySnippet], heading: str = "Relevant notes from past sessions:") -> str:
+    """Render search results as a compact prompt block."""
+    if not snippets:
+        return ""
+    return heading + "\n" + "\n".join(f"- {snippet.text}" for snippet in snippets)
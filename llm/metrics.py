@@ -0,0 +1,294 @@
+import os
+import json
+import time
+import threading
+import logging
+import functools
+from collections import deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Deque, Callable
+
+logger = logging.getLogger(__name__)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Optional[Dict[str, Any]]) -> LabelKey:
+    """Turn a label dict into a hashable, consistently ordered key."""
+    if not labels:
+        return ()
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    """Render a label key in Prometheus text format."""
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+def _pick(samples: list, q: float) -> float:
+    """Nearest-rank quantile (0.0-1.0) of an already sorted list."""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(round(q * (len(samples) - 1))))]
+
+class Counter:
+    """Monotonic counter."""
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the counter by the given amount."""
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+class Histogram:
+    """Latency/size histogram keeping a bounded window of recent samples."""
+
+    def __init__(self, window: int = 4096):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Record a single sample."""
+        with self._lock:
+            self._samples.append(value)
+            self._count += 1
+            self._sum += value
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def percentile(self, q: float) -> float:
+        """Return the q-th percentile (0-100) of the recent samples."""
+        with self._lock:
+            samples = sorted(self._samples)
+        return _pick(samples, q / 100.0)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Return count, sum and p50/p95/p99 of the recent samples."""
+        with self._lock:
+            samples = sorted(self._samples)
+            count, total = self._count, self._sum
+        return {
+            "count": count,
+            "sum": total,
+            "p50": _pick(samples, 0.50),
+            "p95": _pick(samples, 0.95),
+            "p99": _pick(samples, 0.99),
+        }
+
+class _Span:
+    """Context manager timing a block into a histogram."""
+
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: Histogram):
+        self._histogram = histogram
+        self._start = 0.0
+
+    def __enter__(self) -> "_Span":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._histogram.observe(time.perf_counter() - self._start)
+
+class _NoopSpan:
+    """Shared do-nothing span handed out while metrics are disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+_NOOP_SPAN = _NoopSpan()
+
+@dataclass
+class MetricsRegistry:
+    """Registry of counters and histograms for the whole pipeline."""
+    enabled: bool = False
+    window: int = 4096
+    _counters: Dict[str, Dict[LabelKey, Counter]] = field(default_factory=dict, repr=False)
+    _histograms: Dict[str, Dict[LabelKey, Histogram]] = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def enable(self) -> None:
+        """Start recording metrics."""
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop recording metrics (recorded values are kept)."""
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Drop every recorded metric."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def counter(self, name: str, labels: Optional[Dict[str, Any]] = None) -> Counter:
+        """Get or create a counter."""
+        key = _label_key(labels)
+        family = self._counters.get(name)
+        if family is None or key not in family:
+            with self._lock:
+                family = self._counters.setdefault(name, {})
+                family.setdefault(key, Counter())
+        return family[key]
+
+    def histogram(self, name: str, labels: Optional[Dict[str, Any]] = None) -> Histogram:
+        """Get or create a histogram."""
+        key = _label_key(labels)
+        family = self._histograms.get(name)
+        if family is None or key not in family:
+            with self._lock:
+                family = self._histograms.setdefault(name, {})
+                family.setdefault(key, Histogram(self.window))
+        return family[key]
+
+    def inc(self, name: str, amount: float = 1.0, labels: Optional[Dict[str, Any]] = None) -> None:
+        """Increase a counter if metrics are enabled."""
+        if self.enabled:
+            self.counter(name, labels).inc(amount)
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        """Record a histogram sample if metrics are enabled."""
+        if self.enabled:
+            self.histogram(name, labels).observe(value)
+
+    def span(self, name: str, labels: Optional[Dict[str, Any]] = None):
+        """
+        Time a block of code into the ``<name>_seconds`` histogram.
+
+        Args:
+            name: Stage name
+            labels: Optional labels for the histogram
+
+        Returns:
+            A context manager; a shared no-op one while metrics are disabled
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self.histogram(f"{name}_seconds", labels))
+
+    def timed(self, name: str) -> Callable:
+        """Decorator timing every call of the wrapped function."""
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all metrics as a JSON-serializable dictionary."""
+        with self._lock:
+            counters = {name: dict(family) for name, family in self._counters.items()}
+            histograms = {name: dict(family) for name, family in self._histograms.items()}
+        return {
+            "counters": {
+                name: [{"labels": dict(key), "value": c.value} for key, c in family.items()]
+                for name, family in counters.items()
+            },
+            "histograms": {
+                name: [{"labels": dict(key), **h.snapshot()} for key, h in family.items()]
+                for name, family in histograms.items()
+            },
+        }
+
+    def render_json(self) -> str:
+        """Render all metrics as JSON."""
+        return json.dumps(self.snapshot(), separators=(",", ":"))
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = {name: dict(family) for name, family in self._counters.items()}
+            histograms = {name: dict(family) for name, family in self._histograms.items()}
+        for name, family in sorted(counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            for key, c in family.items():
+                lines.append(f"{name}{_format_labels(key)} {c.value}")
+        for name, family in sorted(histograms.items()):
+            lines.append(f"# TYPE {name} summary")
+            for key, h in family.items():
+                snap = h.snapshot()
+                for q, field_name in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+                    lines.append(f"{name}{_format_labels(key, ('quantile', q))} {snap[field_name]}")
+                lines.append(f"{name}_count{_format_labels(key)} {snap['count']}")
+                lines.append(f"{name}_sum{_format_labels(key)} {snap['sum']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str, fmt: str = "prometheus") -> None:
+        """
+        Write all metrics to a file.
+
+        Args:
+            path: Destination file
+            fmt: Either "prometheus" or "json"
+        """
+        content = self.render_json() if fmt == "json" else self.render_prometheus()
+        Path(path).write_text(content)
+
+    def serve(self, host: str = "127.0.0.1", port: int = 9464) -> ThreadingHTTPServer:
+        """
+        Serve metrics over HTTP in a background thread.
+
+        ``/metrics`` returns Prometheus text, ``/metrics.json`` returns JSON.
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+
+        Returns:
+            ThreadingHTTPServer: The running server; call ``shutdown()`` to stop it
+        """
+        registry = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, ctype = registry.render_prometheus(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, ctype = registry.render_json(), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                logger.debug("metrics exporter: " + format, *args)
+
+        server = ThreadingHTTPServer((host, port), _Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        logger.info("Serving metrics on http://%s:%d/metrics", host, server.server_address[1])
+        return server
+
+# Process-wide registry, enabled with LLM_METRICS=1
+metrics = MetricsRegistry(enabled=os.getenv("LLM_METRICS", "").lower() in ("1", "true", "yes"))
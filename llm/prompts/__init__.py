@@ -0,0 +1,4 @@
+"""Prompt templates and template managers."""
+from .prompt_manager import PromptTemplate, PromptTemplateManager, FileBasedPromptManager
+
+__all__ = ["PromptTemplate", "PromptTemplateManager", "FileBasedPromptManager"]
@@ -5,6 +5,9 @@ import json
 import logging
 from pathlib import Path
 
+from ..metrics import metrics
+from ..serialization import canonical_json
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -12,13 +15,15 @@ class PromptTemplate:
     """Represents a prompt template with variables."""
     template: str
     variables: Dict[str, Any]
+    tier: Optional[str] = None  # model tier for a ModelCascade, e.g. "fast"
     
     def format(self, **kwargs) -> str:
         """Format the template with provided variables."""
         try:
-            return self.template.format(**kwargs)
+            with metrics.span("prompt_format"):
+                return self.template.format(**kwargs)
         except KeyError as e:
-            logger.error(f"Missing required variable in prompt template: {str(e)}")
+            logger.error("Missing required variable in prompt template: %s", e)
             raise
 
 class PromptTemplateManager(ABC):
@@ -56,7 +61,8 @@ class FileBasedPromptManager(PromptTemplateManager):
                     template_name = template_file.stem
                     self._templates[template_name] = PromptTemplate(
                         template=data["template"],
-                        variables=data.get("variables", {})
+                        variables=data.get("variables", {}),
+                        tier=data.get("tier")
                     )
                 logger.info(f"Loaded template: {template_name}")
             except Exception as e:
@@ -72,11 +78,18 @@ class FileBasedPromptManager(PromptTemplateManager):
         """List all available template names."""
         return list(self._templates.keys())
     
-    def add_template(self, name: str, template: str, variables: Optional[Dict[str, Any]] = None) -> None:
+    def add_template(
+        self,
+        name: str,
+        template: str,
+        variables: Optional[Dict[str, Any]] = None,
+        tier: Optional[str] = None
+    ) -> None:
         """Add a new template."""
         self._templates[name] = PromptTemplate(
             template=template,
-            variables=variables or {}
+            variables=variables or {},
+            tier=tier
         )
         
     def save_templates(self) -> None:
@@ -86,11 +99,11 @@ class FileBasedPromptManager(PromptTemplateManager):
         for name, template in self._templates.items():
             template_file = self.templates_dir / f"{name}.json"
             try:
+                data = {"template": template.template, "variables": template.variables}
+                if template.tier is not None:
+                    data["tier"] = template.tier
                 with open(template_file, 'w') as f:
-                    json.dump({
-                        "template": template.template,
-                        "variables": template.variables
-                    }, f, indent=2)
+                    f.write(canonical_json(data))
                 logger.info(f"Saved template: {name}")
             except Exception as e:
                 logger.error(f"Error saving template {name}: {str(e)}") 
\ No newline at end of file
@@ -0,0 +1,207 @@
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import List, Dict, Optional
+
+from .deadlines import DeadlineExceeded, LoadShedError
+from .lanes import INTERACTIVE, current_lane
+from .llm_client import LLMClient, LLMConfig
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Endpoint:
+    """A single LLM deployment the router can send requests to."""
+    name: str
+    config: LLMConfig
+
+@dataclass
+class EndpointStats:
+    """Rolling health statistics for one endpoint."""
+    ewma_latency: float = 0.0
+    error_rate: float = 0.0
+    in_flight: int = 0
+    requests: int = 0
+    failures: int = 0
+    cooldown_until: float = 0.0
+
+@dataclass
+class RouterConfig:
+    """Configuration for the LLM router."""
+    policy: str = "ewma"  # "ewma" or "least_outstanding"
+    ewma_alpha: float = 0.2  # weight of the newest sample
+    initial_latency: float = 1.0  # assumed latency of endpoints with no samples
+    max_attempts: int = 2  # endpoints tried before giving up
+    hedge_delay: Optional[float] = None  # fixed delay; None uses the primary's EWMA latency
+    hedge_multiplier: float = 1.5  # hedge after this many EWMA latencies
+    error_cooldown: float = 5.0  # seconds an endpoint is avoided after a failure
+    max_workers: int = 32
+
+class LLMRouter:
+    """
+    Latency-aware router spreading LLM calls over a pool of endpoints.
+
+    Exposes the same ``call_api`` method as ``LLMClient`` so it can be used
+    wherever a client is expected. Each endpoint's EWMA latency, error rate
+    and in-flight count are tracked, and requests go to the best candidate.
+    Interactive calls, by default those made in the interactive lane, are
+    hedged: if the primary has not answered within the hedge delay, the
+    request is also sent to the next-best endpoint and the first successful
+    answer wins.
+    """
+
+    def __init__(self, endpoints: List[Endpoint], config: Optional[RouterConfig] = None):
+        """Initialize the router with a non-empty pool of endpoints."""
+        if not endpoints:
+            raise ValueError("LLMRouter needs at least one endpoint")
+        self.router_config = config or RouterConfig()
+        self.endpoints = endpoints
+        self._clients: Dict[str, LLMClient] = {ep.name: LLMClient(ep.config) for ep in endpoints}
+        self._stats: Dict[str, EndpointStats] = {
+            ep.name: EndpointStats(ewma_latency=self.router_config.initial_latency)
+            for ep in endpoints
+        }
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.router_config.max_workers)
+
+    @classmethod
+    def from_urls(cls, urls: List[str], api_key: str, model: str, config: Optional[RouterConfig] = None) -> "LLMRouter":
+        """Build a router over several URLs serving the same model."""
+        return cls(
+            [Endpoint(name=url, config=LLMConfig(api_url=url, api_key=api_key, model=model)) for url in urls],
+            config
+        )
+
+    @property
+    def config(self) -> LLMConfig:
+        """Config of the first endpoint, for code that inspects ``client.config``."""
+        return self.endpoints[0].config
+
+    def get_stats(self) -> Dict[str, EndpointStats]:
+        """Snapshot of per-endpoint statistics."""
+        with self._lock:
+            return {name: EndpointStats(**vars(stats)) for name, stats in self._stats.items()}
+
+    def _score(self, stats: EndpointStats, now: float) -> float:
+        """Lower is better."""
+        penalty = 1000.0 if stats.cooldown_until > now else 1.0
+        if self.router_config.policy == "least_outstanding":
+            return (stats.in_flight + 1) * penalty + stats.ewma_latency * 1e-3
+        return stats.ewma_latency * (stats.in_flight + 1) / max(1e-3, 1.0 - stats.error_rate) * penalty
+
+    def _ranked(self, exclude: Optional[set] = None) -> List[Endpoint]:
+        """Endpoints ordered from best to worst candidate."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [ep for ep in self.endpoints if not exclude or ep.name not in exclude]
+            return sorted(candidates, key=lambda ep: self._score(self._stats[ep.name], now))
+
+    def _call_endpoint(self, endpoint: Endpoint, messages: List[Dict[str, str]]) -> str:
+        """Call one endpoint, updating its statistics."""
+        alpha = self.router_config.ewma_alpha
+        with self._lock:
+            stats = self._stats[endpoint.name]
+            stats.in_flight += 1
+            stats.requests += 1
+        start = time.perf_counter()
+        try:
+            result = self._clients[endpoint.name].call_api(messages)
+        except (DeadlineExceeded, LoadShedError):
+            # The caller ran out of time; that says nothing about the endpoint
+            with self._lock:
+                stats.in_flight -= 1
+            raise
+        except Exception:
+            with self._lock:
+                stats.in_flight -= 1
+                stats.failures += 1
+                stats.error_rate = (1 - alpha) * stats.error_rate + alpha
+                stats.cooldown_until = time.monotonic() + self.router_config.error_cooldown
+            metrics.inc("llm_router_errors_total", labels={"endpoint": endpoint.name})
+            raise
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            stats.in_flight -= 1
+            stats.error_rate = (1 - alpha) * stats.error_rate
+            stats.ewma_latency = (1 - alpha) * stats.ewma_latency + alpha * elapsed
+        metrics.observe("llm_router_latency_seconds", elapsed, {"endpoint": endpoint.name})
+        return result
+
+    def call_api(self, messages: List[Dict[str, str]], interactive: Optional[bool] = None) -> str:
+        """
+        Call the best available endpoint with the given messages.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+            interactive: Hedge the request to a second endpoint if the first is
+                slow; defaults to whether the call runs in the interactive lane
+
+        Returns:
+            str: The response content from the LLM
+
+        Raises:
+            DeadlineExceeded, LoadShedError: At once, without trying another endpoint
+            Exception: The last endpoint error if every attempt failed
+        """
+        if interactive is None:
+            interactive = current_lane() == INTERACTIVE
+        if interactive and len(self.endpoints) > 1:
+            return self._call_hedged(messages)
+
+        tried: set = set()
+        last_error: Optional[Exception] = None
+        for _ in range(min(self.router_config.max_attempts, len(self.endpoints))):
+            endpoint = self._ranked(exclude=tried)[0]
+            tried.add(endpoint.name)
+            metrics.inc("llm_router_requests_total", labels={"endpoint": endpoint.name})
+            try:
+                return self._call_endpoint(endpoint, messages)
+            except (DeadlineExceeded, LoadShedError):
+                raise
+            except Exception as e:
+                last_error = e
+                logger.warning("Endpoint %s failed, trying next: %s", endpoint.name, e)
+        raise last_error
+
+    def _call_hedged(self, messages: List[Dict[str, str]]) -> str:
+        """Send to the best endpoint and hedge to the next one after a delay."""
+        ranked = self._ranked()
+        primary, backups = ranked[0], ranked[1:]
+        with self._lock:
+            primary_latency = self._stats[primary.name].ewma_latency
+        delay = self.router_config.hedge_delay
+        if delay is None:
+            delay = primary_latency * self.router_config.hedge_multiplier
+
+        metrics.inc("llm_router_requests_total", labels={"endpoint": primary.name})
+        # Calls run in a copy of this context so deadline, lane and workload scopes apply to them
+        futures = {self._executor.submit(contextvars.copy_context().run, self._call_endpoint, primary, messages): primary}
+        done, _ = wait(futures, timeout=delay)
+        last_error: Optional[Exception] = None
+
+        while True:
+            for future in done:
+                endpoint = futures.pop(future)
+                try:
+                    return future.result()
+                except (DeadlineExceeded, LoadShedError):
+                    raise
+                except Exception as e:
+                    last_error = e
+                    logger.warning("Endpoint %s failed: %s", endpoint.name, e)
+            # Primary is slow or failed: hedge to the next backup, if any
+            if backups and len(futures) < 2:
+                backup = backups.pop(0)
+                metrics.inc("llm_router_hedges_total", labels={"endpoint": backup.name})
+                futures[self._executor.submit(contextvars.copy_context().run, self._call_endpoint, backup, messages)] = backup
+            if not futures:
+                raise last_error
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+    def close(self) -> None:
+        """Release the router's worker threads."""
+        self._executor.shutdown(wait=False)
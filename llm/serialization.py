@@ -0,0 +1,172 @@
+import json
+import re
+import hashlib
+import logging
+import dataclasses
+from abc import ABC, abstractmethod
+from datetime import datetime, date
+from enum import Enum
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional speedup
+    msgpack = None
+
+def _to_builtin(obj: Any) -> Any:
+    """Convert values the JSON encoders don't know into plain Python types."""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=repr)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", errors="replace")
+    if hasattr(obj, "tolist"):  # NumPy arrays and scalars
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+class Serializer(ABC):
+    """Abstract base class for payload serializers."""
+    name: str = ""
+    content_type: str = ""
+
+    @abstractmethod
+    def dumps(self, obj: Any) -> bytes:
+        """Serialize an object to bytes."""
+        pass
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        """Deserialize bytes produced by ``dumps``."""
+        pass
+
+class JSONSerializer(Serializer):
+    """Compact, canonical JSON (sorted keys, no whitespace) using the stdlib."""
+    name = "json"
+    content_type = "application/json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(
+            obj,
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+            default=_to_builtin
+        ).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+class OrjsonSerializer(Serializer):
+    """Canonical JSON encoded with orjson."""
+    name = "orjson"
+    content_type = "application/json"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+        self._options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_to_builtin, option=self._options)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+class MsgpackSerializer(Serializer):
+    """Binary MessagePack encoding for storage and inter-process transfer."""
+    name = "msgpack"
+    content_type = "application/msgpack"
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError("msgpack is not installed")
+
+    def dumps(self, obj: Any) -> bytes:
+        return msgpack.packb(obj, default=_to_builtin, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+_SERIALIZERS = {
+    "json": JSONSerializer,
+    "orjson": OrjsonSerializer,
+    "msgpack": MsgpackSerializer,
+}
+
+_canonical_json = JSONSerializer()
+
+def available_serializers() -> Dict[str, bool]:
+    """Report which serializers can be used in this environment."""
+    return {
+        "json": True,
+        "orjson": orjson is not None,
+        "msgpack": msgpack is not None,
+    }
+
+def get_serializer(name: Optional[str] = None) -> Serializer:
+    """
+    Get a serializer by name.
+
+    Args:
+        name: "json", "orjson" or "msgpack"; when omitted the fastest
+            available binary-friendly format is chosen (msgpack, then
+            orjson, then the stdlib JSON fallback)
+
+    Returns:
+        Serializer: The serializer instance
+
+    Raises:
+        KeyError: If the name is unknown
+        ImportError: If the requested optional dependency is missing
+    """
+    if name is not None:
+        if name not in _SERIALIZERS:
+            raise KeyError(f"Unknown serializer: {name}")
+        return _SERIALIZERS[name]()
+    if msgpack is not None:
+        return MsgpackSerializer()
+    if orjson is not None:
+        return OrjsonSerializer()
+    return JSONSerializer()
+
+def canonical_json(obj: Any) -> str:
+    """Serialize an object to compact JSON with consistently ordered keys."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_to_builtin, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return _canonical_json.dumps(obj).decode("utf-8")
+
+def to_prompt_text(data: Any) -> str:
+    """
+    Render an agent payload for inclusion in an LLM prompt.
+
+    Strings are passed through unchanged; everything else becomes compact
+    canonical JSON, which is shorter and cheaper to build than ``str()``.
+    """
+    if isinstance(data, str):
+        return data
+    return canonical_json(data)
+
+def cache_key(obj: Any) -> str:
+    """Stable SHA-256 key for an object, independent of dict ordering."""
+    return hashlib.sha256(canonical_json(obj).encode("utf-8")).hexdigest()
+
+def file_stem(name: str, key: Any = None) -> str:
+    """
+    File name stem for an arbitrary id: the id with unsafe characters
+    replaced, plus a short hash of ``key`` (the id itself by default), so
+    ids that sanitize alike still get distinct files.
+    """
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "-", name)[:80]
+    return f"{safe}-{cache_key(name if key is None else key)[:12]}"
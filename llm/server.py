@@ -0,0 +1,713 @@
+"""
+ASGI service behind the live-assist, sparring-arena and transcript pages.
+
+    python -m llm.server --port 8080
+    uvicorn llm.server:create_app --factory --port 8080
+
+The application is plain ASGI, so any ASGI server can run it; ``main``
+uses uvicorn, which must be installed separately (``pip install uvicorn``).
+"""
+import json
+import time
+import uuid
+import asyncio
+import logging
+import argparse
+import threading
+import contextvars
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from .llm_client import LLMClient, ConversationManager
+from .metrics import metrics
+from .serialization import canonical_json
+from .deadlines import AdmissionController, DeadlineExceeded, LoadShedError
+from .lanes import INTERACTIVE, BATCH, LaneScheduler, lane_scope
+from .prompts.prompt_manager import PromptTemplateManager, FileBasedPromptManager
+from .voice.whisper_client import WhisperClient
+from .voice.voice_llm_orchestrator import VoiceLLMConfig
+from .voice.sessions import MultiSessionVoiceOrchestrator, SessionConfig
+from .agents.map_reduce import MapReduceAnalyzer, AnalysisCache
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = Path(__file__).parent / "prompts" / "templates"
+
+Put = Callable[[Any], None]
+Producer = Callable[[Put], None]
+
+@dataclass
+class ServiceConfig:
+    """Configuration for the pipeline service."""
+    max_connections: int = 256  # open WebSockets plus HTTP requests being served
+    max_inflight: int = 32  # blocking operations (turns, analyses, sessions) running at once
+    max_batch_inflight: Optional[int] = None  # of those, analyses at once; None is half, keeping the rest for live traffic
+    queue_timeout: float = 5.0  # seconds an operation may wait for a slot before it is shed
+    send_queue_size: int = 64  # events buffered per stream before the producer waits for the client
+    max_pending_turns: int = 2  # voice turns queued per connection before reading from it pauses
+    max_utterance_seconds: float = 120.0  # audio buffered per voice turn
+    partial_interval: float = 2.0  # seconds of new audio between partial transcripts; 0 disables them
+    max_body_bytes: int = 8 * 1024 * 1024  # HTTP request body limit
+    max_sparring_turns: int = 20
+    preload_whisper: bool = False  # load the Whisper model at startup instead of on the first turn
+
+class _StreamClosed(Exception):
+    """Raised in a producer thread when its consumer has gone away."""
+    pass
+
+class _RequestError(Exception):
+    """An HTTP request that is answered with an error status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+@dataclass
+class _Failure:
+    error: BaseException
+
+_END = object()
+_MAX_SAMPLE_RATE = 192000
+
+class _Stream:
+    """
+    Events produced on a worker thread and delivered on the event loop.
+
+    The queue is bounded: when the client reads slower than the model
+    produces, ``put`` blocks the producer thread instead of buffering.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, size: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(size)
+        self.stopped = threading.Event()
+
+    def put(self, item: Any) -> None:
+        """Hand an event to the consumer (worker thread side)."""
+        if self.stopped.is_set():
+            raise _StreamClosed()
+        future = asyncio.run_coroutine_threadsafe(self.queue.put(item), self.loop)
+        while True:
+            try:
+                future.result(timeout=0.25)
+                return
+            except concurrent.futures.TimeoutError:
+                if self.stopped.is_set():
+                    future.cancel()
+                    raise _StreamClosed()
+
+    def run(self, produce: Producer) -> None:
+        """Run a producer to completion (worker thread side)."""
+        try:
+            produce(self.put)
+            self.put(_END)
+        except _StreamClosed:
+            pass
+        except Exception as e:
+            try:
+                self.put(_Failure(e))
+            except _StreamClosed:
+                pass
+
+    async def drain(self, emit: Callable[[Any], Awaitable[None]]) -> None:
+        """
+        Await ``emit`` for every event until the producer finishes.
+
+        Raises:
+            Exception: Whatever the producer raised
+        """
+        try:
+            while True:
+                item = await self.queue.get()
+                if item is _END:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                await emit(item)
+        finally:
+            self.stopped.set()
+
+class PipelineService:
+    """
+    ASGI application serving the voice pipeline, sparring and transcript analysis.
+
+    One instance shares the Whisper model, the LLM client (with its
+    connection pool and request coalescing), the prompt manager and the
+    analysis cache across every connection; each voice connection is a
+    session of one ``MultiSessionVoiceOrchestrator``. Blocking model calls run on a
+    pool of ``max_inflight`` threads, and their output streams back through
+    a bounded queue per stream, so a slow client only slows its own
+    producer. Connections beyond ``max_connections``, and operations that
+    get no worker slot within ``queue_timeout``, are refused rather than
+    queued without bound.
+
+    Routes:
+        ``WS /voice``: live assist. Binary frames are 16-bit mono PCM at
+            ``?sample_rate=`` (16000 by default; an invalid rate closes the
+            socket with code 1008); reconnecting with the same
+            ``?session_id=`` continues the conversation. Text frames are JSON
+            commands ``{"type": "end"}`` (answer the audio so far),
+            ``{"type": "text", "text": ...}`` and ``{"type": "reset"}``.
+            Replies are ``session`` (on connect), ``partial_transcript``,
+            ``transcript``, ``token``, ``response`` and ``error`` events.
+        ``POST /sparring``: dual-agent role-play, streamed as ``turn``
+            events and a final ``sparring_result`` (NDJSON).
+        ``POST /analysis``: transcript analysis, streamed as
+            ``partial_analysis`` events and a final ``analysis_result``
+            (NDJSON); a ``call_id`` in the request indexes the result.
+        ``GET /search?q=``: full-text search over indexed transcripts and
+            analyses (see ``TranscriptIndex``), with ``limit`` and any other
+            parameter, e.g. ``rep_id``, as a metadata filter.
+        ``GET /health`` and ``GET /metrics``.
+    """
+
+    def __init__(
+        self,
+        llm_client: Optional[Any] = None,
+        whisper_client: Optional[WhisperClient] = None,
+        prompt_manager: Optional[PromptTemplateManager] = None,
+        config: Optional[ServiceConfig] = None,
+        voice_config: Optional[VoiceLLMConfig] = None,
+        session_config: Optional[SessionConfig] = None,
+        admission: Optional[AdmissionController] = None,
+        memory: Optional[Any] = None,
+        analysis_cache: Optional[AnalysisCache] = None,
+        search_index: Optional[Any] = None
+    ):
+        """
+        Args:
+            llm_client: Shared client (or router, or cascade); built from
+                ``voice_config.llm_config`` if omitted
+            whisper_client: Shared Whisper client; built from
+                ``voice_config.whisper_config`` if omitted
+            prompt_manager: Prompt templates; the bundled ones if omitted
+            config: Service limits
+            voice_config: Voice pipeline configuration used by every connection
+            session_config: Limits on voice sessions (count, idle time, history)
+            admission: Admission controller for voice turns (see ``VoiceLLMOrchestrator``)
+            memory: Coaching memory index shared by every connection
+            analysis_cache: Cache of analysis chunk results
+            search_index: ``TranscriptIndex`` behind ``/search``; also given
+                to the Whisper client built when ``whisper_client`` is omitted
+        """
+        self.config = config or ServiceConfig()
+        self.voice_config = voice_config or VoiceLLMConfig()
+        self.llm_client = llm_client or LLMClient(self.voice_config.llm_config)
+        self.whisper_client = whisper_client or WhisperClient(
+            self.voice_config.whisper_config,
+            search_index=search_index
+        )
+        self.search_index = search_index
+        self.prompt_manager = prompt_manager or FileBasedPromptManager(str(TEMPLATES_DIR))
+        self.admission = admission
+        self.memory = memory
+        self.sessions = MultiSessionVoiceOrchestrator(
+            self.prompt_manager,
+            self.voice_config,
+            session_config,
+            admission=admission,
+            memory=memory,
+            llm_client=self.llm_client,
+            whisper_client=self.whisper_client
+        )
+        self.analyzer = MapReduceAnalyzer(self.llm_client, cache=analysis_cache)
+        self.conversations = ConversationManager(self.llm_client)
+        self.connections = 0
+        self._executor = ThreadPoolExecutor(max_workers=self.config.max_inflight, thread_name_prefix="pipeline")
+        self._slots = asyncio.Semaphore(self.config.max_inflight)
+        batch_slots = self.config.max_batch_inflight
+        if batch_slots is None:
+            batch_slots = max(1, self.config.max_inflight // 2)
+        self._lane_slots = {BATCH: asyncio.Semaphore(batch_slots)}
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "websocket":
+            await self._websocket(scope, receive, send)
+        elif scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+
+    def close(self) -> None:
+        """Release the worker threads and flush the search index."""
+        self._executor.shutdown(wait=False)
+        if self.search_index is not None:
+            self.search_index.close()
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if self.config.preload_whisper:
+                    await asyncio.get_running_loop().run_in_executor(self._executor, lambda: self.whisper_client.model)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def open_stream(self, produce: Producer, lane: str = INTERACTIVE) -> _Stream:
+        """
+        Start ``produce(put)`` on the worker pool once a slot is free.
+
+        The producer runs in a copy of the caller's context, inside
+        ``lane_scope(lane)`` so the LLM and Whisper clients queue its calls
+        in that lane, and calls ``put`` for every event; read them with
+        ``drain``. Batch work takes at most ``max_batch_inflight`` worker
+        slots.
+
+        Raises:
+            LoadShedError: If no slot frees up within ``queue_timeout``
+        """
+        lane_slots = self._lane_slots.get(lane)
+        deadline = time.monotonic() + self.config.queue_timeout
+        try:
+            if lane_slots is not None:
+                await asyncio.wait_for(lane_slots.acquire(), self.config.queue_timeout)
+            try:
+                await asyncio.wait_for(self._slots.acquire(), max(0.0, deadline - time.monotonic()))
+            except BaseException:
+                if lane_slots is not None:
+                    lane_slots.release()
+                raise
+        except asyncio.TimeoutError:
+            metrics.inc("server_shed_total", labels={"reason": "no_slot"})
+            raise LoadShedError(f"No worker slot became free within {self.config.queue_timeout}s") from None
+        loop = asyncio.get_running_loop()
+        stream = _Stream(loop, self.config.send_queue_size)
+        context = contextvars.copy_context()
+
+        def run() -> None:
+            with lane_scope(lane):
+                stream.run(produce)
+
+        def release(_: Any) -> None:
+            self._slots.release()
+            if lane_slots is not None:
+                lane_slots.release()
+
+        future = loop.run_in_executor(self._executor, context.run, run)
+        future.add_done_callback(release)
+        return stream
+
+    # HTTP
+
+    async def _http(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        route = (scope["method"], scope["path"])
+        if route == ("GET", "/health"):
+            await _send_json(send, 200, {"status": "ok", "connections": self.connections})
+            return
+        if route == ("GET", "/metrics"):
+            await _send_body(send, 200, metrics.render_prometheus().encode("utf-8"), b"text/plain; version=0.0.4")
+            return
+        if route == ("GET", "/search"):
+            await self._search(scope, send)
+            return
+        handlers = {
+            ("POST", "/sparring"): (self._sparring, INTERACTIVE),
+            ("POST", "/analysis"): (self._analysis, BATCH)
+        }
+        handler, lane = handlers.get(route, (None, None))
+        if handler is None:
+            await _send_json(send, 404, {"error": f"No route for {route[0]} {route[1]}"})
+            return
+        if self.connections >= self.config.max_connections:
+            metrics.inc("server_shed_total", labels={"reason": "connections"})
+            await _send_json(send, 503, {"error": "Too many connections"}, [(b"retry-after", b"1")])
+            return
+
+        self.connections += 1
+        try:
+            try:
+                request = _parse_json(await self._read_body(receive))
+                stream = await self.open_stream(handler(request), lane)
+            except _RequestError as e:
+                await _send_json(send, e.status, {"error": str(e)})
+                return
+            except (KeyError, ValueError, TypeError) as e:
+                await _send_json(send, 400, {"error": f"Invalid request: {e}"})
+                return
+            except LoadShedError as e:
+                await _send_json(send, 503, {"error": str(e)}, [(b"retry-after", b"1")])
+                return
+            await self._stream_ndjson(stream, receive, send, route[1])
+        finally:
+            self.connections -= 1
+
+    async def _read_body(self, receive: Callable) -> bytes:
+        chunks: List[bytes] = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise _RequestError(499, "Client disconnected")
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.config.max_body_bytes:
+                raise _RequestError(413, f"Request body exceeds {self.config.max_body_bytes} bytes")
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    async def _stream_ndjson(self, stream: _Stream, receive: Callable, send: Callable, path: str) -> None:
+        """Stream events as newline-delimited JSON until done or the client disconnects."""
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/x-ndjson"), (b"cache-control", b"no-cache")]
+        })
+
+        async def emit(event: Dict[str, Any]) -> None:
+            await send({"type": "http.response.body", "body": _ndjson(event), "more_body": True})
+
+        async def watch_disconnect() -> None:
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        start = time.perf_counter()
+        draining = asyncio.ensure_future(stream.drain(emit))
+        watcher = asyncio.ensure_future(watch_disconnect())
+        await asyncio.wait({draining, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        watcher.cancel()
+        if not draining.done():
+            metrics.inc("server_disconnects_total", labels={"route": path})
+            draining.cancel()
+            return
+        error = draining.exception()
+        if error is not None:
+            logger.error("Streaming %s failed: %s", path, error)
+            await emit({"type": "error", "error": str(error), "code": _error_code(error)})
+        metrics.observe("server_request_seconds", time.perf_counter() - start, {"route": path})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    def _sparring(self, request: Dict[str, Any]) -> Producer:
+        rep_prompt, buyer_prompt = request["rep_prompt"], request["buyer_prompt"]
+        initial_message = request["initial_message"]
+        turns = int(request.get("turns", 5))
+        if not 0 < turns <= self.config.max_sparring_turns:
+            raise ValueError(f"turns must be between 1 and {self.config.max_sparring_turns}")
+
+        def produce(put: Put) -> None:
+            transcript = self.conversations.run_dual_agents(
+                rep_prompt, buyer_prompt, initial_message, turns,
+                on_turn=lambda entry: put({"type": "turn", **entry})
+            )
+            put({"type": "sparring_result", "transcript": transcript})
+        return produce
+
+    def _analysis(self, request: Dict[str, Any]) -> Producer:
+        data = request["data"]
+        analysis_type = str(request.get("analysis_type", "general"))
+        call_id = request.get("call_id")
+
+        def produce(put: Put) -> None:
+            for item in self.analyzer.stream(data, analysis_type):
+                if item["type"] == "analysis_result" and call_id is not None and self.search_index is not None:
+                    try:
+                        self.search_index.add_analysis(str(call_id), item, request.get("metadata"))
+                    except Exception as e:
+                        metrics.inc("search_index_errors_total", labels={"source": "analysis"})
+                        logger.error("Error indexing analysis of %s: %s", call_id, e)
+                put(item)
+        return produce
+
+    async def _search(self, scope: Dict[str, Any], send: Callable) -> None:
+        if self.search_index is None:
+            await _send_json(send, 404, {"error": "Search is not enabled"})
+            return
+        query = {key: values[0] for key, values in parse_qs(scope.get("query_string", b"").decode("utf-8")).items()}
+        try:
+            limit = min(max(int(query.pop("limit", 20)), 1), 100)
+        except ValueError:
+            await _send_json(send, 400, {"error": "limit must be an integer"})
+            return
+        text = query.pop("q", "")
+        start = time.perf_counter()
+        hits = await asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            lambda: self.search_index.search(text, limit, where=query)
+        )
+        metrics.observe("server_request_seconds", time.perf_counter() - start, {"route": "/search"})
+        await _send_json(send, 200, {"query": text, "hits": hits})
+
+    # WebSocket
+
+    async def _websocket(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if (await receive())["type"] != "websocket.connect":
+            return
+        if scope["path"] != "/voice":
+            await send({"type": "websocket.close", "code": 1008})
+            return
+        if self.connections >= self.config.max_connections:
+            metrics.inc("server_shed_total", labels={"reason": "connections"})
+            await send({"type": "websocket.close", "code": 1013})  # try again later
+            return
+
+        try:
+            connection = _VoiceConnection(self, scope, send)
+        except ValueError as e:
+            logger.warning("Rejected voice connection: %s", e)
+            await send({"type": "websocket.close", "code": 1008})  # policy violation
+            return
+
+        self.connections += 1
+        try:
+            await send({"type": "websocket.accept"})
+            await connection.send_event({"type": "session", "session_id": connection.session_id})
+            await connection.serve(receive)
+        finally:
+            self.connections -= 1
+
+class _VoiceConnection:
+    """
+    One live-assist WebSocket.
+
+    Holds the audio of the utterance being spoken and a bounded queue of
+    pending turns; the conversation lives in the service's session store,
+    so it survives a reconnect until the session idles out. Turns run one at a time so
+    the conversation stays ordered; when the queue is full the connection
+    stops reading, which pushes back on the client through the socket.
+    """
+
+    def __init__(self, service: PipelineService, scope: Dict[str, Any], send: Callable):
+        from .voice.audio import SAMPLE_RATE
+
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        self.service = service
+        self.send = send
+        try:
+            self.sample_rate = int(query.get("sample_rate", [SAMPLE_RATE])[0])
+        except ValueError:
+            self.sample_rate = 0
+        if not 0 < self.sample_rate <= _MAX_SAMPLE_RATE:
+            raise ValueError(f"Invalid sample_rate: {query.get('sample_rate', [''])[0]!r}")
+        self.template = query.get("template", [None])[0]
+        self.session_id = query.get("session_id", [None])[0] or uuid.uuid4().hex
+        self.audio = bytearray()
+        self.utterance = 0  # bumped when the buffered audio is taken for a turn
+        self.partial_from = 0  # buffered bytes when the last partial transcript started
+        self.partial: Optional[asyncio.Future] = None
+        self.turns: asyncio.Queue = asyncio.Queue(service.config.max_pending_turns)
+
+    async def send_event(self, event: Dict[str, Any]) -> None:
+        await self.send({"type": "websocket.send", "text": canonical_json(event)})
+
+    async def serve(self, receive: Callable) -> None:
+        worker = asyncio.ensure_future(self._run_turns())
+        try:
+            while True:
+                message = await receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    await self._on_audio(message["bytes"])
+                elif message.get("text") is not None:
+                    await self._on_command(message["text"])
+        finally:
+            worker.cancel()
+            if self.partial is not None:
+                self.partial.cancel()
+
+    async def _on_audio(self, data: bytes) -> None:
+        limit = int(self.service.config.max_utterance_seconds * self.sample_rate) * 2
+        if len(self.audio) + len(data) > limit:
+            self._take_audio()
+            await self.send_event({"type": "error", "error": "Utterance too long", "code": "too_long"})
+            return
+        self.audio += data
+        interval_bytes = int(self.service.config.partial_interval * self.sample_rate) * 2
+        if (
+            interval_bytes
+            and len(self.audio) - self.partial_from >= interval_bytes
+            and (self.partial is None or self.partial.done())
+            and not self.service._slots.locked()  # partials are best effort: skip them under load
+        ):
+            self.partial_from = len(self.audio)
+            self.partial = asyncio.ensure_future(self._send_partial(self.utterance, bytes(self.audio)))
+
+    async def _on_command(self, text: str) -> None:
+        try:
+            command = _parse_json(text)
+            kind = command["type"]
+        except (KeyError, TypeError, ValueError):
+            await self.send_event({"type": "error", "error": "Commands are JSON objects with a type", "code": "bad_request"})
+            return
+        template = command.get("template") or self.template
+        if kind == "end":
+            if not self.audio:
+                await self.send_event({"type": "error", "error": "No audio received", "code": "bad_request"})
+                return
+            await self.turns.put(("audio", self._take_audio(), template))
+        elif kind == "text":
+            await self.turns.put(("text", str(command.get("text", "")), template))
+        elif kind == "reset":
+            await self.turns.put(("reset", None, None))
+        else:
+            await self.send_event({"type": "error", "error": f"Unknown command: {kind}", "code": "bad_request"})
+
+    def _take_audio(self) -> bytes:
+        data = bytes(self.audio)
+        self.audio.clear()
+        self.partial_from = 0
+        self.utterance += 1
+        return data
+
+    async def _send_partial(self, utterance: int, data: bytes) -> None:
+        from .voice.audio import pcm16_to_samples
+
+        def transcribe(put: Put) -> None:
+            put(self.service.whisper_client.transcribe_samples(pcm16_to_samples(data, self.sample_rate))["text"])
+
+        try:
+            stream = await self.service.open_stream(transcribe)
+            texts: List[str] = []
+
+            async def collect(text: str) -> None:
+                texts.append(text)
+            await stream.drain(collect)
+        except Exception as e:
+            logger.debug("Partial transcript skipped: %s", e)
+            return
+        if texts and utterance == self.utterance:  # drop partials of an utterance already answered
+            await self.send_event({"type": "partial_transcript", "text": texts[0]})
+
+    async def _run_turns(self) -> None:
+        while True:
+            kind, payload, template = await self.turns.get()
+            try:
+                await self._turn(kind, payload, template)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Voice turn failed: %s", e)
+
+    async def _turn(self, kind: str, payload: Any, template: Optional[str]) -> None:
+        if kind == "reset":
+            self.service.sessions.clear_conversation_history(self.session_id)
+            await self.send_event({"type": "reset"})
+            return
+
+        start = time.perf_counter()
+        first_token: List[float] = []
+
+        async def emit(event: Dict[str, Any]) -> None:
+            if event["type"] == "token" and not first_token:
+                first_token.append(time.perf_counter() - start)
+                metrics.observe("server_first_token_seconds", first_token[0], {"kind": kind})
+            await self.send_event(event)
+
+        try:
+            stream = await self.service.open_stream(lambda put: self._produce_turn(put, kind, payload, template))
+            await stream.drain(emit)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self.send_event({"type": "error", "error": str(e), "code": _error_code(e)})
+            return
+        metrics.observe("server_turn_seconds", time.perf_counter() - start, {"kind": kind})
+
+    def _produce_turn(self, put: Put, kind: str, payload: Any, template: Optional[str]) -> None:
+        """Transcribe (for audio) and answer one turn on a worker thread."""
+        from .voice.audio import pcm16_to_samples
+
+        sessions = self.service.sessions
+        with sessions.turn_scope() as degraded:
+            if kind == "audio":
+                result = self.service.whisper_client.transcribe_samples(pcm16_to_samples(payload, self.sample_rate))
+                text = result["text"]
+                put({
+                    "type": "transcript",
+                    "text": text,
+                    "segments": [
+                        {"start": s["start"], "end": s["end"], "text": s["text"].strip()}
+                        for s in result.get("segments", [])
+                    ]
+                })
+            else:
+                text = payload
+            pieces: List[str] = []
+            for token in sessions.stream_text(self.session_id, text, template, degraded):
+                pieces.append(token)
+                put({"type": "token", "text": token})
+            put({"type": "response", "text": "".join(pieces), "degraded": degraded})
+
+def _parse_json(data: Any) -> Any:
+    """Parse a JSON request body or command; an empty body is an empty object."""
+    return json.loads(data) if data else {}
+
+def _ndjson(event: Dict[str, Any]) -> bytes:
+    return (canonical_json(event) + "\n").encode("utf-8")
+
+def _error_code(error: BaseException) -> str:
+    if isinstance(error, LoadShedError):
+        return "overloaded"
+    if isinstance(error, DeadlineExceeded):
+        return "deadline_exceeded"
+    return "internal"
+
+async def _send_body(send: Callable, status: int, body: bytes, content_type: bytes, headers: List[Tuple[bytes, bytes]] = ()) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode()), *headers]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+async def _send_json(send: Callable, status: int, body: Dict[str, Any], headers: List[Tuple[bytes, bytes]] = ()) -> None:
+    await _send_body(send, status, canonical_json(body).encode("utf-8"), b"application/json", headers)
+
+def create_app(**kwargs: Any) -> PipelineService:
+    """Build the service; for ``uvicorn llm.server:create_app --factory``."""
+    return PipelineService(**kwargs)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from .voice.whisper_client import WhisperConfig
+
+    parser = argparse.ArgumentParser(description="Serve the voice, sparring and analysis pipelines over ASGI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--whisper-model", default="base")
+    parser.add_argument("--whisper-backend", default="openai",
+                        help='"fake" serves the benchmark stand-in, for load tests without model weights')
+    parser.add_argument("--max-connections", type=int, default=256)
+    parser.add_argument("--max-inflight", type=int, default=32)
+    parser.add_argument("--llm-concurrency", type=int, default=16,
+                        help="upstream LLM calls at once, split between the interactive and batch lanes")
+    parser.add_argument("--preload-whisper", action="store_true")
+    parser.add_argument("--search-index", help="directory of the transcript search index; enables /search")
+    args = parser.parse_args(argv)
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("Serving needs an ASGI server: pip install uvicorn")
+
+    logging.basicConfig(level=logging.INFO)
+    search_index = None
+    if args.search_index:
+        from .transcript_index import TranscriptIndex
+        search_index = TranscriptIndex(args.search_index)
+    whisper_config = WhisperConfig(model_name=args.whisper_model, backend=args.whisper_backend)
+    app = PipelineService(
+        llm_client=LLMClient(lanes=LaneScheduler.standard(args.llm_concurrency, name="llm")),
+        whisper_client=WhisperClient(
+            whisper_config,
+            lanes=LaneScheduler.standard(max(1, whisper_config.num_workers), name="whisper"),
+            search_index=search_index
+        ),
+        config=ServiceConfig(
+            max_connections=args.max_connections,
+            max_inflight=args.max_inflight,
+            preload_whisper=args.preload_whisper
+        ),
+        voice_config=VoiceLLMConfig(whisper_config=whisper_config),
+        search_index=search_index
+    )
+    uvicorn.run(app, host=args.host, port=args.port, ws_max_size=1024 * 1024)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import random
+
+import numpy as np
+import pytest
+
+from llm.aggregates import StatsAggregator
+
+def _brute_top(scores, n, metric, min_count):
+    values = {}
+    for key, history in scores.items():
+        if len(history) >= max(1, min_count):
+            values[key] = {
+                "mean": sum(history) / len(history),
+                "total": sum(history),
+                "count": len(history),
+                "last": history[-1]
+            }[metric]
+    return sorted(values.values(), reverse=True)[:n]
+
+def test_summary_and_windowed_percentiles():
+    stats = StatsAggregator(window=4, initial_capacity=1)
+    for score in [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]:
+        stats.record("a", score)
+    stats.record("b", 10.0)
+    summary = stats.summary("a")
+    assert summary["count"] == 6 and summary["mean"] == 3.5
+    assert summary["stddev"] == pytest.approx(np.std([1, 2, 3, 4, 5, 6]))
+    assert (summary["min"], summary["max"], summary["last"]) == (1.0, 6.0, 6.0)
+    # Percentiles only see the last ``window`` scores
+    assert stats.percentile("a", 50) == 4.5
+    assert stats.percentiles(50) == {"a": 4.5, "b": 10.0}
+    assert stats.summary("missing") == {"count": 0}
+    assert stats.percentile("missing", 50) is None
+
+def test_cached_leaderboards_match_a_full_rescan():
+    rng = random.Random(3)
+    stats = StatsAggregator(window=8, initial_capacity=4)
+    scores = {}
+    for step in range(3000):
+        key = f"k{rng.randrange(40)}"
+        if rng.random() < 0.03 and key in scores:
+            stats.remove(key)
+            del scores[key]
+        else:
+            score = rng.uniform(-1, 1) if rng.random() < 0.5 else rng.randrange(5)
+            stats.record(key, score)
+            scores.setdefault(key, []).append(score)
+        if step % 7 == 0:
+            metric = rng.choice(StatsAggregator.RANKABLE)
+            n, min_count = rng.choice([1, 3, 10, 50]), rng.choice([0, 1, 5])
+            top = stats.top(n, metric, min_count)
+            assert [value for _, value in top] == pytest.approx(_brute_top(scores, n, metric, min_count))
+            assert all(stats._value(metric, stats._index[key]) == value for key, value in top)
+
+def test_update_outside_leaderboard_keeps_cache():
+    stats = StatsAggregator()
+    for key, score in [("a", 5.0), ("b", 4.0), ("c", 1.0)]:
+        stats.record(key, score)
+    assert stats.top(2) == [("a", 5.0), ("b", 4.0)]
+    stats.record("c", 0.0)
+    assert ("mean", 2, 1) in stats._top_cache
+    stats.record("c", 29.0)
+    assert ("mean", 2, 1) not in stats._top_cache
+    assert stats.top(2) == [("c", 10.0), ("a", 5.0)]
+
+def test_removed_rows_are_reused():
+    stats = StatsAggregator(initial_capacity=2)
+    stats.record("a", 1.0)
+    stats.record("b", 2.0)
+    stats.remove("a")
+    assert "a" not in stats and len(stats) == 1
+    stats.record("c", 3.0)
+    assert stats._index["c"] == 0
+    assert stats.summary("c")["count"] == 1
+    assert stats.top(5) == [("c", 3.0), ("b", 2.0)]
+
+def test_percentile_leaderboard_and_unknown_metric():
+    stats = StatsAggregator()
+    for key, scores in {"a": [1, 9], "b": [5, 5], "c": [7]}.items():
+        for score in scores:
+            stats.record(key, score)
+    assert sorted(stats.top(5, "p50", min_count=2)) == [("a", 5.0), ("b", 5.0)]
+    assert stats.top(1, "p90") == [("a", 8.2)]
+    with pytest.raises(ValueError):
+        stats.top(1, "median")
+
+def test_save_and_load_round_trip(tmp_path):
+    stats = StatsAggregator(window=3)
+    for i in range(10):
+        stats.record(f"k{i % 4}", float(i))
+    stats.remove("k1")
+    path = str(tmp_path / "stats")
+    stats.save(path)
+    loaded = StatsAggregator.load(path)
+    assert sorted(loaded.keys()) == ["k0", "k2", "k3"]
+    assert loaded.window == 3
+    for key in loaded.keys():
+        assert loaded.summary(key) == stats.summary(key)
+    assert loaded.top(3) == stats.top(3)
+    # The removed key's row is free for reuse after loading
+    loaded.record("new", 100.0)
+    assert loaded._index["new"] == 1
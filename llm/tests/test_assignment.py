@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from llm.agents.assignment import AcceptanceCache, balanced_assignment, score_matrix
+
+def _agent(agent_id, capabilities, refuses=()):
+    agent = SimpleNamespace(
+        id=agent_id,
+        capabilities=[SimpleNamespace(name=name, confidence=1.0) for name in capabilities],
+        state=SimpleNamespace(performance_metrics={}),
+        asked=[]
+    )
+
+    def can_handle_task(task):
+        agent.asked.append(tuple(task["required_capabilities"]))
+        return not set(task["required_capabilities"]) & set(refuses)
+
+    agent.can_handle_task = can_handle_task
+    return agent
+
+def test_ineligible_task_is_unassigned():
+    scores = np.array([[1.0, 0.0], [2.0, 0.0]])
+    assert balanced_assignment(scores).tolist()[1] == -1
+
+def test_equal_scores_spread_evenly():
+    assignment = balanced_assignment(np.ones((3, 1)), kinds=np.zeros(9, dtype=np.int64))
+    assert np.bincount(assignment, minlength=3).tolist() == [3, 3, 3]
+
+def test_existing_load_is_counted():
+    assignment = balanced_assignment(np.ones((2, 1)), kinds=np.zeros(4, dtype=np.int64), load=np.array([4, 0]))
+    assert assignment.tolist() == [1, 1, 1, 1]
+
+def test_better_agent_preferred_until_levels_even():
+    scores = np.array([[2.0], [1.0]])
+    assignment = balanced_assignment(scores, kinds=np.zeros(4, dtype=np.int64))
+    assert np.bincount(assignment, minlength=2).tolist() == [2, 2]
+    assert balanced_assignment(scores, kinds=np.zeros(1, dtype=np.int64)).tolist() == [0]
+
+def test_higher_priority_wins_contested_agent():
+    scores = np.array([[2.0, 2.0], [1.0, 0.0]])
+    assignment = balanced_assignment(scores, kinds=np.array([0, 0]), priority=np.array([1.0, 5.0]))
+    assert assignment.tolist() == [1, 0]
+
+def test_level_rises_when_only_full_agents_fit():
+    # The specialist must take every task of its kind, past the common level
+    scores = np.array([[1.0, 1.0], [1.0, 0.0]])
+    assignment = balanced_assignment(scores, kinds=np.array([1, 1, 1, 0]))
+    assert assignment.tolist() == [0, 0, 0, 1]
+
+def test_score_matrix_masks_refusals_and_caches_answers():
+    agents = [_agent("a", ["code", "review"], refuses=["review"]), _agent("b", ["review"])]
+    tasks = [SimpleNamespace(required_capabilities=caps) for caps in (["code"], ["review"], ["review"])]
+    cache = AcceptanceCache()
+    scores, kinds = score_matrix(agents, tasks, accepts=cache)
+    assert kinds.tolist() == [0, 1, 1]
+    assert scores.tolist() == [[1.0, 0.0], [0.0, 1.0]]
+    score_matrix(agents, tasks, accepts=cache)
+    assert agents[0].asked == [("code",), ("review",)]
+    # Agent "b" never scores on "code", so it is not asked about it
+    assert agents[1].asked == [("review",)]
+    cache.forget("a")
+    score_matrix(agents, tasks, accepts=cache)
+    assert len(agents[0].asked) == 4
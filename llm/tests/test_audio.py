@@ -0,0 +1,42 @@
+import math
+import struct
+import wave
+
+import pytest
+
+from llm.voice.audio import WavFile
+from llm.voice.whisper_client import WhisperConfig
+
+def _write_wav(path, seconds, sample_rate=16000, silent=lambda t: False):
+    frames = bytearray()
+    for i in range(int(seconds * sample_rate)):
+        t = i / sample_rate
+        amplitude = 0 if silent(t) else 8000
+        frames += struct.pack("<h", int(amplitude * math.sin(2 * math.pi * 220 * t)))
+    with wave.open(str(path), "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        out.writeframes(bytes(frames))
+    return WavFile(str(path))
+
+def test_split_at_silence_cuts_in_pauses(tmp_path):
+    wav = _write_wav(tmp_path / "a.wav", 30, silent=lambda t: t % 10 > 9.5)
+    boundaries = wav.split_at_silence(10, 2)
+    assert boundaries[0] == 0.0 and boundaries[-1] == wav.duration
+    assert all(9.5 < cut % 10 for cut in boundaries[1:-1])
+
+@pytest.mark.parametrize("chunk_seconds,search_seconds", [(2, 5), (1, 1), (3, 0)])
+def test_split_at_silence_always_advances(tmp_path, chunk_seconds, search_seconds):
+    # Silence at the very start pulls every search window back towards it
+    wav = _write_wav(tmp_path / "b.wav", 20, sample_rate=8000, silent=lambda t: t < 0.5)
+    boundaries = wav.split_at_silence(chunk_seconds, search_seconds)
+    assert boundaries[0] == 0.0 and boundaries[-1] == wav.duration
+    assert all(a < b for a, b in zip(boundaries, boundaries[1:]))
+
+def test_config_rejects_search_window_as_long_as_chunks():
+    with pytest.raises(ValueError):
+        WhisperConfig(chunk_seconds=2.0, chunk_search_seconds=5.0)
+    with pytest.raises(ValueError):
+        WhisperConfig(chunk_seconds=5.0, chunk_search_seconds=5.0)
+    assert WhisperConfig(chunk_search_seconds=30.0).chunk_seconds is None
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from llm.deadlines import DeadlineExceeded, deadline_scope
+from llm.lanes import lane_scope
+from llm.llm_client import LLMClient, LLMConfig
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+def _client(temperature=0.0, delay=0.1, **config):
+    client = LLMClient(LLMConfig(api_url="http://unused", api_key="key", model="model", temperature=temperature, **config))
+    client.upstream_calls = 0
+    lock = threading.Lock()
+
+    def call_upstream(payload):
+        with lock:
+            client.upstream_calls += 1
+            n = client.upstream_calls
+        time.sleep(delay)
+        return f"answer {n}"
+
+    client._call_upstream = call_upstream
+    return client
+
+def _concurrently(fn, n=8):
+    with ThreadPoolExecutor(n) as pool:
+        return list(pool.map(lambda _: fn(), range(n)))
+
+def test_identical_calls_share_one_upstream_call():
+    client = _client()
+    results = _concurrently(lambda: client.call_api(MESSAGES))
+    assert client.upstream_calls == 1
+    assert set(results) == {"answer 1"}
+    assert client.coalesced_calls == 7
+
+def test_sampled_calls_are_not_coalesced():
+    client = _client(temperature=0.7)
+    results = _concurrently(lambda: client.call_api(MESSAGES))
+    assert client.upstream_calls == 8
+    assert len(set(results)) == 8
+
+def test_coalescing_can_be_disabled():
+    client = _client(coalesce_requests=False)
+    _concurrently(lambda: client.call_api(MESSAGES))
+    assert client.upstream_calls == 8
+
+def test_different_lanes_do_not_share():
+    client = _client()
+
+    def call(lane):
+        with lane_scope(lane):
+            return client.call_api(MESSAGES)
+
+    with ThreadPoolExecutor(2) as pool:
+        list(pool.map(call, ["interactive", "batch"]))
+    assert client.upstream_calls == 2
+
+def test_follower_gives_up_at_its_own_deadline():
+    client = _client(delay=0.5)
+    leader = threading.Thread(target=client.call_api, args=(MESSAGES,))
+    leader.start()
+    time.sleep(0.05)
+    start = time.monotonic()
+    with deadline_scope(0.1), pytest.raises(DeadlineExceeded):
+        client.call_api(MESSAGES)
+    assert time.monotonic() - start < 0.4
+    leader.join()
+    assert client.upstream_calls == 1
+
+def test_follower_retries_when_leader_deadline_expires():
+    client = _client(delay=0.2)
+    errors = []
+
+    def leader():
+        try:
+            with deadline_scope(0.05):
+                client.call_api(MESSAGES)
+        except DeadlineExceeded as e:
+            errors.append(e)
+
+    original = client._call_upstream
+
+    def call_upstream(payload):
+        if client.upstream_calls == 0:
+            client.upstream_calls += 1
+            time.sleep(0.1)
+            raise DeadlineExceeded("leader's deadline")
+        return original(payload)
+
+    client._call_upstream = call_upstream
+    thread = threading.Thread(target=leader)
+    thread.start()
+    time.sleep(0.02)
+    assert client.call_api(MESSAGES) == "answer 2"
+    thread.join()
+    assert len(errors) == 1
+
+def test_async_calls_share_one_upstream_call():
+    client = _client()
+
+    async def main():
+        return await asyncio.gather(*(client.acall_api(MESSAGES) for _ in range(5)))
+
+    assert set(asyncio.run(main())) == {"answer 1"}
+    assert client.upstream_calls == 1
+
+def test_streams_share_one_upstream_stream():
+    client = _client()
+    started = threading.Event()
+    release = threading.Event()
+
+    def stream_upstream(payload):
+        client.upstream_calls += 1
+        yield "a"
+        started.set()
+        release.wait(2.0)
+        yield "b"
+        yield "c"
+
+    client._stream_upstream = stream_upstream
+    first = client.stream_api(MESSAGES)
+    assert next(first) == "a"
+    started.wait(2.0)
+    # A late joiner replays the tokens already streamed
+    second = client.stream_api(MESSAGES)
+    assert next(second) == "a"
+    release.set()
+    assert list(first) == ["b", "c"]
+    assert list(second) == ["b", "c"]
+    assert client.upstream_calls == 1
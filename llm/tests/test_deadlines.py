@@ -0,0 +1,80 @@
+import contextvars
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from llm.deadlines import (
+    AdmissionController, Deadline, DeadlineExceeded, LoadShedError,
+    clear_deadline, current_deadline, deadline_scope
+)
+from llm.llm_client import LLMClient, LLMConfig
+
+def test_tighter_deadline_wins_in_nested_scopes():
+    with deadline_scope(10.0) as outer:
+        with deadline_scope(60.0) as inner:
+            assert inner is outer
+        with deadline_scope(1.0) as inner:
+            assert inner is not outer and current_deadline() is inner
+        with deadline_scope(None) as inner:
+            assert inner is outer
+        assert current_deadline() is outer
+    assert current_deadline() is None
+
+def test_scope_accepts_datetime():
+    with deadline_scope(datetime.now() + timedelta(seconds=30)) as deadline:
+        assert 29 < deadline.remaining() <= 30
+
+def test_check_and_timeout():
+    Deadline.after(1.0).check()
+    expired = Deadline.after(-1.0)
+    with pytest.raises(DeadlineExceeded):
+        expired.check("stage")
+    assert expired.timeout(5.0) == 0.0
+    assert Deadline.after(100.0).timeout(5.0) == 5.0
+    assert Deadline.after(2.0).timeout() <= 2.0
+
+def test_deadline_follows_copied_context_into_threads():
+    seen = []
+    with deadline_scope(5.0) as deadline:
+        context = contextvars.copy_context()
+        thread = threading.Thread(target=context.run, args=(lambda: seen.append(current_deadline()),))
+    thread.start()
+    thread.join()
+    assert seen == [deadline]
+
+def test_clear_deadline_only_affects_its_context():
+    with deadline_scope(5.0) as deadline:
+        context = contextvars.copy_context()
+        context.run(clear_deadline)
+        assert context.run(current_deadline) is None
+        assert current_deadline() is deadline
+
+def test_client_refuses_request_without_time_left():
+    client = LLMClient(LLMConfig(api_url="http://unused", api_key="key", model="model", timeout=30.0))
+    assert client._request_timeout(None) == 30.0
+    assert client._request_timeout(Deadline.after(100.0)) == 30.0
+    assert client._request_timeout(Deadline.after(2.0)) <= 2.0
+    with pytest.raises(DeadlineExceeded):
+        client._request_timeout(Deadline.after(-0.1))
+
+def test_admission_accepts_degrades_and_sheds():
+    controller = AdmissionController(max_concurrency=2, initial_service_time=1.0, degraded_speedup=4.0)
+    assert controller.admit(None) == "accept"
+    assert controller.admit(Deadline.after(1.5)) == "accept"
+    controller.in_flight = 4  # two full waves ahead: projected 3s
+    assert controller.projected_latency() == 3.0
+    assert controller.admit(Deadline.after(1.0), degradable=True) == "degrade"
+    with pytest.raises(LoadShedError):
+        controller.admit(Deadline.after(1.0))
+    with pytest.raises(LoadShedError):
+        controller.admit(Deadline.after(0.5), degradable=True)
+
+def test_admission_tracks_service_time():
+    controller = AdmissionController(max_concurrency=1, initial_service_time=1.0, ewma_alpha=0.5)
+    with controller.track():
+        assert controller.in_flight == 1
+        time.sleep(0.01)
+    assert controller.in_flight == 0
+    assert 0.5 < controller.service_time < 0.6
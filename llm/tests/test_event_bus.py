@@ -0,0 +1,105 @@
+import threading
+import time
+
+import pytest
+
+from llm.agents.event_bus import EventBus, SubscriptionConfig
+
+class _Gated:
+    """Subscriber whose first delivery waits until the gate opens."""
+
+    def __init__(self):
+        self.received = []
+        self.first = threading.Event()
+        self.gate = threading.Event()
+
+    def __call__(self, source, event, data):
+        self.first.set()
+        self.gate.wait(5.0)
+        self.received.append(data)
+
+def _stalled(bus, **config):
+    subscriber = _Gated()
+    subscription = bus.subscribe(subscriber, config=SubscriptionConfig(coalesce_events=frozenset(), **config))
+    bus.publish("source", "message", 0)
+    assert subscriber.first.wait(2.0)
+    return subscriber, subscription
+
+@pytest.mark.parametrize("overflow,delivered", [
+    ("drop_oldest", [0, 2, 3]),
+    ("drop_newest", [0, 1, 2])
+])
+def test_overflow_drops(overflow, delivered):
+    bus = EventBus()
+    subscriber, subscription = _stalled(bus, max_queue=2, overflow=overflow)
+    for i in (1, 2, 3):
+        bus.publish("source", "message", i)
+    subscriber.gate.set()
+    assert bus.flush(2.0)
+    assert subscriber.received == delivered
+    assert (subscription.stats.dropped, subscription.stats.delivered) == (1, 3)
+    bus.close()
+
+def test_overflow_block_waits_for_room():
+    bus = EventBus()
+    subscriber, subscription = _stalled(bus, max_queue=2, overflow="block")
+    publisher = threading.Thread(target=lambda: [bus.publish("source", "message", i) for i in (1, 2, 3)])
+    publisher.start()
+    publisher.join(0.1)
+    assert publisher.is_alive()
+    subscriber.gate.set()
+    publisher.join(2.0)
+    assert not publisher.is_alive()
+    assert bus.flush(2.0)
+    assert subscriber.received == [0, 1, 2, 3]
+    assert subscription.stats.dropped == 0
+    bus.close()
+
+def test_state_changes_coalesce_per_source():
+    bus = EventBus()
+    subscriber = _Gated()
+    subscription = bus.subscribe(subscriber)
+    bus.publish("a", "message", "first")
+    assert subscriber.first.wait(2.0)
+    for i in range(5):
+        bus.publish("a", "state_changed", f"a{i}")
+        bus.publish("b", "state_changed", f"b{i}")
+    subscriber.gate.set()
+    assert bus.flush(2.0)
+    assert subscriber.received == ["first", "a4", "b4"]
+    assert subscription.stats.coalesced == 8
+    bus.close()
+
+def test_slow_subscriber_does_not_stall_others():
+    bus = EventBus()
+    slow = _Gated()
+    bus.subscribe(slow, config=SubscriptionConfig(max_queue=1, overflow="drop_newest"))
+    fast = []
+    bus.subscribe(lambda source, event, data: fast.append(data))
+    start = time.monotonic()
+    for i in range(100):
+        bus.publish("source", "message", i)
+    assert time.monotonic() - start < 1.0
+    assert bus.flush(0.05) is False
+    slow.gate.set()
+    assert bus.flush(2.0)
+    assert fast == list(range(100))
+    bus.close()
+
+def test_predicate_errors_and_unsubscribe():
+    bus = EventBus()
+    seen = []
+
+    def callback(source, event, data):
+        if data == "bad":
+            raise RuntimeError("boom")
+        seen.append(data)
+
+    subscription = bus.subscribe(callback, predicate=lambda source, event: event != "ignored")
+    for event, data in [("message", "bad"), ("ignored", "x"), ("message", "ok")]:
+        bus.publish("source", event, data)
+    bus.unsubscribe(subscription)
+    assert seen == ["ok"]
+    assert (subscription.stats.errors, subscription.stats.delivered) == (1, 1)
+    bus.publish("source", "message", "late")
+    assert seen == ["ok"]
@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+
+from llm.deadlines import DeadlineExceeded, LoadShedError, deadline_scope
+from llm.lanes import BATCH, INTERACTIVE, Lane, LaneScheduler, current_lane, lane_scope
+
+class _Holder:
+    """Holds a slot of a lane on a thread until released."""
+
+    def __init__(self, scheduler, lane):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.lane = None
+        self.thread = threading.Thread(target=self._run, args=(scheduler, lane), daemon=True)
+        self.thread.start()
+
+    def _run(self, scheduler, lane):
+        with scheduler.slot(lane) as granted:
+            self.lane = granted
+            self.started.set()
+            self.release.wait(5.0)
+
+    def done(self):
+        self.release.set()
+        self.thread.join(5.0)
+
+def _running(scheduler):
+    return {name: entry["running"] for name, entry in scheduler.stats().items()}
+
+def test_standard_split():
+    scheduler = LaneScheduler.standard(4)
+    lanes = {lane.name: lane for lane in scheduler.lanes}
+    assert (lanes[INTERACTIVE].reserved, lanes[INTERACTIVE].lendable) == (2, False)
+    assert lanes[BATCH].reserved == 2
+    assert [lane.reserved for lane in LaneScheduler.standard(1).lanes] == [0, 0]
+
+def test_batch_never_takes_interactive_slots():
+    scheduler = LaneScheduler.standard(4, queue_timeout=0.05)
+    holders = [_Holder(scheduler, BATCH) for _ in range(2)]
+    for holder in holders:
+        assert holder.started.wait(2.0)
+    with pytest.raises(LoadShedError):
+        with scheduler.slot(BATCH):
+            pass
+    # The interactive share is still free
+    with scheduler.slot(INTERACTIVE) as lane:
+        assert lane == INTERACTIVE
+    for holder in holders:
+        holder.done()
+
+def test_interactive_borrows_idle_batch_slots():
+    scheduler = LaneScheduler.standard(4, queue_timeout=0.05)
+    holders = [_Holder(scheduler, INTERACTIVE) for _ in range(4)]
+    for holder in holders:
+        assert holder.started.wait(2.0)
+    assert _running(scheduler) == {INTERACTIVE: 4, BATCH: 0}
+    assert scheduler.stats()[INTERACTIVE]["borrowed"] == 2
+    with pytest.raises(LoadShedError):
+        with scheduler.slot(INTERACTIVE):
+            pass
+    for holder in holders:
+        holder.done()
+
+def test_freed_slot_goes_to_lane_below_its_reservation():
+    scheduler = LaneScheduler.standard(2)
+    interactive, batch = _Holder(scheduler, INTERACTIVE), _Holder(scheduler, BATCH)
+    assert interactive.started.wait(2.0) and batch.started.wait(2.0)
+    queued_batch = _Holder(scheduler, BATCH)
+    queued_interactive = _Holder(scheduler, INTERACTIVE)
+    while scheduler.stats()[INTERACTIVE]["queued"] + scheduler.stats()[BATCH]["queued"] < 2:
+        time.sleep(0.001)
+    interactive.done()
+    assert queued_interactive.started.wait(2.0)
+    assert not queued_batch.started.is_set()
+    batch.done()
+    assert queued_batch.started.wait(2.0)
+    queued_interactive.done()
+    queued_batch.done()
+    assert _running(scheduler) == {INTERACTIVE: 0, BATCH: 0}
+
+def test_lane_limit():
+    scheduler = LaneScheduler([Lane("a", limit=1), Lane("b")], capacity=3, queue_timeout=0.05)
+    holder = _Holder(scheduler, "a")
+    assert holder.started.wait(2.0)
+    with pytest.raises(LoadShedError):
+        with scheduler.slot("a"):
+            pass
+    with scheduler.slot("b"):
+        pass
+    holder.done()
+
+def test_deadline_while_queued():
+    scheduler = LaneScheduler([Lane("only")], capacity=1)
+    holder = _Holder(scheduler, "only")
+    assert holder.started.wait(2.0)
+    with deadline_scope(0.05), pytest.raises(DeadlineExceeded):
+        with scheduler.slot():
+            pass
+    assert scheduler.stats()["only"]["queued"] == 0
+    holder.done()
+
+def test_lane_scope_selects_lane():
+    scheduler = LaneScheduler.standard(4, default=BATCH)
+    assert current_lane() is None
+    with lane_scope(INTERACTIVE):
+        assert current_lane() == INTERACTIVE
+        with lane_scope(None):
+            assert current_lane() == INTERACTIVE
+        with scheduler.slot() as lane:
+            assert lane == INTERACTIVE
+    with scheduler.slot() as lane:
+        assert lane == BATCH
+    with scheduler.slot("unknown") as lane:
+        assert lane == BATCH
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        LaneScheduler([])
+    with pytest.raises(ValueError):
+        LaneScheduler([Lane("a", reserved=3)], capacity=2)
+    with pytest.raises(ValueError):
+        LaneScheduler([Lane("a")], capacity=1, default="b")
@@ -0,0 +1,43 @@
+import threading
+
+from llm.agents.map_reduce import MapReduceAnalyzer, _split_items, chunk_transcript, estimate_tokens
+
+class _Client:
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def call_api(self, messages):
+        with self._lock:
+            self.calls.append(messages)
+        return "ok"
+
+def test_split_items_uses_longest_non_empty_list():
+    header, items = _split_items({"title": "Call", "tags": [], "segments": ["a", "b"], "speakers": ["x"]})
+    assert items == ["a", "b"]
+    assert "tags" in header and "speakers" in header and "segments" not in header
+
+def test_split_items_without_lists_splits_lines():
+    header, items = _split_items({"notes": "first\n\nsecond", "tags": []})
+    assert header == ""
+    assert any("second" in item for item in items)
+
+def test_long_text_with_empty_list_streams():
+    client = _Client()
+    results = list(MapReduceAnalyzer(client, max_chunk_tokens=100).stream({"notes": "word " * 1000, "tags": []}))
+    assert results[-1]["type"] == "analysis_result"
+    assert results[-1]["chunks"] > 1
+
+def test_chunks_fit_budget_with_header():
+    data = {"title": "Quarterly review " * 20, "segments": [f"speaker {i}: " + "talk " * 15 for i in range(100)]}
+    header, chunks = chunk_transcript(data, 200)
+    assert header
+    assert all(estimate_tokens(f"{header}\n\n{chunk}") <= 200 for chunk in chunks)
+    assert "".join(chunks).count("speaker") == 100
+
+def test_oversized_header_is_chunked():
+    data = {"summary": "context " * 400, "segments": ["hello", "bye"]}
+    header, chunks = chunk_transcript(data, 100)
+    assert header == ""
+    assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+    assert "hello" in "\n".join(chunks)
@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from llm.deadlines import DeadlineExceeded
+from llm.lanes import lane_scope
+from llm.router import LLMRouter, RouterConfig
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+def _router(**config):
+    router = LLMRouter.from_urls(["http://a", "http://b"], "key", "model", RouterConfig(**config))
+    calls = []
+
+    def endpoint(name, behaviour):
+        def call_api(messages):
+            calls.append(name)
+            return behaviour()
+        router._clients[name].call_api = call_api
+
+    return router, calls, endpoint
+
+def _fail(error):
+    def behaviour():
+        raise error
+    return behaviour
+
+def test_failover_on_endpoint_error():
+    router, calls, endpoint = _router()
+    endpoint("http://a", _fail(RuntimeError("down")))
+    endpoint("http://b", lambda: "ok")
+    router._stats["http://b"].ewma_latency = 2.0
+    assert router.call_api(MESSAGES, interactive=False) == "ok"
+    assert calls == ["http://a", "http://b"]
+    assert router.get_stats()["http://a"].failures == 1
+    router.close()
+
+def test_deadline_is_not_retried_or_penalized():
+    router, calls, endpoint = _router()
+    endpoint("http://a", _fail(DeadlineExceeded("late")))
+    endpoint("http://b", lambda: "ok")
+    router._stats["http://b"].ewma_latency = 2.0
+    with pytest.raises(DeadlineExceeded):
+        router.call_api(MESSAGES, interactive=False)
+    stats = router.get_stats()["http://a"]
+    assert calls == ["http://a"]
+    assert (stats.failures, stats.cooldown_until, stats.in_flight) == (0, 0.0, 0)
+    router.close()
+
+def test_interactive_lane_hedges_by_default():
+    router, calls, endpoint = _router(hedge_delay=0.02)
+    endpoint("http://a", lambda: time.sleep(0.5) or "slow")
+    endpoint("http://b", lambda: "fast")
+    router._stats["http://b"].ewma_latency = 2.0
+    with lane_scope("interactive"):
+        assert router.call_api(MESSAGES) == "fast"
+    assert calls == ["http://a", "http://b"]
+    # Outside the lane the call goes to one endpoint only
+    router.call_api(MESSAGES)
+    assert len(calls) == 3
+    router.close()
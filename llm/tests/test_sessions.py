@@ -0,0 +1,81 @@
+import threading
+from pathlib import Path
+
+from llm.prompts.prompt_manager import FileBasedPromptManager
+from llm.voice.sessions import MultiSessionVoiceOrchestrator, SessionConfig
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "prompts" / "templates"
+
+class _Client:
+    def call_api(self, messages):
+        return "reply"
+
+    def stream_api(self, messages):
+        yield "re"
+        yield "ply"
+
+def _orchestrator(**limits):
+    evicted = []
+    orchestrator = MultiSessionVoiceOrchestrator(
+        FileBasedPromptManager(str(TEMPLATES_DIR)),
+        session_config=SessionConfig(**limits),
+        llm_client=_Client(),
+        whisper_client=object(),
+        on_evict=lambda session: evicted.append(session.session_id)
+    )
+    return orchestrator, evicted
+
+def test_least_recently_active_evicted_beyond_cap():
+    orchestrator, evicted = _orchestrator(max_sessions=2)
+    for session_id in ("a", "b", "a", "c"):
+        orchestrator.process_text(session_id, "hello")
+    assert evicted == ["b"]
+    assert "a" in orchestrator and "c" in orchestrator and len(orchestrator) == 2
+
+def test_idle_sessions_evicted():
+    orchestrator, evicted = _orchestrator(idle_timeout=60.0)
+    orchestrator.process_text("a", "hello")
+    orchestrator.process_text("b", "hello")
+    orchestrator._sessions["a"].last_active -= 120
+    assert orchestrator.evict_idle() == 1
+    assert evicted == ["a"]
+
+def test_session_in_use_is_not_evicted():
+    orchestrator, evicted = _orchestrator(max_sessions=1)
+    with orchestrator.locked("a") as session:
+        orchestrator.process_text("b", "hello")
+        assert "a" in orchestrator and evicted == []
+        session.history.append({"role": "user", "content": "kept"})
+    orchestrator.process_text("c", "hello")
+    assert evicted[0] == "a"
+    assert evicted.count("a") == 1
+
+def test_history_trimmed_to_cap():
+    orchestrator, _ = _orchestrator(max_history_messages=4)
+    for i in range(5):
+        orchestrator.process_text("a", f"turn {i}")
+    history = orchestrator.get_conversation_history("a")
+    assert history[0]["role"] == "system"
+    assert [message["content"] for message in history[1:]] == ["turn 3", "reply", "turn 4", "reply"]
+
+def test_stream_does_not_hold_session_between_tokens():
+    orchestrator, evicted = _orchestrator(max_sessions=1)
+    stream = orchestrator.stream_text("a", "streamed")
+    assert next(stream) == "re"
+    # A slow consumer blocks neither another turn of the session nor its eviction
+    done = threading.Event()
+    threading.Thread(target=lambda: (orchestrator.process_text("a", "other"), done.set())).start()
+    assert done.wait(2.0)
+    orchestrator.process_text("b", "hello")
+    assert evicted == ["a"]
+    assert list(stream) == ["ply"]
+    # The finished turn lands in the live session under the same id
+    assert [m["content"] for m in orchestrator.get_conversation_history("a")[1:]] == ["streamed", "reply"]
+
+def test_abandoned_stream_is_not_committed():
+    orchestrator, _ = _orchestrator()
+    stream = orchestrator.stream_text("a", "streamed")
+    next(stream)
+    stream.close()
+    assert orchestrator.get_conversation_history("a")[1:] == []
+    assert orchestrator._sessions["a"].in_use == 0
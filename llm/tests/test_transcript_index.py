@@ -0,0 +1,98 @@
+import random
+import threading
+
+import numpy as np
+import pytest
+
+from llm.transcript_index import TranscriptIndex, _decode_varints, _encode_varints, tokenize
+
+def test_varints_round_trip():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([
+        np.array([0, 1, 127, 128, 255, 16383, 16384, 2 ** 31 - 1, 2 ** 40], dtype=np.int64),
+        rng.integers(0, 2 ** 35, size=1000)
+    ])
+    data, lengths = _encode_varints(values)
+    assert len(data) == lengths.sum()
+    assert lengths[:4].tolist() == [1, 1, 1, 2]
+    assert _decode_varints(np.frombuffer(data, dtype=np.uint8)).tolist() == values.tolist()
+
+def test_varints_empty():
+    data, lengths = _encode_varints(np.zeros(0, dtype=np.int64))
+    assert data == b"" and lengths.size == 0
+    assert _decode_varints(np.zeros(0, dtype=np.uint8)).size == 0
+
+def _occurs(texts, phrase):
+    tokens = tokenize(" ".join(texts))
+    return any(tokens[i:i + len(phrase)] == phrase for i in range(len(tokens) - len(phrase) + 1))
+
+@pytest.mark.parametrize("skip", [2, 128])
+def test_phrase_and_prefix_search_match_brute_force(tmp_path, monkeypatch, skip):
+    # A small skip interval exercises the block-wise position decoding
+    monkeypatch.setattr("llm.transcript_index._SKIP", skip)
+    rng = random.Random(1)
+    words = [f"w{i}" for i in range(8)] + [f"r{i}" for i in range(60)]
+    index = TranscriptIndex(str(tmp_path), flush_docs=37, flush_seconds=None, max_segments=3, merge_factor=2)
+    docs = {}
+    for d in range(300):
+        texts = [" ".join(rng.choice(words) for _ in range(rng.randint(0, 8))) for _ in range(rng.randint(1, 3))]
+        docs[f"c{d}"] = texts
+        index.add_transcript(f"c{d}", [{"text": t, "start": i, "end": i + 1} for i, t in enumerate(texts)], {"g": d % 3})
+    index.close()
+
+    for _ in range(60):
+        phrase = [rng.choice(words) for _ in range(rng.randint(1, 3))]
+        group = rng.choice([None, 0, 1])
+        expected = {
+            call for call, texts in docs.items()
+            if _occurs(texts, phrase) and (group is None or int(call[1:]) % 3 == group)
+        }
+        hits = index.search('"%s"' % " ".join(phrase), limit=1000, where=None if group is None else {"g": group})
+        assert {hit.call_id for hit in hits} == expected
+        assert all(hit.matches for hit in hits)
+    expected = {call for call, texts in docs.items() if any(t.startswith("w") for t in tokenize(" ".join(texts)))}
+    assert {hit.call_id for hit in index.search("w*", limit=1000)} == expected
+
+def test_match_times(tmp_path):
+    index = TranscriptIndex(str(tmp_path), flush_docs=1)
+    index.add_transcript("c1", [
+        {"text": "hello there", "start": 0.0, "end": 2.0},
+        {"text": "send the contract", "start": 2.0, "end": 5.5}
+    ])
+    [hit] = index.search('"send the contract"')
+    assert (hit.matches[0].start, hit.matches[0].end, hit.matches[0].segment) == (2.0, 5.5, 1)
+
+def test_reopen_keeps_documents_and_removes_orphans(tmp_path):
+    index = TranscriptIndex(str(tmp_path), flush_docs=1)
+    index.add_transcript("c1", "pricing question")
+    index.close()
+    (tmp_path / "seg_00000099").mkdir()
+    (tmp_path / "notes").mkdir()
+    reopened = TranscriptIndex(str(tmp_path))
+    assert len(reopened) == 1
+    assert not (tmp_path / "seg_00000099").exists()
+    assert (tmp_path / "notes").exists()
+
+def test_refuses_foreign_directory(tmp_path):
+    (tmp_path / "data.txt").write_text("not an index")
+    with pytest.raises(ValueError):
+        TranscriptIndex(str(tmp_path))
+    assert (tmp_path / "data.txt").exists()
+
+def test_concurrent_adds_with_background_merges(tmp_path):
+    index = TranscriptIndex(str(tmp_path), flush_docs=20, flush_seconds=None, max_segments=2, merge_factor=2)
+
+    def add(worker):
+        for i in range(200):
+            index.add_transcript(f"t{worker}-{i}", f"alpha t{worker}")
+
+    threads = [threading.Thread(target=add, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    index.close()
+    assert len(index) == 800
+    assert index.get_stats()["segments"] <= 2
+    assert len(index.search("alpha", limit=1000)) == 800
+    assert len(TranscriptIndex(str(tmp_path))) == 800
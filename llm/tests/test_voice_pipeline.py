@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import pytest
+
+from llm.prompts.prompt_manager import FileBasedPromptManager
+from llm.voice.voice_llm_orchestrator import VoiceLLMConfig, VoicePipeline
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "prompts" / "templates"
+
+HISTORY = [{"role": "system", "content": "system"}] + [
+    {"role": role, "content": f"{role} {i}"} for i in range(3) for role in ("user", "assistant")
+]
+
+def _messages(degraded_history, degraded=True):
+    pipeline = VoicePipeline(
+        FileBasedPromptManager(str(TEMPLATES_DIR)),
+        VoiceLLMConfig(degraded_history=degraded_history),
+        llm_client=object(),
+        whisper_client=object()
+    )
+    messages, user_message, _, _ = pipeline._prepare_turn("now", None, degraded, HISTORY, None)
+    return messages, user_message
+
+@pytest.mark.parametrize("degraded_history,kept", [(0, 1), (1, 1), (3, 3), (100, 7)])
+def test_degraded_turn_keeps_recent_history(degraded_history, kept):
+    messages, user_message = _messages(degraded_history)
+    assert messages[0]["content"] == "system"
+    assert len(messages) - 1 == kept
+    assert messages[-1] is user_message
+
+def test_full_history_when_not_degraded():
+    messages, _ = _messages(0, degraded=False)
+    assert len(messages) == len(HISTORY) + 1
+
+def test_negative_history_rejected():
+    with pytest.raises(ValueError):
+        VoiceLLMConfig(degraded_history=-1)
+    with pytest.raises(ValueError):
+        VoiceLLMConfig(memory_history=-1)
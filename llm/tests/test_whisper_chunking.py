@@ -0,0 +1,72 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from llm.voice.whisper_client import WhisperClient, WhisperConfig
+
+class _Wav:
+    duration = 20.0
+
+    def split_at_silence(self, chunk_seconds, search_seconds):
+        return [0.0, 10.0, 20.0]
+
+    def read(self, start, end):
+        return start
+
+# Segments each chunk decodes, relative to where it was read from
+_DECODED = {
+    0.0: [
+        ("Hello there.", 0.0, 2.0),
+        ("Hello there.", 2.0, 4.0),
+        ("How are you?", 6.0, 9.9),
+        ("Fine", 9.9, 11.0)
+    ],
+    9.0: [
+        ("how are you", 0.8, 1.6),
+        ("Fine, thanks.", 1.6, 3.0),
+        ("Fine, thanks.", 3.0, 4.0),
+        ("Bye.", 9.0, 11.0)
+    ]
+}
+
+def _client(max_concurrency=4):
+    client = WhisperClient(WhisperConfig(chunk_seconds=10.0, chunk_overlap=1.0, chunk_workers=2))
+    client._model = SimpleNamespace(max_concurrency=max_concurrency)
+    client._decode = lambda start: {
+        "language": "en",
+        "segments": [{"text": text, "start": a, "end": b} for text, a, b in _DECODED[start]]
+    }
+    return client
+
+def test_chunk_seams_drop_overlap_duplicates_only():
+    result = _client()._transcribe_chunked(_Wav())
+    assert [segment["text"] for segment in result["segments"]] == [
+        "Hello there.", "Hello there.", "How are you?", "Fine, thanks.", "Fine, thanks.", "Bye."
+    ]
+    assert [segment["id"] for segment in result["segments"]] == list(range(6))
+    assert result["language"] == "en"
+
+def test_chunk_timestamps_are_shifted():
+    segments = _client()._transcribe_chunked(_Wav())["segments"]
+    assert (segments[3]["start"], segments[3]["end"]) == (10.6, 12.0)
+    assert (segments[-1]["start"], segments[-1]["end"]) == (18.0, 20.0)
+
+def test_chunks_decode_one_at_a_time_without_backend_concurrency():
+    client = _client(max_concurrency=1)
+    decode = client._decode
+    lock = threading.Lock()
+    running = []
+    overlapped = []
+
+    def tracked(start):
+        with lock:
+            running.append(start)
+            overlapped.append(len(running) > 1)
+        time.sleep(0.05)
+        with lock:
+            running.remove(start)
+        return decode(start)
+
+    client._decode = tracked
+    assert len(client._transcribe_chunked(_Wav())["segments"]) == 6
+    assert overlapped == [False, False]
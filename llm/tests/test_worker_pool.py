@@ -0,0 +1,34 @@
+from concurrent.futures import Future
+
+import pytest
+
+from llm.agents.multi_agent_orchestrator import Task
+from llm.agents.worker_pool import DistributedOrchestrator, RemoteAgentError
+from llm.deadlines import DeadlineExceeded
+
+def _dispatched(orchestrator, task_id):
+    task = Task(id=task_id, description="", required_capabilities=[], priority=1, assigned_agent="agent-1")
+    orchestrator.tasks[task.id] = task
+    orchestrator._set_task_status(task, "assigned")
+    future = Future()
+    orchestrator._pending[f"r-{task_id}"] = (future, {"type": "task_assignment", "task_id": task_id})
+    return task, future
+
+@pytest.mark.parametrize("kind,status,error", [
+    ("expired", "expired", DeadlineExceeded),
+    ("error", "failed", RemoteAgentError)
+])
+def test_worker_failure_releases_task(kind, status, error):
+    orchestrator = DistributedOrchestrator(llm_client=None, num_workers=1)
+    task, future = _dispatched(orchestrator, "t1")
+    other, _ = _dispatched(orchestrator, "t2")
+    assert orchestrator._agent_load["agent-1"] == 2
+
+    orchestrator._apply_result(kind, "r-t1", "agent-1", "boom")
+
+    assert task.status == status
+    assert other.status == "assigned"
+    assert orchestrator._active_task_count == 1
+    assert orchestrator._agent_load["agent-1"] == 1
+    with pytest.raises(error):
+        future.result(0)
@@ -0,0 +1,218 @@
+import os
+import time
+import logging
+import itertools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import List, Dict, Optional, Any, Callable
+
+from .llm_client import LLMClient, ConversationManager
+from .metrics import metrics
+from .serialization import canonical_json, file_stem, get_serializer
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Persona:
+    """A role-play persona, such as a sales rep or a buyer."""
+    name: str
+    system_prompt: str
+
+@dataclass
+class Scenario:
+    """A sparring scenario: how the conversation opens and how long it runs."""
+    name: str
+    initial_message: str
+    turns: int = 5
+
+@dataclass
+class Pairing:
+    """One rep × buyer × scenario session."""
+    rep: Persona
+    buyer: Persona
+    scenario: Scenario
+
+    @property
+    def session_id(self) -> str:
+        """Stable identifier, also used as the checkpoint file name."""
+        names = [self.rep.name, self.buyer.name, self.scenario.name]
+        return file_stem("__".join(names), key=names)
+
+@dataclass
+class SessionResult:
+    """Structured outcome of one sparring session."""
+    session_id: str
+    rep: str
+    buyer: str
+    scenario: str
+    transcript: List[Dict[str, str]]
+    seconds: float
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+@dataclass
+class TournamentReport:
+    """Results and throughput of a tournament run."""
+    results: List[SessionResult] = field(default_factory=list)
+    sessions_run: int = 0
+    sessions_resumed: int = 0
+    sessions_failed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def sessions_per_minute(self) -> float:
+        """Throughput of the sessions actually run in this invocation."""
+        return 60.0 * self.sessions_run / self.seconds if self.seconds else 0.0
+
+class TournamentRunner:
+    """
+    Runs every rep × buyer × scenario pairing as a dual-agent role-play.
+
+    Sessions run concurrently under a global concurrency cap; each session
+    is a sequential conversation, so the cap also bounds in-flight LLM
+    calls. Every finished session is checkpointed to its own file, and a
+    rerun with the same checkpoint directory skips completed sessions.
+    """
+
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        max_concurrency: int = 8,
+        checkpoint_dir: Optional[str] = None,
+        retry_failed: bool = True
+    ):
+        """
+        Initialize the runner.
+
+        Args:
+            llm_client: Client (or router) shared by every session
+            max_concurrency: Maximum number of sessions in flight
+            checkpoint_dir: Directory for per-session checkpoints; None disables them
+            retry_failed: Re-run sessions whose checkpoint recorded an error
+        """
+        self.manager = ConversationManager(llm_client)
+        self.max_concurrency = max_concurrency
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else None
+        self.retry_failed = retry_failed
+        self._serializer = get_serializer("json")
+
+    @staticmethod
+    def pairings(reps: List[Persona], buyers: List[Persona], scenarios: List[Scenario]) -> List[Pairing]:
+        """Every rep × buyer × scenario combination."""
+        return [Pairing(rep, buyer, scenario) for rep, buyer, scenario in itertools.product(reps, buyers, scenarios)]
+
+    def _checkpoint_path(self, session_id: str) -> Path:
+        return self.checkpoint_dir / f"{session_id}.json"
+
+    def _load_checkpoint(self, session_id: str) -> Optional[SessionResult]:
+        """Load a finished session from its checkpoint, if present and usable."""
+        if self.checkpoint_dir is None:
+            return None
+        path = self._checkpoint_path(session_id)
+        if not path.exists():
+            return None
+        try:
+            result = SessionResult(**self._serializer.loads(path.read_bytes()))
+        except Exception as e:
+            logger.warning("Ignoring unreadable checkpoint %s: %s", path, e)
+            return None
+        if not result.ok and self.retry_failed:
+            return None
+        return result
+
+    def _save_checkpoint(self, result: SessionResult) -> None:
+        """Write a session checkpoint atomically."""
+        if self.checkpoint_dir is None:
+            return
+        path = self._checkpoint_path(result.session_id)
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(canonical_json(asdict(result)))
+        os.replace(tmp, path)
+
+    def run_session(self, pairing: Pairing) -> SessionResult:
+        """Run a single sparring session and checkpoint it."""
+        start = time.perf_counter()
+        transcript: List[Dict[str, str]] = []
+        error = None
+        with metrics.span("tournament_session"):
+            try:
+                transcript = self.manager.run_dual_agents(
+                    agent1_system_prompt=pairing.rep.system_prompt,
+                    agent2_system_prompt=pairing.buyer.system_prompt,
+                    initial_message=pairing.scenario.initial_message,
+                    turns=pairing.scenario.turns
+                )
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                logger.error("Session %s failed: %s", pairing.session_id, error)
+        result = SessionResult(
+            session_id=pairing.session_id,
+            rep=pairing.rep.name,
+            buyer=pairing.buyer.name,
+            scenario=pairing.scenario.name,
+            transcript=transcript,
+            seconds=time.perf_counter() - start,
+            error=error
+        )
+        self._save_checkpoint(result)
+        return result
+
+    def run(
+        self,
+        reps: List[Persona],
+        buyers: List[Persona],
+        scenarios: List[Scenario],
+        on_result: Optional[Callable[[SessionResult], Any]] = None
+    ) -> TournamentReport:
+        """
+        Run the whole tournament.
+
+        Args:
+            reps: Sales rep personas
+            buyers: Buyer personas
+            scenarios: Scenarios every pairing plays through
+            on_result: Optional callback invoked as each session finishes
+
+        Returns:
+            TournamentReport: Every session's result plus throughput figures
+        """
+        if self.checkpoint_dir is not None:
+            self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+
+        report = TournamentReport()
+        pending: List[Pairing] = []
+        for pairing in self.pairings(reps, buyers, scenarios):
+            resumed = self._load_checkpoint(pairing.session_id)
+            if resumed is not None:
+                report.results.append(resumed)
+                report.sessions_resumed += 1
+            else:
+                pending.append(pairing)
+        logger.info(
+            "Tournament: %d sessions to run, %d resumed from checkpoints",
+            len(pending), report.sessions_resumed
+        )
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            # Sessions inherit the caller's deadline and lane (e.g. a batch lane_scope)
+            futures = [
+                pool.submit(contextvars.copy_context().run, self.run_session, pairing)
+                for pairing in pending
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                report.results.append(result)
+                report.sessions_run += 1
+                if not result.ok:
+                    report.sessions_failed += 1
+                metrics.inc("tournament_sessions_total", labels={"status": "ok" if result.ok else "error"})
+                if on_result is not None:
+                    on_result(result)
+        report.seconds = time.perf_counter() - start
+        return report
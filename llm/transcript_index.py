@@ -0,0 +1,853 @@
+import os
+import re
+import json
+import time
+import shutil
+import logging
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from itertools import chain
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .metrics import metrics
+from .serialization import canonical_json, to_prompt_text
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+_QUERY = re.compile(r'"([^"]*)"|(\S+)')
+_MANIFEST = "manifest.json"
+_SEGMENT_DIR = re.compile(r"seg_\d{8}")
+_SKIP = 128  # documents between skip entries in a term's position stream
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words, as indexed and as matched by queries."""
+    return _TOKEN.findall(text.lower())
+
+def _encode_varints(values: np.ndarray) -> Tuple[bytes, np.ndarray]:
+    """LEB128-encode non-negative integers; returns the bytes and each value's length in bytes."""
+    values = np.asarray(values, dtype=np.int64)
+    lengths = np.ones(values.size, dtype=np.int64)
+    rest = values >> 7
+    while rest.any():
+        lengths += rest > 0
+        rest >>= 7
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    out = np.empty(int(ends[-1]) if values.size else 0, dtype=np.uint8)
+    for j in range(int(lengths.max()) if values.size else 0):
+        has = lengths > j
+        byte = (values[has] >> (7 * j)) & 0x7F
+        out[starts[has] + j] = byte | ((lengths[has] - 1 > j) << 7)
+    return out.tobytes(), lengths
+
+def _decode_varints(buf: np.ndarray) -> np.ndarray:
+    """Decode a run of LEB128 integers with a few NumPy passes."""
+    last = buf < 0x80
+    ends = np.flatnonzero(last)
+    if ends.size == buf.size:
+        return buf.astype(np.int64)
+    values = buf[ends].astype(np.int64)
+    # Fold in earlier bytes, most significant first, for values still continuing
+    k = 1
+    more = np.flatnonzero(ends >= k)
+    more = more[~last[ends[more] - k]]
+    while more.size:
+        values[more] = (values[more] << 7) | (buf[ends[more] - k] & 0x7F)
+        k += 1
+        more = more[ends[more] >= k]
+        more = more[~last[ends[more] - k]]
+    return values
+
+def _field_term(key: str, value: Any) -> str:
+    """Term for a metadata value; the ``@`` keeps it out of word and prefix matches."""
+    return "@{}={}".format(key, str(value).replace("\n", " "))
+
+def _map(path: Path) -> np.ndarray:
+    """Memory-map a file as bytes (an empty array for an empty file, which cannot be mapped)."""
+    if path.stat().st_size == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+def _gather(buf: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """Concatenate the byte ranges ``[lo, hi)`` of a buffer."""
+    if lo.size == 1:
+        return buf[lo[0]:hi[0]]
+    lengths = hi - lo
+    starts = np.cumsum(lengths) - lengths
+    return buf[np.repeat(lo - starts, lengths) + np.arange(int(lengths.sum()))]
+
+def _group_starts(lengths: np.ndarray) -> np.ndarray:
+    """Start of each non-empty group in a flat array of groups of these lengths."""
+    return (np.cumsum(lengths) - lengths)[lengths > 0]
+
+@dataclass
+class SearchMatch:
+    """Where a query matched inside a call; times are seconds into the audio, None for analyses."""
+    start: Optional[float]
+    end: Optional[float]
+    text: str
+    segment: int  # index of the transcript segment (or analysis line) holding the match
+
+@dataclass
+class SearchHit:
+    """A transcript or analysis matching a query."""
+    call_id: str
+    source: str
+    score: float
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    matches: List[SearchMatch] = field(default_factory=list)
+
+_NO_POSTINGS = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+
+class _Segment:
+    """
+    An immutable, memory-mapped segment of the index.
+
+    Files, per segment directory:
+        terms.txt: sorted terms, one per line
+        dict.npy: per term, its document count, byte offsets into the three
+            posting streams and its first skip entry (one extra row marks
+            their ends)
+        docs.bin, freqs.bin, positions.bin: LEB128 varints; per term, its
+            document ids as gaps, their term frequencies, and the token
+            positions in each document as gaps restarting at every document
+        skips.npy: byte offset in positions.bin of every 128th document of
+            each term, so phrases decode only the blocks they need
+        spans.npy: start and end seconds of every transcript segment
+        span_offsets.npy: each document's first row in spans.npy
+        stored.jsonl, stored_offsets.npy: each document's call id, source,
+            metadata and segment texts
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.name = path.name
+        text = (path / "terms.txt").read_text(encoding="utf-8")
+        self.terms: List[str] = text.split("\n") if text else []
+        self.dict = np.load(path / "dict.npy")
+        self.docs = _map(path / "docs.bin")
+        self.freqs = _map(path / "freqs.bin")
+        self.positions = _map(path / "positions.bin")
+        self.spans = np.load(path / "spans.npy", mmap_mode="r")
+        self.span_offsets = np.load(path / "span_offsets.npy")
+        self.stored = _map(path / "stored.jsonl")
+        self.stored_offsets = np.load(path / "stored_offsets.npy")
+        self.skips = np.load(path / "skips.npy")
+        self.size = len(self.span_offsets) - 1
+
+    def lookup(self, term: str) -> Optional[int]:
+        i = bisect_left(self.terms, term)
+        return i if i < len(self.terms) and self.terms[i] == term else None
+
+    def prefix_range(self, prefix: str) -> range:
+        return range(bisect_left(self.terms, prefix), bisect_left(self.terms, prefix + "\U0010ffff"))
+
+    def df(self, t: int) -> int:
+        return int(self.dict[t, 0])
+
+    def postings(self, terms: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Documents holding any of ``terms`` (sorted term ids), with their summed frequencies."""
+        rows, ends = self.dict[terms], self.dict[terms + 1]
+        df = rows[:, 0]
+        gaps = _decode_varints(_gather(self.docs, rows[:, 1], ends[:, 1]))
+        freqs = _decode_varints(_gather(self.freqs, rows[:, 2], ends[:, 2]))
+        docs = np.cumsum(gaps)
+        if terms.size == 1:
+            return docs, freqs
+        starts = np.cumsum(df) - df
+        docs -= np.repeat(docs[starts] - gaps[starts], df)
+        # Document ids are dense, so counting beats sorting the union
+        present = np.bincount(docs, minlength=self.size)
+        tf = np.bincount(docs, weights=freqs, minlength=self.size).astype(np.int64)
+        docs = np.flatnonzero(present)
+        return docs, tf[docs]
+
+    def occurrences(self, t: int, within: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Occurrences of a term in the documents flagged in ``within`` (a mask
+        over the segment), as parallel document and token position arrays.
+        """
+        (_, doc_lo, freq_lo, pos_lo, skip_lo), (_, doc_hi, freq_hi, pos_hi, skip_hi) = self.dict[t], self.dict[t + 1]
+        docs = np.cumsum(_decode_varints(self.docs[doc_lo:doc_hi]))
+        freqs = _decode_varints(self.freqs[freq_lo:freq_hi])
+        blocks = np.unique(np.flatnonzero(within[docs]) // _SKIP)
+        if blocks.size * 2 < skip_hi - skip_lo:
+            # Positions restart at every document, so any block decodes on its own
+            bounds = np.r_[self.skips[skip_lo:skip_hi], pos_hi]
+            gaps = _decode_varints(_gather(self.positions, bounds[blocks], bounds[blocks + 1]))
+            picked = (blocks[:, None] * _SKIP + np.arange(_SKIP)).ravel()
+            picked = picked[picked < docs.size]
+            docs, freqs = docs[picked], freqs[picked]
+        else:
+            gaps = _decode_varints(self.positions[pos_lo:pos_hi])
+        running = np.cumsum(gaps)
+        starts = _group_starts(freqs)
+        hit_docs = np.repeat(docs, freqs)
+        hit_pos = running - np.repeat(running[starts] - gaps[starts], freqs[freqs > 0])
+        keep = within[hit_docs]
+        return hit_docs[keep], hit_pos[keep]
+
+    def raw(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Every posting at once: per-term document counts, absolute document ids, frequencies, position gaps."""
+        df = self.dict[:-1, 0]
+        gaps = _decode_varints(self.docs)
+        docs = np.cumsum(gaps)
+        starts = _group_starts(df)
+        docs -= np.repeat(docs[starts] - gaps[starts], df[df > 0])
+        return df, docs, _decode_varints(self.freqs), _decode_varints(self.positions)
+
+    def document(self, doc: int) -> Dict[str, Any]:
+        lo, hi = self.stored_offsets[doc], self.stored_offsets[doc + 1]
+        return json.loads(self.stored[lo:hi].tobytes())
+
+def _write_segment(
+    path: Path,
+    terms: Sequence[str],
+    df: np.ndarray,
+    docs: np.ndarray,
+    freqs: np.ndarray,
+    position_gaps: np.ndarray,
+    spans: np.ndarray,
+    span_offsets: np.ndarray,
+    stored: bytes,
+    stored_offsets: np.ndarray
+) -> None:
+    """Write a segment directory from flat posting arrays grouped by term, in term order."""
+    path.mkdir(parents=True)
+    term_starts = np.cumsum(df) - df
+    doc_gaps = np.diff(docs, prepend=0)
+    if docs.size:
+        doc_gaps[term_starts] = docs[term_starts]
+    positions_per_term = np.add.reduceat(freqs, term_starts) if docs.size else np.zeros(0, dtype=np.int64)
+    rows = np.zeros((len(terms) + 1, 5), dtype=np.int64)
+    rows[:-1, 0] = df
+    for column, (name, values, bounds) in enumerate((
+        ("docs.bin", doc_gaps, np.r_[0, np.cumsum(df)]),
+        ("freqs.bin", freqs, np.r_[0, np.cumsum(df)]),
+        ("positions.bin", position_gaps, np.r_[0, np.cumsum(positions_per_term)])
+    ), start=1):
+        data, lengths = _encode_varints(values)
+        offsets = np.r_[0, np.cumsum(lengths)]
+        rows[:, column] = offsets[bounds.astype(np.int64)]
+        (path / name).write_bytes(data)
+    # Every _SKIP-th document of a term: where its positions start in positions.bin, written last
+    skipped = (np.arange(docs.size) - np.repeat(term_starts, df)) % _SKIP == 0
+    np.save(path / "skips.npy", offsets[(np.cumsum(freqs) - freqs)[skipped]])
+    rows[:, 4] = np.r_[0, np.cumsum(-(-df // _SKIP))]
+    (path / "terms.txt").write_text("\n".join(terms), encoding="utf-8")
+    np.save(path / "dict.npy", rows)
+    np.save(path / "spans.npy", np.asarray(spans, dtype=np.float64).reshape(-1, 2))
+    np.save(path / "span_offsets.npy", np.asarray(span_offsets, dtype=np.int64))
+    (path / "stored.jsonl").write_bytes(stored)
+    np.save(path / "stored_offsets.npy", np.asarray(stored_offsets, dtype=np.int64))
+
+class _Buffer:
+    """Documents added since the last flush, as per-term postings lists."""
+
+    def __init__(self):
+        self.postings: Dict[str, Tuple[List[int], List[int], List[int]]] = {}
+        self.spans: List[Tuple[float, float]] = []
+        self.span_offsets: List[int] = [0]
+        self.stored: List[bytes] = []
+        self.pending_since: Optional[float] = None
+
+    def extend(self, later: "_Buffer") -> None:
+        """Append the documents of a buffer started after this one."""
+        doc_base, span_base = len(self.stored), len(self.spans)
+        for term, (docs, freqs, positions) in later.postings.items():
+            entry = self.postings.setdefault(term, ([], [], []))
+            entry[0].extend(doc + doc_base for doc in docs)
+            entry[1].extend(freqs)
+            entry[2].extend(positions)
+        self.spans.extend(later.spans)
+        self.span_offsets.extend(offset + span_base for offset in later.span_offsets[1:])
+        self.stored.extend(later.stored)
+        if self.pending_since is None:
+            self.pending_since = later.pending_since
+
+    def write(self, path: Path) -> None:
+        terms = sorted(self.postings)
+        entries = [self.postings[term] for term in terms]
+        df = np.fromiter((len(entry[0]) for entry in entries), dtype=np.int64, count=len(entries))
+        docs = np.fromiter(chain.from_iterable(entry[0] for entry in entries), dtype=np.int64)
+        freqs = np.fromiter(chain.from_iterable(entry[1] for entry in entries), dtype=np.int64)
+        positions = np.fromiter(chain.from_iterable(entry[2] for entry in entries), dtype=np.int64)
+        gaps = np.diff(positions, prepend=0)
+        starts = _group_starts(freqs)
+        gaps[starts] = positions[starts]
+        _write_segment(
+            path, terms, df, docs, freqs, gaps,
+            np.array(self.spans, dtype=np.float64),
+            np.array(self.span_offsets),
+            b"".join(self.stored),
+            np.r_[0, np.cumsum([len(line) for line in self.stored])]
+        )
+
+class TranscriptIndex:
+    """
+    On-disk inverted index over call transcripts and analyses.
+
+    Documents are buffered in memory and written as immutable segments:
+    a sorted term dictionary and delta-encoded varint postings with token
+    positions, memory-mapped for queries. Each flush appends a segment
+    without touching the others; once there are more than ``max_segments``,
+    a background thread merges the ``merge_factor`` adjacent segments
+    holding the fewest documents into one. A merge decodes and re-encodes
+    whole posting streams at once with NumPy. Segments are written without
+    holding the index lock, so documents keep being added and searched
+    meanwhile; only the manifest swap takes it. The manifest is replaced
+    atomically, so a crash leaves the last complete set of segments.
+
+    Queries match every clause:
+
+    - ``word`` matches the word;
+    - ``pric*`` matches words starting with ``pric``;
+    - ``"send the contract"`` matches the exact phrase;
+    - ``where`` filters on metadata, e.g. ``{"rep_id": "r1"}``.
+
+    Each hit carries the transcript segments it matched in, with their
+    start and end times in the audio. A query decodes only the postings of
+    its terms, so most queries take milliseconds over hundreds of thousands
+    of calls; phrases of words found in nearly every call cost the most.
+
+    Documents become searchable when they are flushed: every ``flush_docs``
+    documents, or once the oldest pending one is ``flush_seconds`` old (checked
+    on ``add`` and ``search``), or on ``flush`` and ``close``.
+    ``close`` also waits for a running merge.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_docs: int = 256,
+        flush_seconds: Optional[float] = 5.0,
+        max_segments: int = 10,
+        merge_factor: int = 4,
+        max_expansions: int = 50
+    ):
+        """
+        Args:
+            path: Index directory; created if missing, reopened if it holds
+                an index; any other non-empty directory is refused
+            flush_docs: Pending documents that trigger a flush
+            flush_seconds: Age of the oldest pending document that triggers
+                a flush; None flushes only by count
+            max_segments: Segments kept before a merge
+            merge_factor: Adjacent segments merged at once
+            max_expansions: Most frequent terms a prefix query expands to
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.flush_docs = flush_docs
+        self.flush_seconds = flush_seconds
+        self.max_segments = max(1, max_segments)
+        self.merge_factor = max(2, merge_factor)
+        self.max_expansions = max_expansions
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()  # keeps flushed segments in insertion order
+        self._merge_lock = threading.Lock()
+        self._merger: Optional[threading.Thread] = None
+        self._segments: List[_Segment] = []
+        self._next_segment = 0
+        self._buffer = _Buffer()
+        self._flushing = 0  # documents being written by a flush
+        self._open()
+
+    def _open(self) -> None:
+        manifest = self.path / _MANIFEST
+        if not manifest.exists():
+            if any(entry.name != f"{_MANIFEST}.tmp" for entry in self.path.iterdir()):
+                raise ValueError(f"Not a search index (no {_MANIFEST}) and not empty: {self.path}")
+            self._write_manifest([])
+            return
+        data = json.loads(manifest.read_text())
+        self._segments = [_Segment(self.path / name) for name in data["segments"]]
+        self._next_segment = data["next_segment"]
+        live = {segment.name for segment in self._segments}
+        for entry in self.path.iterdir():
+            if entry.is_dir() and _SEGMENT_DIR.fullmatch(entry.name) and entry.name not in live:
+                # Left by a flush or merge that did not reach the manifest
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def _write_manifest(self, segments: List[_Segment]) -> None:
+        """Atomically replace the manifest with this list of segments."""
+        manifest = {"segments": [s.name for s in segments], "next_segment": self._next_segment}
+        tmp = self.path / f"{_MANIFEST}.tmp"
+        tmp.write_text(canonical_json(manifest))
+        os.replace(tmp, self.path / _MANIFEST)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(segment.size for segment in self._segments) + len(self._buffer.stored) + self._flushing
+
+    # Indexing
+
+    def add_document(
+        self,
+        call_id: str,
+        spans: Sequence[Tuple[str, Optional[float], Optional[float]]],
+        source: str = "transcript",
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Index a document as a sequence of timed text spans.
+
+        Args:
+            call_id: Call the document belongs to; a call may have a
+                transcript and any number of analyses
+            spans: ``(text, start, end)`` per segment; times may be None
+            source: "transcript", "analysis" or another label, filterable
+                with ``where={"source": ...}``
+            metadata: Stored with the document; scalar values are indexed
+                for ``where`` filters
+        """
+        metadata = dict(metadata or {})
+        fields = {**metadata, "source": source, "call_id": call_id}
+        field_terms = [
+            _field_term(key, value) for key, value in fields.items()
+            if isinstance(value, (str, int, float, bool))
+        ]
+        with self._lock:
+            buffer = self._buffer
+            doc = len(buffer.stored)
+            positions: Dict[str, List[int]] = {}
+            texts: List[str] = []
+            count = 0
+            for text, start, end in spans:
+                buffer.spans.append((np.nan if start is None else start, np.nan if end is None else end))
+                texts.append(text)
+                for token in tokenize(text):
+                    positions.setdefault(token, []).append(count)
+                    count += 1
+            for term, found in positions.items():
+                entry = buffer.postings.setdefault(term, ([], [], []))
+                entry[0].append(doc)
+                entry[1].append(len(found))
+                entry[2].extend(found)
+            for term in field_terms:
+                entry = buffer.postings.setdefault(term, ([], [], []))
+                if not entry[0] or entry[0][-1] != doc:
+                    entry[0].append(doc)
+                    entry[1].append(0)
+            buffer.span_offsets.append(len(buffer.spans))
+            record = {"call_id": call_id, "source": source, "metadata": metadata, "texts": texts}
+            buffer.stored.append(canonical_json(record).encode("utf-8") + b"\n")
+            if buffer.pending_since is None:
+                buffer.pending_since = time.monotonic()
+            metrics.inc("search_documents_indexed_total", labels={"source": source})
+        self._maybe_flush()
+
+    def add_transcript(self, call_id: str, transcript: Any, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Index a call transcript.
+
+        Args:
+            call_id: Call id
+            transcript: A Whisper result (its ``segments`` keep their
+                timestamps), a list of segments, turns (``{"speaker",
+                "content"}``) or strings, or plain text
+            metadata: E.g. ``{"rep_id": ...}``
+        """
+        if isinstance(transcript, dict):
+            transcript = transcript.get("segments") or [transcript.get("text", "")]
+        elif isinstance(transcript, str):
+            transcript = [transcript]
+        spans = []
+        for item in transcript:
+            if isinstance(item, dict):
+                text = item.get("text") or item.get("content") or ""
+                speaker = item.get("speaker") or item.get("role")
+                spans.append((f"{speaker}: {text}" if speaker else text, item.get("start"), item.get("end")))
+            else:
+                spans.append((to_prompt_text(item), None, None))
+        self.add_document(call_id, spans, "transcript", metadata)
+
+    def add_analysis(self, call_id: str, result: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Index an ``AnalystAgent`` result, one span per line of its content."""
+        lines = [line for line in to_prompt_text(result.get("content", "")).splitlines() if line.strip()]
+        base = {"analysis_type": result.get("analysis_type"), **(metadata or {})}
+        self.add_document(call_id, [(line, None, None) for line in lines], "analysis", base)
+
+    def _flush_due(self) -> bool:
+        pending = len(self._buffer.stored)
+        if not pending:
+            return False
+        aged = self.flush_seconds is not None and time.monotonic() - self._buffer.pending_since >= self.flush_seconds
+        return pending >= self.flush_docs or aged
+
+    def _maybe_flush(self) -> None:
+        with self._lock:
+            if not self._flush_due():
+                return
+        # Another thread already flushing picks up the rest on a later add or search
+        if self._flush_lock.acquire(blocking=False):
+            try:
+                with self._lock:
+                    due = self._flush_due()
+                if due:
+                    self._flush()
+            finally:
+                self._flush_lock.release()
+
+    def flush(self) -> Optional[str]:
+        """Write pending documents as a new segment; returns its name, or None if nothing was pending."""
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self) -> Optional[str]:
+        with self._lock:
+            if not self._buffer.stored:
+                return None
+            buffer, self._buffer = self._buffer, _Buffer()
+            self._flushing = len(buffer.stored)
+            path = self._reserve_segment()
+        try:
+            with metrics.span("search_flush"):
+                buffer.write(path)
+                segment = _Segment(path)
+        except BaseException:
+            with self._lock:
+                # Put the documents back ahead of any added meanwhile
+                buffer.extend(self._buffer)
+                self._buffer = buffer
+                self._flushing = 0
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+        with self._lock:
+            self._commit_segment(segment, replaces=[])
+            self._flushing = 0
+            if len(self._segments) > self.max_segments:
+                self._schedule_merge()
+        metrics.inc("search_segments_flushed_total")
+        return segment.name
+
+    def _reserve_segment(self) -> Path:
+        """A fresh segment directory name; call with the lock held."""
+        name = f"seg_{self._next_segment:08d}"
+        self._next_segment += 1
+        return self.path / name
+
+    def _commit_segment(self, segment: _Segment, replaces: List[_Segment]) -> None:
+        """Swap a written segment into the manifest in place of ``replaces`` (or at the end); call with the lock held."""
+        segments = list(self._segments)
+        if replaces:
+            at = segments.index(replaces[0])
+            segments[at:at + len(replaces)] = [segment]
+        else:
+            segments.append(segment)
+        self._write_manifest(segments)
+        # Searches already running keep their mapped copies of replaced segments
+        self._segments = segments
+
+    def _schedule_merge(self) -> None:
+        """Start the merge thread unless it is running; call with the lock held."""
+        if self._merger is not None and self._merger.is_alive():
+            return
+        self._merger = threading.Thread(target=self._merge_loop, name="transcript-index-merge", daemon=True)
+        self._merger.start()
+
+    def _merge_loop(self) -> None:
+        try:
+            while True:
+                with self._merge_lock:
+                    with self._lock:
+                        if len(self._segments) <= self.max_segments:
+                            # Checked under the lock a flush schedules merges under, so none is missed
+                            self._merger = None
+                            return
+                        k = min(self.merge_factor, len(self._segments))
+                        sizes = np.array([segment.size for segment in self._segments])
+                        window = np.convolve(sizes, np.ones(k, dtype=np.int64), mode="valid")
+                        first = int(np.argmin(window))
+                        segments = self._segments[first:first + k]
+                    self._merge(segments)
+        except Exception:
+            logger.exception("Background merge of search segments failed")
+            with self._lock:
+                self._merger = None
+
+    def merge(self, segments: Optional[List[_Segment]] = None) -> None:
+        """
+        Merge adjacent segments into one (by default, all of them).
+
+        Merging keeps documents in insertion order, so ties in a query's
+        ranking still favour the most recent calls.
+        """
+        if segments is None:
+            self.flush()
+        with self._merge_lock:
+            with self._lock:
+                current = list(self._segments)
+            segments = current if segments is None else list(segments)
+            if len(segments) < 2 or any(segment not in current for segment in segments):
+                return
+            self._merge(segments)
+
+    def _merge(self, segments: List[_Segment]) -> None:
+        """Write the merged segment, then swap it in; call with the merge lock held."""
+        with self._lock:
+            path = self._reserve_segment()
+        try:
+            with metrics.span("search_merge"):
+                self._write_merged(path, segments)
+                merged = _Segment(path)
+        except BaseException:
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+        with self._lock:
+            self._commit_segment(merged, replaces=segments)
+        for old in segments:
+            shutil.rmtree(old.path, ignore_errors=True)
+        metrics.inc("search_segments_merged_total", len(segments))
+        logger.info("Merged %d search segments into %s (%d documents)", len(segments), merged.name, merged.size)
+
+    @staticmethod
+    def _write_merged(path: Path, segments: List[_Segment]) -> None:
+        vocabulary = sorted(set(chain.from_iterable(segment.terms for segment in segments)))
+        ids = {term: i for i, term in enumerate(vocabulary)}
+        term_of, docs, freqs, gaps = [], [], [], []
+        spans, span_offsets, stored, stored_offsets = [], [np.zeros(1, dtype=np.int64)], [], [np.zeros(1, dtype=np.int64)]
+        doc_base = span_base = stored_base = 0
+        for segment in segments:
+            df, seg_docs, seg_freqs, seg_gaps = segment.raw()
+            mapped = np.fromiter((ids[term] for term in segment.terms), dtype=np.int64, count=len(segment.terms))
+            term_of.append(np.repeat(mapped, df))
+            docs.append(seg_docs + doc_base)
+            freqs.append(seg_freqs)
+            gaps.append(seg_gaps)
+            spans.append(np.asarray(segment.spans))
+            span_offsets.append(segment.span_offsets[1:] + span_base)
+            stored.append(segment.stored.tobytes())
+            stored_offsets.append(segment.stored_offsets[1:] + stored_base)
+            doc_base += segment.size
+            span_base += len(segment.spans)
+            stored_base += len(segment.stored)
+        term_of, docs, freqs, gaps = map(np.concatenate, (term_of, docs, freqs, gaps))
+        # Stable, so each term keeps its postings in segment (and document) order
+        order = np.argsort(term_of, kind="stable")
+        group_start = np.cumsum(freqs) - freqs
+        freqs = freqs[order]
+        within = np.arange(gaps.size) - np.repeat(np.cumsum(freqs) - freqs, freqs)
+        gaps = gaps[np.repeat(group_start[order], freqs) + within]
+        _write_segment(
+            path, vocabulary, np.bincount(term_of, minlength=len(vocabulary)),
+            docs[order], freqs, gaps,
+            np.concatenate(spans), np.concatenate(span_offsets),
+            b"".join(stored), np.concatenate(stored_offsets)
+        )
+
+    def close(self) -> None:
+        """Flush pending documents and wait for a running merge."""
+        self.flush()
+        merger = self._merger
+        if merger is not None:
+            merger.join()
+
+    # Queries
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        where: Optional[Dict[str, Any]] = None,
+        max_matches: int = 5
+    ) -> List[SearchHit]:
+        """
+        Find calls matching every clause of ``query``.
+
+        Hits are ranked by a TF-IDF score over the clauses, most recent
+        first among equals; an empty query lists the most recent documents
+        matching ``where``.
+
+        Args:
+            query: Words, ``prefix*`` terms and ``"quoted phrases"``
+            limit: Maximum number of hits
+            where: Metadata that must match, e.g. ``{"rep_id": "r1"}``,
+                ``{"source": "analysis"}`` or ``{"call_id": ...}``
+            max_matches: Matches returned per hit, earliest first
+
+        Returns:
+            List[SearchHit]: Best first
+        """
+        self._maybe_flush()
+        with self._lock:
+            segments = list(self._segments)
+        if limit <= 0 or not segments:
+            return []
+        with metrics.span("search_query"):
+            clauses = self._parse(query)
+            filters = [_field_term(key, value) for key, value in (where or {}).items()]
+            results = [self._evaluate(segment, clauses, filters) for segment in segments]
+            total = sum(segment.size for segment in segments)
+            weights = []
+            for c in range(len(clauses)):
+                df = sum(result[1][c][0].size for result in results if result is not None)
+                weights.append(np.log1p(total / max(df, 1)))
+
+            candidates: List[Tuple[int, np.ndarray, np.ndarray]] = []
+            for s, result in enumerate(results):
+                if result is None or result[0].size == 0:
+                    continue
+                docs, postings = result
+                score = np.zeros(docs.size)
+                for weight, (clause_docs, tf) in zip(weights, postings):
+                    score += weight * (1.0 + np.log(np.maximum(tf[np.searchsorted(clause_docs, docs)], 1)))
+                candidates.append((s, docs, score))
+            if not candidates:
+                return []
+            seg_ids = np.concatenate([np.full(docs.size, s) for s, docs, _ in candidates])
+            doc_ids = np.concatenate([docs for _, docs, _ in candidates])
+            scores = np.concatenate([score for _, _, score in candidates])
+            if scores.size > limit:
+                keep = np.flatnonzero(scores >= np.partition(scores, -limit)[-limit])
+                seg_ids, doc_ids, scores = seg_ids[keep], doc_ids[keep], scores[keep]
+            top = np.lexsort((doc_ids, seg_ids, scores))[::-1][:limit]
+            return [
+                self._hit(segments[s], int(d), float(score), clauses, max_matches)
+                for s, d, score in zip(seg_ids[top], doc_ids[top], scores[top])
+            ]
+
+    @staticmethod
+    def _parse(query: str) -> List[Tuple[str, List[str]]]:
+        """Clauses as ``("terms", words)`` (a phrase when several) or ``("prefix", [stem])``."""
+        clauses = []
+        for phrase, word in _QUERY.findall(query):
+            if word.endswith("*") and len(tokenize(word)) == 1:
+                clauses.append(("prefix", tokenize(word)))
+                continue
+            words = tokenize(phrase or word)
+            if words:
+                clauses.append(("terms", words))
+        return clauses
+
+    def _evaluate(
+        self,
+        segment: _Segment,
+        clauses: List[Tuple[str, List[str]]],
+        filters: List[str]
+    ) -> Optional[Tuple[np.ndarray, List[Tuple[np.ndarray, np.ndarray]]]]:
+        """Documents of a segment matching every clause and filter, and each clause's documents and frequencies."""
+        docs: Optional[np.ndarray] = None
+        for term in filters:
+            t = segment.lookup(term)
+            if t is None:
+                return None
+            found = segment.postings(np.array([t]))[0]
+            docs = found if docs is None else np.intersect1d(docs, found, assume_unique=True)
+        postings = []
+        for kind, words in clauses:
+            if kind == "prefix":
+                clause = self._prefix(segment, words[0])
+            else:
+                # Phrases only check positions in documents still matching the filters and earlier clauses
+                clause = self._phrase(segment, words, docs)
+            if clause[0].size == 0:
+                return None
+            postings.append(clause)
+            docs = clause[0] if docs is None else np.intersect1d(docs, clause[0], assume_unique=True)
+        if docs is None:
+            docs = np.arange(segment.size)
+        return docs, postings
+
+    def _prefix(self, segment: _Segment, stem: str) -> Tuple[np.ndarray, np.ndarray]:
+        matching = segment.prefix_range(stem)
+        if not matching:
+            return _NO_POSTINGS
+        terms = np.arange(matching.start, matching.stop)
+        if terms.size > self.max_expansions:
+            df = segment.dict[matching.start:matching.stop, 0]
+            terms = np.sort(terms[np.argpartition(-df, self.max_expansions - 1)[:self.max_expansions]])
+        return segment.postings(terms)
+
+    def _phrase(self, segment: _Segment, words: List[str], within: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        ids = [segment.lookup(word) for word in words]
+        if any(t is None for t in ids):
+            return _NO_POSTINGS
+        if len(ids) == 1:
+            return segment.postings(np.array(ids))
+        docs = within
+        for t in sorted(set(ids), key=segment.df):
+            found = segment.postings(np.array([t]))[0]
+            docs = found if docs is None else np.intersect1d(docs, found, assume_unique=True)
+            if docs.size == 0:
+                return _NO_POSTINGS
+        candidate = np.zeros(segment.size, dtype=bool)
+        candidate[docs] = True
+        # A match is a (document, start) key present for every word at its offset;
+        # occurrences come sorted by document and position, so the keys are sorted too
+        starts: Optional[np.ndarray] = None
+        occurrences = {t: segment.occurrences(t, candidate) for t in set(ids)}
+        for offset, t in enumerate(ids):
+            hit_docs, hit_pos = occurrences[t]
+            keep = hit_pos >= offset
+            keys = (hit_docs[keep] << 32) | (hit_pos[keep] - offset)
+            if starts is not None:
+                at = np.minimum(np.searchsorted(keys, starts), max(keys.size - 1, 0))
+                keys = starts[keys[at] == starts] if keys.size else keys
+            starts = keys
+            if starts.size == 0:
+                return _NO_POSTINGS
+        return np.unique(starts >> 32, return_counts=True)
+
+    def _hit(
+        self,
+        segment: _Segment,
+        doc: int,
+        score: float,
+        clauses: List[Tuple[str, List[str]]],
+        max_matches: int
+    ) -> SearchHit:
+        """Build a hit, finding its matches in the stored segment texts."""
+        record = segment.document(doc)
+        tokens: List[str] = []
+        span_of: List[int] = []
+        for i, text in enumerate(record["texts"]):
+            words = tokenize(text)
+            tokens += words
+            span_of += [i] * len(words)
+        found = set()
+        for kind, words in clauses:
+            if kind == "prefix":
+                found.update((i, i) for i, token in enumerate(tokens) if token.startswith(words[0]))
+                continue
+            n = len(words)
+            found.update(
+                (i, i + n - 1) for i, token in enumerate(tokens)
+                if token == words[0] and tokens[i:i + n] == words
+            )
+        matches: List[SearchMatch] = []
+        seen = set()
+        base = int(segment.span_offsets[doc])
+        for first, last in sorted(found):
+            a, b = span_of[first], span_of[last]
+            if (a, b) in seen:
+                continue
+            seen.add((a, b))
+            start, end = segment.spans[base + a, 0], segment.spans[base + b, 1]
+            matches.append(SearchMatch(
+                None if np.isnan(start) else float(start),
+                None if np.isnan(end) else float(end),
+                " ".join(text.strip() for text in record["texts"][a:b + 1]),
+                a
+            ))
+            if len(matches) >= max_matches:
+                break
+        return SearchHit(record["call_id"], record["source"], score, record["metadata"], matches)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Segments, documents (flushed and pending) and bytes on disk."""
+        with self._lock:
+            segments = list(self._segments)
+            pending = len(self._buffer.stored) + self._flushing
+        size = sum(f.stat().st_size for segment in segments for f in segment.path.iterdir())
+        return {
+            "segments": len(segments),
+            "documents": sum(segment.size for segment in segments),
+            "pending": pending,
+            "bytes": size
+        }
@@ -0,0 +1,29 @@
+"""
+Voice pipeline: Whisper transcription feeding the LLM.
+
+Public names are resolved lazily on first access. The Whisper backend (and
+with it torch) is only imported when a ``WhisperClient`` first loads its model.
+"""
+import importlib
+from typing import Any
+
+_EXPORTS = {
+    "WhisperClient": ".whisper_client",
+    "WhisperConfig": ".whisper_client",
+    "VoiceLLMOrchestrator": ".voice_llm_orchestrator",
+    "VoiceLLMConfig": ".voice_llm_orchestrator",
+    "MultiSessionVoiceOrchestrator": ".sessions",
+    "SessionConfig": ".sessions",
+    "WhisperBackend": ".backends",
+    "register_backend": ".backends",
+    "available_backends": ".backends",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
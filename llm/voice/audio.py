@@ -0,0 +1,152 @@
+import struct
+import subprocess
+import logging
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000  # Whisper models expect 16 kHz mono
+
+def _resample(samples: np.ndarray, rate: int, target: int = SAMPLE_RATE) -> np.ndarray:
+    """Linear-interpolation resampling; adequate for speech recognition input."""
+    if rate == target or len(samples) == 0:
+        return samples
+    positions = np.arange(int(len(samples) * target / rate)) * (rate / target)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+class WavFile:
+    """
+    A 16-bit PCM WAV file mapped into memory.
+
+    Samples are paged in by the OS as slices are read, so a long recording
+    can be cut into chunks without loading it whole.
+    """
+
+    def __init__(self, path: str):
+        """
+        Map a WAV file.
+
+        Raises:
+            ValueError: If the file is not 16-bit PCM WAV
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(12)
+            if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+                raise ValueError(f"Not a WAV file: {path}")
+            fmt = None
+            data_offset = data_size = None
+            while True:
+                chunk = f.read(8)
+                if len(chunk) < 8:
+                    break
+                chunk_id, size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+                if chunk_id == b"fmt ":
+                    fmt = f.read(size)
+                    f.seek(size % 2, 1)
+                elif chunk_id == b"data":
+                    data_offset, data_size = f.tell(), size
+                    break
+                else:
+                    f.seek(size + size % 2, 1)
+        if fmt is None or data_offset is None:
+            raise ValueError(f"WAV file has no fmt or data chunk: {path}")
+        audio_format, self.channels, self.sample_rate, _, _, bits = struct.unpack("<HHIIHH", fmt[:16])
+        if audio_format not in (1, 0xFFFE) or bits != 16:
+            raise ValueError(f"Unsupported WAV encoding: format {audio_format}, {bits} bits")
+        frames = data_size // (2 * self.channels)
+        self.samples = np.memmap(path, dtype="<i2", mode="r", offset=data_offset, shape=(frames, self.channels))
+
+    @property
+    def duration(self) -> float:
+        """Length in seconds."""
+        return len(self.samples) / float(self.sample_rate)
+
+    def read(self, start: float = 0.0, end: Optional[float] = None) -> np.ndarray:
+        """
+        Read ``[start, end)`` seconds as 16 kHz mono float32 samples.
+
+        Args:
+            start: Start time in seconds
+            end: End time in seconds; defaults to the end of the file
+        """
+        first = max(0, int(start * self.sample_rate))
+        last = len(self.samples) if end is None else min(len(self.samples), int(end * self.sample_rate))
+        samples = self.samples[first:last].astype(np.float32) / 32768.0
+        samples = samples.mean(axis=1) if self.channels > 1 else samples[:, 0]
+        return _resample(samples, self.sample_rate)
+
+    def quietest_point(self, start: float, end: float, frame_seconds: float = 0.03) -> float:
+        """Time of the lowest-energy frame in ``[start, end)``, for cutting between words."""
+        first = max(0, int(start * self.sample_rate))
+        window = self.samples[first:int(end * self.sample_rate)].astype(np.float32)
+        frame = max(1, int(frame_seconds * self.sample_rate))
+        count = len(window) // frame
+        if count == 0:
+            return start
+        energy = np.square(window[:count * frame]).reshape(count, -1).mean(axis=1)
+        return (first + int(np.argmin(energy)) * frame + frame / 2) / self.sample_rate
+
+    def split_at_silence(self, chunk_seconds: float, search_seconds: float = 5.0) -> List[float]:
+        """
+        Boundaries that cut the recording into chunks of about ``chunk_seconds``.
+
+        Each cut is moved to the quietest frame within ``search_seconds``
+        of its target, but never back to or before the previous cut, so
+        chunks end in pauses rather than mid-word.
+
+        Returns:
+            List[float]: Increasing boundary times, starting at 0 and ending at the duration
+        """
+        duration = self.duration
+        boundaries = [0.0]
+        while duration - boundaries[-1] > chunk_seconds + search_seconds:
+            target = boundaries[-1] + chunk_seconds
+            cut = self.quietest_point(max(target - search_seconds, boundaries[-1]), target + search_seconds)
+            boundaries.append(cut if cut > boundaries[-1] else target)
+        boundaries.append(duration)
+        return boundaries
+
+def pcm16_to_samples(data: bytes, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Convert raw little-endian 16-bit mono PCM, such as streamed microphone
+    frames, into 16 kHz float32 samples.
+
+    Args:
+        data: PCM bytes; a trailing odd byte is ignored
+        sample_rate: Sample rate of ``data`` in Hz
+    """
+    samples = np.frombuffer(data[:len(data) - len(data) % 2], dtype="<i2").astype(np.float32) / 32768.0
+    return _resample(samples, sample_rate)
+
+def _load_ffmpeg(path: str) -> np.ndarray:
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0", "-i", path,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-"
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to load audio: {e.stderr.decode(errors='replace')}") from e
+    return np.frombuffer(out, dtype="<i2").astype(np.float32) / 32768.0
+
+def load_audio(path: str) -> np.ndarray:
+    """
+    Load an audio file as 16 kHz mono float32 samples in [-1, 1].
+
+    16-bit PCM WAV files are read directly; anything else is decoded with
+    ffmpeg, as the Whisper backends do.
+
+    Args:
+        path: Path to the audio file
+
+    Returns:
+        np.ndarray: Sample array accepted by every ``WhisperBackend``
+    """
+    try:
+        return WavFile(path).read()
+    except ValueError:
+        logger.debug("%s is not 16-bit PCM WAV, decoding with ffmpeg", path)
+        return _load_ffmpeg(path)
@@ -0,0 +1,184 @@
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Type, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .whisper_client import WhisperConfig
+
+logger = logging.getLogger(__name__)
+
+class WhisperBackend(ABC):
+    """
+    Speech-to-text engine behind ``WhisperClient``.
+
+    ``transcribe`` mirrors ``whisper.Whisper.transcribe``: it takes a file path
+    or a 16 kHz float32 sample array plus the standard decode options
+    (``language``, ``temperature``, ``best_of``, ``beam_size``,
+    ``condition_on_previous_text``, ``initial_prompt``) and returns a dict with
+    ``text``, ``segments`` and ``language``. Each segment carries ``id``,
+    ``start``, ``end``, ``text``, ``avg_logprob``, ``compression_ratio`` and
+    ``no_speech_prob``.
+    """
+
+    name: str = ""
+
+    def __init__(self, config: "WhisperConfig"):
+        self.config = config
+
+    @property
+    def max_concurrency(self) -> int:
+        """Calls to ``transcribe`` that may usefully run at once from different threads."""
+        return 1
+
+    @abstractmethod
+    def transcribe(self, audio: Any, **options) -> Dict[str, Any]:
+        """Transcribe audio into Whisper-shaped output."""
+        pass
+
+class OpenAIWhisperBackend(WhisperBackend):
+    """Reference PyTorch implementation (``openai-whisper``)."""
+
+    name = "openai"
+
+    def __init__(self, config: "WhisperConfig"):
+        super().__init__(config)
+        import whisper
+        if config.cpu_threads:
+            import torch
+            # Process-wide: torch has no per-model thread pool
+            torch.set_num_threads(config.cpu_threads)
+        self.model = whisper.load_model(config.model_name, device=config.device)
+        # Each decode installs kv-cache hooks on the shared model, so decodes
+        # from different threads would overwrite each other's cache
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio: Any, **options) -> Dict[str, Any]:
+        with self._lock:
+            return self.model.transcribe(audio, **options)
+
+class FasterWhisperBackend(WhisperBackend):
+    """
+    CTranslate2 implementation (``faster-whisper``).
+
+    Runs quantized weights (``compute_type="int8"`` by default) with its own
+    intra-op thread pool sized by ``cpu_threads``, which is several times
+    faster than the PyTorch model on CPU.
+    """
+
+    name = "faster-whisper"
+
+    def __init__(self, config: "WhisperConfig"):
+        super().__init__(config)
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(
+            config.model_name,
+            device=config.device or "auto",
+            compute_type=config.compute_type,
+            cpu_threads=config.cpu_threads,
+            num_workers=config.num_workers
+        )
+
+    @property
+    def max_concurrency(self) -> int:
+        return max(1, self.config.num_workers)
+
+    def transcribe(self, audio: Any, **options) -> Dict[str, Any]:
+        # openai-whisper treats beam_size=None as greedy; CTranslate2 wants 1
+        for key in ("beam_size", "best_of"):
+            if options.get(key) is None:
+                options[key] = 1
+        segments, info = self.model.transcribe(audio, **options)
+        # faster-whisper yields segments lazily; decoding happens here
+        results: List[Dict[str, Any]] = [
+            {
+                "id": i,
+                "start": segment.start,
+                "end": segment.end,
+                "text": segment.text,
+                "avg_logprob": segment.avg_logprob,
+                "compression_ratio": segment.compression_ratio,
+                "no_speech_prob": segment.no_speech_prob
+            }
+            for i, segment in enumerate(segments)
+        ]
+        return {
+            "text": "".join(segment["text"] for segment in results),
+            "segments": results,
+            "language": info.language
+        }
+
+class FakeWhisperBackend(WhisperBackend):
+    """
+    Offline stand-in (``FakeWhisperModel``) that sleeps in proportion to the
+    audio and returns canned text, for tests and load tests without weights.
+    """
+
+    name = "fake"
+
+    def __init__(self, config: "WhisperConfig"):
+        super().__init__(config)
+        from .fake_whisper import FakeWhisperModel
+        self.model = FakeWhisperModel()
+
+    @property
+    def max_concurrency(self) -> int:
+        return self.model.max_concurrency
+
+    def transcribe(self, audio: Any, **options) -> Dict[str, Any]:
+        return self.model.transcribe(audio, **options)
+
+_BACKENDS: Dict[str, Type[WhisperBackend]] = {
+    OpenAIWhisperBackend.name: OpenAIWhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+    FakeWhisperBackend.name: FakeWhisperBackend,
+}
+
+_BACKEND_MODULES = {
+    OpenAIWhisperBackend.name: "whisper",
+    FasterWhisperBackend.name: "faster_whisper",
+}
+
+def register_backend(name: str, backend_class: Type[WhisperBackend], module: Optional[str] = None) -> None:
+    """
+    Make a backend selectable through ``WhisperConfig.backend``.
+
+    Args:
+        name: Backend name
+        backend_class: ``WhisperBackend`` subclass, built with a ``WhisperConfig``
+        module: Import name of the engine it needs, checked by ``available_backends``
+    """
+    _BACKENDS[name] = backend_class
+    if module:
+        _BACKEND_MODULES[name] = module
+
+def available_backends() -> List[str]:
+    """Names of registered backends whose engine is installed."""
+    import importlib.util
+    return [
+        name for name in _BACKENDS
+        if name not in _BACKEND_MODULES or importlib.util.find_spec(_BACKEND_MODULES[name]) is not None
+    ]
+
+def load_backend(config: "WhisperConfig") -> WhisperBackend:
+    """
+    Build the backend selected by ``config.backend``.
+
+    ``"auto"`` prefers faster-whisper and falls back to openai-whisper.
+
+    Raises:
+        ValueError: If the backend name is unknown or no engine is installed
+    """
+    name = config.backend
+    if name == "auto":
+        installed = available_backends()
+        for candidate in (FasterWhisperBackend.name, OpenAIWhisperBackend.name):
+            if candidate in installed:
+                name = candidate
+                break
+        else:
+            raise ValueError("No Whisper backend installed; install faster-whisper or openai-whisper")
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown Whisper backend: {name}. Available: {', '.join(sorted(_BACKENDS))}")
+    logger.info("Loading Whisper model %s with the %s backend", config.model_name, name)
+    return _BACKENDS[name](config)
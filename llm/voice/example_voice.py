@@ -8,11 +8,12 @@ from .whisper_client import WhisperConfig
 from .voice_llm_orchestrator import VoiceLLMOrchestrator, VoiceLLMConfig
 from ..prompts.prompt_manager import FileBasedPromptManager
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def main():
+    # Configure logging
+    logging.basicConfig(level=logging.INFO)
+    
     # Get the directory of this script
     script_dir = Path(__file__).parent.parent
     
@@ -0,0 +1,94 @@
+import math
+import time
+import wave
+import struct
+from dataclasses import dataclass
+from typing import Dict, Any, List, Union
+
+SAMPLE_RATE = 16000
+SEGMENT_SECONDS = 5.0
+
+_WORDS = (
+    "thanks for taking the call today I wanted to walk you through how our "
+    "platform helps your team close deals faster and what pricing looks like "
+    "for a company of your size"
+).split()
+
+def write_sample_wav(path: str, seconds: float = 10.0, sample_rate: int = SAMPLE_RATE) -> str:
+    """
+    Write a mono 16-bit WAV with a tone interrupted by short silences.
+
+    Args:
+        path: Destination file
+        seconds: Duration of the recording
+        sample_rate: Sample rate in Hz
+
+    Returns:
+        str: The path that was written
+    """
+    frames = bytearray()
+    for i in range(int(seconds * sample_rate)):
+        t = i / sample_rate
+        # 0.4s of silence every 3 seconds, like pauses between utterances
+        amplitude = 0 if (t % 3.0) > 2.6 else 8000
+        frames += struct.pack("<h", int(amplitude * math.sin(2 * math.pi * 220 * t)))
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(bytes(frames))
+    return path
+
+def audio_duration(audio: Union[str, Any]) -> float:
+    """Duration in seconds of a WAV path or a 16 kHz sample array."""
+    if isinstance(audio, str):
+        with wave.open(audio, "rb") as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    return len(audio) / float(SAMPLE_RATE)
+
+@dataclass
+class FakeWhisperModel:
+    """
+    Stand-in for a loaded ``whisper.Whisper`` model.
+
+    ``transcribe`` sleeps for ``realtime_factor`` times the audio duration and
+    returns Whisper-shaped output, so the voice pipeline can be benchmarked
+    without loading real weights.
+    """
+    realtime_factor: float = 0.05
+    beam_cost: float = 2.0  # extra slowdown when beam search is requested
+    low_confidence_every: int = 0  # every Nth greedy segment scores below the fallback threshold
+    max_concurrency: int = 64  # sleeping is thread-safe, so chunks may decode in parallel
+
+    def transcribe(self, audio: Union[str, Any], **options) -> Dict[str, Any]:
+        """Pretend to transcribe audio, mirroring ``whisper.Whisper.transcribe``."""
+        duration = audio_duration(audio)
+        cost = self.realtime_factor * duration
+        beam = bool(options.get("beam_size") and options["beam_size"] > 1)
+        if beam:
+            cost *= self.beam_cost
+        time.sleep(cost)
+
+        segments: List[Dict[str, Any]] = []
+        start = 0.0
+        while start < duration:
+            end = min(duration, start + SEGMENT_SECONDS)
+            offset = int(start) % len(_WORDS)
+            text = " " + " ".join(_WORDS[offset:] + _WORDS[:offset])[:60]
+            every = self.low_confidence_every
+            low_confidence = not beam and every > 0 and len(segments) % every == every - 1
+            segments.append({
+                "id": len(segments),
+                "start": start,
+                "end": end,
+                "text": text,
+                "avg_logprob": -1.5 if low_confidence else -0.3,
+                "compression_ratio": 1.4,
+                "no_speech_prob": 0.01
+            })
+            start = end
+        return {
+            "text": "".join(seg["text"] for seg in segments),
+            "segments": segments,
+            "language": options.get("language") or "en"
+        }
@@ -0,0 +1,323 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional, BinaryIO, Dict, Any, Callable, Iterator, List, TYPE_CHECKING
+
+from ..metrics import metrics
+from ..prompts.prompt_manager import PromptTemplateManager
+from ..deadlines import AdmissionController
+from .whisper_client import WhisperClient
+from .voice_llm_orchestrator import VoicePipeline, VoiceLLMConfig
+
+if TYPE_CHECKING:
+    from ..memory import MemoryIndex
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class SessionConfig:
+    """Limits for the sessions of a ``MultiSessionVoiceOrchestrator``."""
+    max_sessions: int = 10000  # least recently active sessions are evicted beyond this
+    idle_timeout: Optional[float] = 900.0  # seconds without a turn before a session is evicted
+    max_history_messages: int = 20  # user and assistant messages kept per session
+    max_history_chars: int = 16000  # characters kept per session; oldest turns go first
+    compact_history: bool = True  # keep what the user said instead of the whole formatted prompt
+
+class VoiceSession:
+    """
+    Per-caller conversation state: the only thing a session owns.
+
+    The history starts with the orchestrator's shared system message, so a
+    fresh session costs one small object and a one-element list.
+    """
+
+    __slots__ = ("session_id", "history", "scope", "chars", "last_active", "lock", "in_use")
+
+    def __init__(self, session_id: str, system_message: Dict[str, str], scope: Optional[Dict[str, Any]] = None):
+        self.session_id = session_id
+        self.history: List[Dict[str, str]] = [system_message]
+        self.scope = scope  # memory filter and tags, e.g. {"rep_id": ...}
+        self.chars = 0  # characters in the history after the system message
+        self.last_active = time.monotonic()
+        self.lock = threading.Lock()  # turns in one session run one at a time
+        self.in_use = 0  # turns holding or waiting for the lock; such a session is never evicted
+
+class MultiSessionVoiceOrchestrator(VoicePipeline):
+    """
+    Voice orchestrator serving many concurrent callers.
+
+    Every session shares one Whisper client (and model), one LLM client
+    (and its connection pool), the prompt manager, admission control and
+    the memory index; a session only holds its capped conversation
+    history. Sessions are created on first use. They are evicted, least
+    recently active first, once idle for ``idle_timeout`` or when more
+    than ``max_sessions`` exist, so memory stays flat however many callers
+    come and go. A session in the middle of a turn is never evicted, so
+    the count can briefly exceed ``max_sessions`` under load. Eviction is
+    checked as sessions are touched; call
+    ``evict_idle`` from a timer to also reclaim memory while traffic is quiet.
+    """
+
+    def __init__(
+        self,
+        prompt_manager: PromptTemplateManager,
+        config: Optional[VoiceLLMConfig] = None,
+        session_config: Optional[SessionConfig] = None,
+        admission: Optional[AdmissionController] = None,
+        memory: Optional["MemoryIndex"] = None,
+        llm_client: Optional[Any] = None,
+        whisper_client: Optional[WhisperClient] = None,
+        on_evict: Optional[Callable[[VoiceSession], None]] = None
+    ):
+        """
+        Args:
+            prompt_manager: Source of prompt templates
+            config: Pipeline configuration shared by every session
+            session_config: Session limits
+            admission: Optional admission controller shared by every session
+            memory: Optional retrieval index; each session's ``scope`` filters
+                and tags its snippets, defaulting to ``config.memory_scope``
+            llm_client: Client to use instead of one built from ``llm_config``
+            whisper_client: Client to use instead of one built from ``whisper_config``
+            on_evict: Called with each evicted session, e.g. to persist it
+        """
+        super().__init__(prompt_manager, config, admission, memory, llm_client, whisper_client)
+        self.session_config = session_config or SessionConfig()
+        self.on_evict = on_evict
+        self._system_message = {"role": "system", "content": self.config.system_prompt}
+        self._sessions: "OrderedDict[str, VoiceSession]" = OrderedDict()  # least recently active first
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def session(self, session_id: str, scope: Optional[Dict[str, Any]] = None) -> VoiceSession:
+        """
+        Get a session, creating it if needed, and mark it active.
+
+        The session can be evicted as soon as this returns; use ``locked``
+        to work on it.
+
+        Args:
+            session_id: Caller or connection id
+            scope: Memory scope for a new session (existing sessions keep theirs)
+        """
+        return self._checkout(session_id, scope, use=False)
+
+    @contextmanager
+    def locked(self, session_id: str) -> Iterator[VoiceSession]:
+        """
+        Hold a session's lock, creating the session if needed.
+
+        The session is marked in use in the same step that looks it up, so
+        it cannot be evicted between the lookup and the lock, nor while the
+        block runs.
+        """
+        session = self._checkout(session_id, None, use=True)
+        try:
+            with session.lock:
+                yield session
+        finally:
+            with self._lock:
+                session.in_use -= 1
+
+    def _checkout(self, session_id: str, scope: Optional[Dict[str, Any]], use: bool) -> VoiceSession:
+        """Look up or create a session, mark it active and evict others; ``use`` marks it in use."""
+        evicted: List[VoiceSession] = []
+        with self._lock:
+            now = time.monotonic()
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = VoiceSession(
+                    session_id,
+                    self._system_message,
+                    scope if scope is not None else self.config.memory_scope
+                )
+                self._sessions[session_id] = session
+                metrics.inc("voice_sessions_created_total")
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_active = now
+            if use:
+                session.in_use += 1
+            evicted = self._evict_locked(now)
+        self._notify(evicted)
+        return session
+
+    def end_session(self, session_id: str) -> bool:
+        """Drop a session; returns whether it existed."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self._notify([session])
+        return True
+
+    def evict_idle(self) -> int:
+        """Evict idle and excess sessions now; returns how many were evicted."""
+        with self._lock:
+            evicted = self._evict_locked(time.monotonic())
+        self._notify(evicted)
+        return len(evicted)
+
+    def _evict_locked(self, now: float) -> List[VoiceSession]:
+        """Pop sessions from the least recently active end while they are idle or over the cap, skipping busy ones."""
+        evicted: List[VoiceSession] = []
+        timeout = self.session_config.idle_timeout
+        excess = len(self._sessions) - self.session_config.max_sessions
+        for session in self._sessions.values():
+            if session.in_use:
+                # Mid-turn; the cap is exceeded until the turn ends
+                continue
+            if excess > 0:
+                reason = "capacity"
+            elif timeout is not None and now - session.last_active > timeout:
+                reason = "idle"
+            else:
+                break
+            excess -= 1
+            evicted.append(session)
+            metrics.inc("voice_sessions_evicted_total", labels={"reason": reason})
+        for session in evicted:
+            del self._sessions[session.session_id]
+        return evicted
+
+    def _notify(self, evicted: List[VoiceSession]) -> None:
+        if self.on_evict is None:
+            return
+        for session in evicted:
+            try:
+                self.on_evict(session)
+            except Exception as e:
+                logger.error("Eviction callback failed for session %s: %s", session.session_id, e)
+
+    def _commit(self, session: VoiceSession, text: str, user_message: Dict[str, str], response: str) -> None:
+        """Append a finished turn to a session and trim its history to the caps."""
+        if self.session_config.compact_history:
+            user_message = {"role": "user", "content": text}
+        session.history += [user_message, {"role": "assistant", "content": response}]
+        session.chars += len(user_message["content"]) + len(response)
+        history = session.history
+        config = self.session_config
+        drop = 0
+        while len(history) - 1 - drop > 2 and (
+            len(history) - 1 - drop > config.max_history_messages or session.chars > config.max_history_chars
+        ):
+            # Drop the oldest user/assistant pair, never the newest turn
+            session.chars -= len(history[1 + drop]["content"]) + len(history[2 + drop]["content"])
+            drop += 2
+        if drop:
+            del history[1:1 + drop]
+        session.last_active = time.monotonic()
+        self._record(text, response, session.scope)
+
+    def process_audio_file(self, session_id: str, audio_path: str, template_name: Optional[str] = None) -> str:
+        """
+        Process an audio file as the next turn of a session.
+
+        Args:
+            session_id: Session to continue
+            audio_path: Path to the audio file
+            template_name: Optional template name to use
+
+        Returns:
+            str: LLM response
+        """
+        return self._run_turn(
+            session_id,
+            lambda: self.whisper_client.transcribe_audio_file(audio_path),
+            template_name
+        )
+
+    def process_audio_data(self, session_id: str, audio_data: BinaryIO, template_name: Optional[str] = None) -> str:
+        """Process binary audio data as the next turn of a session."""
+        return self._run_turn(
+            session_id,
+            lambda: self.whisper_client.transcribe_audio_data(audio_data),
+            template_name
+        )
+
+    def _run_turn(self, session_id: str, transcribe: Callable[[], str], template_name: Optional[str]) -> str:
+        with self.turn_scope() as degraded:
+            text = transcribe()
+            logger.info("Transcribed text for session %s: %s", session_id, text)
+            return self.process_text(session_id, text, template_name, degraded)
+
+    def process_text(
+        self,
+        session_id: str,
+        text: str,
+        template_name: Optional[str] = None,
+        degraded: bool = False
+    ) -> str:
+        """
+        Answer text as the next turn of a session.
+
+        Args:
+            session_id: Session to continue
+            text: Input text
+            template_name: Optional template name to use
+            degraded: Send only the most recent history to keep the call cheap
+
+        Returns:
+            str: LLM response
+        """
+        with self.locked(session_id) as session:
+            messages, user_message, workload, tier = self._prepare_turn(
+                text, template_name, degraded, session.history, session.scope
+            )
+            response = self._respond(messages, workload, tier)
+            self._commit(session, text, user_message, response)
+        return response
+
+    def stream_text(
+        self,
+        session_id: str,
+        text: str,
+        template_name: Optional[str] = None,
+        degraded: bool = False
+    ) -> Iterator[str]:
+        """
+        Answer text as the next turn of a session, yielding the response as it streams.
+
+        The turn is added to the session once the stream completes; if the
+        call fails or the consumer stops early it is left out. The session is
+        not held while tokens are yielded, so a slow consumer blocks neither
+        the session's other turns nor its eviction: a turn that runs
+        alongside this one does not see it, and if the session is evicted
+        meanwhile the turn starts a new session with the same id.
+        """
+        with self.locked(session_id) as session:
+            messages, user_message, workload, tier = self._prepare_turn(
+                text, template_name, degraded, session.history, session.scope
+            )
+        pieces: List[str] = []
+        for token in self._respond_stream(messages, workload, tier):
+            pieces.append(token)
+            yield token
+        with self.locked(session_id) as session:
+            self._commit(session, text, user_message, "".join(pieces))
+
+    def clear_conversation_history(self, session_id: str) -> None:
+        """Clear a session's history, keeping the session."""
+        with self.locked(session_id) as session:
+            session.history = [self._system_message]
+            session.chars = 0
+
+    def get_conversation_history(self, session_id: str) -> List[Dict[str, str]]:
+        """A copy of a session's history (empty if the session does not exist)."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+        return list(session.history) if session is not None else []
+
+    def get_stats(self) -> Dict[str, int]:
+        """Number of live sessions and the characters of history they hold."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return {"sessions": len(sessions), "history_chars": sum(session.chars for session in sessions)}
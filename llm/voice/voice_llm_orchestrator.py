@@ -1,11 +1,17 @@
-from typing import Optional, BinaryIO, Dict, Any
+from typing import Optional, BinaryIO, Dict, Any, Callable, Iterator, List, Tuple, TYPE_CHECKING
 import logging
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
 
 from ..llm_client import LLMClient, LLMConfig
 from .whisper_client import WhisperClient, WhisperConfig
 from ..prompts.prompt_manager import PromptTemplateManager, PromptTemplate
+from ..deadlines import AdmissionController, Deadline, deadline_scope
+from ..cascade import workload_scope
+
+if TYPE_CHECKING:  # memory needs NumPy; only import it when an index is used
+    from ..memory import MemoryIndex
 
 logger = logging.getLogger(__name__)
 
@@ -16,25 +22,169 @@ class VoiceLLMConfig:
     llm_config: Optional[LLMConfig] = None
     default_prompt_template: str = "voice_assistant"
     system_prompt: str = "You are a helpful voice assistant. Respond concisely and clearly."
+    turn_timeout: Optional[float] = None  # seconds each voice turn may take end to end
+    degraded_history: int = 2  # history messages kept when admission control degrades a turn
+    memory_top_k: int = 3  # past-session snippets added to each prompt when a memory index is set
+    memory_history: Optional[int] = None  # history messages kept in turns that recall snippets; None keeps all
+    memory_scope: Optional[Dict[str, Any]] = None  # metadata filter and tags, e.g. {"rep_id": ...}
+    memory_record: bool = True  # store each turn in the memory index
 
-class VoiceLLMOrchestrator:
-    """Orchestrates the flow between voice processing and LLM."""
+    def __post_init__(self):
+        if self.degraded_history < 0:
+            raise ValueError("degraded_history must not be negative")
+        if self.memory_history is not None and self.memory_history < 0:
+            raise ValueError("memory_history must not be negative")
+
+class VoicePipeline:
+    """
+    Shared machinery of the voice orchestrators.
+    
+    Holds the Whisper and LLM clients, the prompt manager, admission
+    control and the memory index, and runs one LLM turn over whichever
+    conversation history it is given. ``VoiceLLMOrchestrator`` keeps one
+    history; ``MultiSessionVoiceOrchestrator`` keeps one per session.
+    """
     
     def __init__(
         self,
         prompt_manager: PromptTemplateManager,
-        config: Optional[VoiceLLMConfig] = None
+        config: Optional[VoiceLLMConfig] = None,
+        admission: Optional[AdmissionController] = None,
+        memory: Optional["MemoryIndex"] = None,
+        llm_client: Optional[Any] = None,
+        whisper_client: Optional[WhisperClient] = None
     ):
-        """Initialize the orchestrator with required components."""
+        """
+        Initialize the orchestrator with required components.
+        
+        Args:
+            prompt_manager: Source of prompt templates
+            config: Pipeline configuration
+            admission: Optional admission controller; with ``turn_timeout``
+                set, turns that cannot finish in time fail fast with
+                ``LoadShedError`` or run degraded with a shorter history
+            memory: Optional retrieval index; the most relevant snippets from
+                past sessions are added to each prompt, on top of the history
+                unless ``memory_history`` trims it
+            llm_client: Client to use instead of one built from ``llm_config``,
+                such as an ``LLMRouter`` or a ``ModelCascade``
+            whisper_client: Client to use instead of one built from
+                ``whisper_config``, so several orchestrators share one model
+        """
         self.config = config or VoiceLLMConfig()
         self.prompt_manager = prompt_manager
+        self.admission = admission
+        self.memory = memory
         
         # Initialize clients
-        self.whisper_client = WhisperClient(self.config.whisper_config)
-        self.llm_client = LLMClient(self.config.llm_config)
+        self.whisper_client = whisper_client or WhisperClient(self.config.whisper_config)
+        self.llm_client = llm_client or LLMClient(self.config.llm_config)
+    
+    @contextmanager
+    def turn_scope(self) -> Iterator[bool]:
+        """
+        Admit a voice turn and run the block under its deadline.
+        
+        Yields:
+            bool: Whether admission control degraded the turn
+            
+        Raises:
+            LoadShedError: If admission control rejects the turn
+        """
+        deadline = Deadline.after(self.config.turn_timeout) if self.config.turn_timeout else None
+        degraded = False
+        if self.admission is not None:
+            degraded = self.admission.admit(deadline, degradable=True) == "degrade"
+        
+        with deadline_scope(deadline):
+            if self.admission is None:
+                yield degraded
+                return
+            with self.admission.track():
+                yield degraded
+    
+    def _recall(self, text: str, scope: Optional[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """System message with the past-session snippets most relevant to ``text``."""
+        if self.memory is None or self.config.memory_top_k <= 0:
+            return []
+        from ..memory import format_snippets
+        snippets = self.memory.search(text, self.config.memory_top_k, where=scope)
+        block = format_snippets(snippets)
+        return [{"role": "system", "content": block}] if block else []
+    
+    def _prepare_turn(
+        self,
+        text: str,
+        template_name: Optional[str],
+        degraded: bool,
+        history: List[Dict[str, str]],
+        scope: Optional[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, str]], Dict[str, str], str, Optional[str]]:
+        """
+        Build the LLM request for one turn over ``history`` (system message first).
+        
+        Returns:
+            Tuple: Messages to send, the formatted user message, and the
+                workload label and tier for ``workload_scope``
+        """
+        # Get and format prompt template
+        template_name = template_name or self.config.default_prompt_template
+        template = self.prompt_manager.get_template(template_name)
+        formatted_prompt = template.format(
+            user_input=text,
+            conversation_history=history
+        )
+        user_message = {"role": "user", "content": formatted_prompt}
+        
+        recent = history[1:] + [user_message]
+        if degraded:
+            # Always keep the user message, even with degraded_history=0
+            n = self.config.degraded_history
+            recent = recent[max(0, len(recent) - n):] if n else recent[-1:]
+        recalled = self._recall(text, scope)
+        if recalled and self.config.memory_history is not None:
+            recent = recent[-(self.config.memory_history + 1):]
+        messages = history[:1] + recalled + recent
+        return messages, user_message, f"template:{template_name}", template.tier
+    
+    def _respond(self, messages: List[Dict[str, str]], workload: str, tier: Optional[str]) -> str:
+        with workload_scope(workload, tier):
+            return self.llm_client.call_api(messages)
+    
+    def _respond_stream(self, messages: List[Dict[str, str]], workload: str, tier: Optional[str]) -> Iterator[str]:
+        """Response tokens; clients without ``stream_api`` (routers, cascades) yield their whole answer at once."""
+        with workload_scope(workload, tier):
+            stream = getattr(self.llm_client, "stream_api", None)
+            if stream is None:
+                yield self.llm_client.call_api(messages)
+            else:
+                yield from stream(messages)
+    
+    def _record(self, text: str, response: str, scope: Optional[Dict[str, Any]]) -> None:
+        """Store a finished turn in the memory index."""
+        if self.memory is not None and self.config.memory_record:
+            self.memory.add_transcript(
+                [{"speaker": "user", "content": text}, {"speaker": "assistant", "content": response}],
+                scope
+            )
+
+class VoiceLLMOrchestrator(VoicePipeline):
+    """Orchestrates the flow between voice processing and LLM."""
+    
+    def __init__(
+        self,
+        prompt_manager: PromptTemplateManager,
+        config: Optional[VoiceLLMConfig] = None,
+        admission: Optional[AdmissionController] = None,
+        memory: Optional["MemoryIndex"] = None,
+        llm_client: Optional[Any] = None,
+        whisper_client: Optional[WhisperClient] = None
+    ):
+        """Initialize the orchestrator; arguments as for ``VoicePipeline``."""
+        super().__init__(prompt_manager, config, admission, memory, llm_client, whisper_client)
         
         # Initialize conversation history
-        self.conversation_history: list[Dict[str, str]] = [
+        self.conversation_history: List[Dict[str, str]] = [
             {"role": "system", "content": self.config.system_prompt}
         ]
         
@@ -49,11 +199,10 @@ class VoiceLLMOrchestrator:
         Returns:
             str: LLM response
         """
-        # Transcribe audio
-        transcribed_text = self.whisper_client.transcribe_audio_file(audio_path)
-        logger.info(f"Transcribed text: {transcribed_text}")
-        
-        return self._process_text(transcribed_text, template_name)
+        return self._run_turn(
+            lambda: self.whisper_client.transcribe_audio_file(audio_path),
+            template_name
+        )
     
     def process_audio_data(self, audio_data: BinaryIO, template_name: Optional[str] = None) -> str:
         """
@@ -66,42 +215,75 @@ class VoiceLLMOrchestrator:
         Returns:
             str: LLM response
         """
+        return self._run_turn(
+            lambda: self.whisper_client.transcribe_audio_data(audio_data),
+            template_name
+        )
+    
+    def _run_turn(self, transcribe: Callable[[], str], template_name: Optional[str]) -> str:
+        """
+        Run one voice turn under its deadline and admission control.
+        
+        Raises:
+            LoadShedError: If admission control rejects the turn
+            DeadlineExceeded: If the turn runs past its deadline
+        """
+        with self.turn_scope() as degraded:
+            return self._transcribe_and_respond(transcribe, template_name, degraded)
+    
+    def _transcribe_and_respond(self, transcribe: Callable[[], str], template_name: Optional[str], degraded: bool) -> str:
         # Transcribe audio
-        transcribed_text = self.whisper_client.transcribe_audio_data(audio_data)
-        logger.info(f"Transcribed text: {transcribed_text}")
+        transcribed_text = transcribe()
+        logger.info("Transcribed text: %s", transcribed_text)
         
-        return self._process_text(transcribed_text, template_name)
+        return self._process_text(transcribed_text, template_name, degraded)
     
-    def _process_text(self, text: str, template_name: Optional[str] = None) -> str:
+    def _process_text(self, text: str, template_name: Optional[str] = None, degraded: bool = False) -> str:
         """
         Process text through the LLM pipeline.
         
         Args:
             text: Input text
             template_name: Optional template name to use
+            degraded: Send only the most recent history to keep the call cheap
             
         Returns:
             str: LLM response
         """
-        # Get and format prompt template
-        template = self.prompt_manager.get_template(
-            template_name or self.config.default_prompt_template
+        messages, user_message, workload, tier = self._prepare_turn(
+            text, template_name, degraded, self.conversation_history, self.config.memory_scope
         )
-        formatted_prompt = template.format(
-            user_input=text,
-            conversation_history=self.conversation_history
-        )
-        
-        # Add user message to history
-        self.conversation_history.append({"role": "user", "content": formatted_prompt})
-        
-        # Get LLM response
-        response = self.llm_client.call_api(self.conversation_history)
+        # The turn only enters the history once the call succeeds
+        response = self._respond(messages, workload, tier)
+        self.conversation_history += [user_message, {"role": "assistant", "content": response}]
+        self._record(text, response, self.config.memory_scope)
+        return response
+    
+    def stream_text(self, text: str, template_name: Optional[str] = None, degraded: bool = False) -> Iterator[str]:
+        """
+        Process text through the LLM pipeline, yielding the response as it streams.
         
-        # Add assistant response to history
-        self.conversation_history.append({"role": "assistant", "content": response})
+        The turn is added to the history once the stream completes; if the
+        call fails or the consumer stops early it is left out.
         
-        return response
+        Args:
+            text: Input text
+            template_name: Optional template name to use
+            degraded: Send only the most recent history to keep the call cheap
+            
+        Yields:
+            str: Successive pieces of the LLM response
+        """
+        messages, user_message, workload, tier = self._prepare_turn(
+            text, template_name, degraded, self.conversation_history, self.config.memory_scope
+        )
+        pieces: List[str] = []
+        for token in self._respond_stream(messages, workload, tier):
+            pieces.append(token)
+            yield token
+        response = "".join(pieces)
+        self.conversation_history += [user_message, {"role": "assistant", "content": response}]
+        self._record(text, response, self.config.memory_scope)
     
     def clear_conversation_history(self) -> None:
         """Clear the conversation history."""
@@ -109,6 +291,6 @@ class VoiceLLMOrchestrator:
             {"role": "system", "content": self.config.system_prompt}
         ]
         
-    def get_conversation_history(self) -> list[Dict[str, str]]:
+    def get_conversation_history(self) -> List[Dict[str, str]]:
         """Get the current conversation history."""
         return self.conversation_history.copy() 
\ No newline at end of file
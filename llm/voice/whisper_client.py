@@ -1,11 +1,19 @@
 import os
+import re
+import time
 import tempfile
-from typing import Optional, BinaryIO
-import whisper
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Optional, BinaryIO, Dict, Any, Callable, List, Tuple
 import logging
 from dataclasses import dataclass
 from pathlib import Path
 
+from ..metrics import metrics
+from ..deadlines import DeadlineExceeded, LoadShedError, current_deadline
+from .backends import WhisperBackend, load_backend
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -18,62 +26,380 @@ class WhisperConfig:
     beam_size: int = 5
     condition_on_previous_text: bool = True
     initial_prompt: Optional[str] = None
+    backend: str = "openai"  # "openai", "faster-whisper", "auto" or a registered backend
+    device: Optional[str] = None  # None lets the backend choose
+    compute_type: str = "int8"  # weight precision for CTranslate2 backends
+    cpu_threads: int = 0  # intra-op threads; 0 keeps the backend default
+    num_workers: int = 1  # concurrent transcriptions a CTranslate2 model accepts
+    decoding: str = "fixed"  # "fixed" (beam search throughout) or "adaptive"
+    logprob_threshold: float = -1.0  # adaptive: re-decode segments below this avg_logprob
+    compression_ratio_threshold: float = 2.4  # adaptive: re-decode segments above this ratio
+    no_speech_threshold: float = 0.6  # adaptive: low-confidence segments above this are silence
+    chunk_seconds: Optional[float] = None  # long-audio mode: split WAV recordings into chunks this long
+    chunk_overlap: float = 1.0  # seconds each chunk extends into its neighbours
+    chunk_search_seconds: float = 5.0  # how far a cut may move to land in a pause
+    chunk_workers: int = 4  # chunks transcribed in parallel
+
+    def __post_init__(self):
+        if self.chunk_seconds is not None and self.chunk_search_seconds >= self.chunk_seconds:
+            raise ValueError("chunk_search_seconds must be less than chunk_seconds")
 
 class WhisperClient:
     """Client for handling voice-to-text conversion using Whisper AI."""
     
-    def __init__(self, config: Optional[WhisperConfig] = None):
-        """Initialize Whisper client with configuration."""
+    def __init__(
+        self,
+        config: Optional[WhisperConfig] = None,
+        lanes: Optional[Any] = None,
+        search_index: Optional[Any] = None
+    ):
+        """
+        Initialize Whisper client with configuration.
+        
+        Args:
+            config: Model and decoding settings
+            lanes: Optional ``LaneScheduler`` bounding concurrent decodes per
+                lane (see ``lane_scope``), e.g. sized to ``num_workers``
+            search_index: Optional ``TranscriptIndex``; transcripts with a
+                call id are added to it with their segment timestamps
+        """
         self.config = config or WhisperConfig()
+        self.lanes = lanes
+        self.search_index = search_index
         self._model = None
+        # EWMA of decode seconds per input byte, used to shed work that
+        # cannot finish before its deadline
+        self._seconds_per_byte: Optional[float] = None
         
     @property
-    def model(self) -> whisper.Whisper:
-        """Lazy loading of the Whisper model."""
+    def model(self) -> WhisperBackend:
+        """Lazy loading of the configured Whisper backend."""
         if self._model is None:
-            logger.info(f"Loading Whisper model: {self.config.model_name}")
-            self._model = whisper.load_model(self.config.model_name)
+            with metrics.span("whisper_load_model", {"backend": self.config.backend}):
+                self._model = load_backend(self.config)
         return self._model
     
-    def transcribe_audio_file(self, audio_path: str) -> str:
+    def transcribe_audio_file(
+        self,
+        audio_path: str,
+        call_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> str:
         """
         Transcribe audio from a file.
         
         Args:
             audio_path: Path to the audio file
+            call_id: Id the transcript is indexed under if a search index is
+                attached; defaults to the file name without its extension
+            metadata: Indexed with the transcript, e.g. ``{"rep_id": ...}``
             
         Returns:
             str: Transcribed text
             
         Raises:
             FileNotFoundError: If audio file doesn't exist
+            DeadlineExceeded: If the active deadline passes, or the projected
+                decode time does not fit in what is left of it
             Exception: For other transcription errors
         """
+        return self.transcribe_segments(audio_path, call_id, metadata)["text"]
+    
+    def transcribe_segments(
+        self,
+        audio_path: str,
+        call_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Transcribe audio from a file, keeping per-segment detail.
+        
+        Args:
+            audio_path: Path to the audio file
+            call_id: As for ``transcribe_audio_file``
+            metadata: As for ``transcribe_audio_file``
+            
+        Returns:
+            Dict[str, Any]: Whisper-shaped result with ``text``, ``language``
+                and ``segments``. Each segment carries ``avg_logprob``,
+                ``compression_ratio``, ``no_speech_prob`` and ``decode``
+                ("greedy" or "beam"); re-decoded segments also keep
+                ``greedy_avg_logprob``.
+            
+        Raises:
+            Same as ``transcribe_audio_file``
+        """
+        return self._transcribe_file(audio_path, call_id or Path(audio_path).stem, metadata)
+    
+    def _transcribe_file(self, audio_path: str, call_id: Optional[str], metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        logger.info("Transcribing audio file: %s", audio_path)
+        result = self._transcribe(lambda: self._transcribe_path(audio_path), os.path.getsize(audio_path))
+        self._index(result, call_id, metadata)
+        return result
+    
+    def transcribe_samples(
+        self,
+        samples: Any,
+        call_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Transcribe 16 kHz mono float32 samples, such as audio streamed over a socket.
+        
+        Args:
+            samples: Sample array in [-1, 1] (see ``audio.load_audio``)
+            call_id: Id to index the transcript under; without one it is not indexed
+            metadata: Indexed with the transcript
+            
+        Returns:
+            Dict[str, Any]: Same shape as ``transcribe_segments``
+            
+        Raises:
+            DeadlineExceeded: As for ``transcribe_audio_file``
+        """
+        # Sized as 16-bit PCM so the seconds-per-byte estimate matches WAV input
+        result = self._transcribe(lambda: self._decode(samples), 2 * len(samples))
+        self._index(result, call_id, metadata)
+        return result
+    
+    def _index(self, result: Dict[str, Any], call_id: Optional[str], metadata: Optional[Dict[str, Any]]) -> None:
+        """Add a transcript to the search index; indexing failures never fail the transcription."""
+        if self.search_index is None or call_id is None:
+            return
+        try:
+            self.search_index.add_transcript(call_id, result, metadata)
+        except Exception as e:
+            metrics.inc("search_index_errors_total", labels={"source": "transcript"})
+            logger.error("Error indexing transcript %s: %s", call_id, e)
+    
+    def _transcribe(self, decode: Callable[[], Dict[str, Any]], size: int) -> Dict[str, Any]:
+        """Run a decode under the active deadline, recording its cost and metrics."""
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check("whisper_decode")
+            if self._seconds_per_byte is not None and self._seconds_per_byte * size > deadline.remaining():
+                metrics.inc("deadline_exceeded_total", labels={"stage": "whisper_admission"})
+                raise DeadlineExceeded("Projected Whisper decode time exceeds the deadline")
             
         try:
-            logger.info(f"Transcribing audio file: {audio_path}")
-            result = self.model.transcribe(
-                audio_path,
-                language=self.config.language,
-                temperature=self.config.temperature,
-                best_of=self.config.best_of,
-                beam_size=self.config.beam_size,
-                condition_on_previous_text=self.config.condition_on_previous_text,
-                initial_prompt=self.config.initial_prompt
-            )
-            return result["text"].strip()
+            with self.lanes.slot() if self.lanes is not None else nullcontext():
+                if deadline is not None:
+                    # The wait for a slot may have used up the rest of the deadline
+                    deadline.check("whisper_decode")
+                start = time.perf_counter()
+                with metrics.span("whisper_transcribe"):
+                    result = decode()
+            self._record_decode_time(time.perf_counter() - start, size)
+            if metrics.enabled:
+                metrics.inc("whisper_transcriptions_total")
+                metrics.inc("whisper_audio_bytes_total", size)
+                metrics.inc("whisper_text_chars_total", len(result["text"]))
+            if deadline is not None:
+                # The decode itself cannot be interrupted; drop late results
+                deadline.check("whisper_result")
+            result["text"] = result["text"].strip()
+            return result
+        except (DeadlineExceeded, LoadShedError):
+            raise
         except Exception as e:
-            logger.error(f"Error transcribing audio file: {str(e)}")
+            metrics.inc("whisper_errors_total")
+            logger.error("Error transcribing audio: %s", e)
             raise
             
-    def transcribe_audio_data(self, audio_data: BinaryIO) -> str:
+    def _transcribe_path(self, audio_path: str) -> Dict[str, Any]:
+        """Pick long-audio, adaptive or fixed decoding for a file."""
+        if self.config.chunk_seconds:
+            from .audio import WavFile
+            try:
+                wav = WavFile(audio_path)
+            except ValueError:
+                logger.warning("Long-audio mode needs 16-bit PCM WAV; decoding %s in one pass", audio_path)
+            else:
+                if wav.duration > self.config.chunk_seconds + self.config.chunk_search_seconds:
+                    return self._transcribe_chunked(wav)
+        if self.config.decoding == "adaptive":
+            from .audio import load_audio
+            return self._decode(load_audio(audio_path))
+        return self._decode(audio_path)
+    
+    def _decode(self, audio: Any) -> Dict[str, Any]:
+        """Decode a path or sample array with the configured decoding mode."""
+        if self.config.decoding == "adaptive":
+            return self._transcribe_adaptive(audio)
+        result = self.model.transcribe(audio, **self._decode_options(beam=True))
+        for segment in result.get("segments", []):
+            segment.setdefault("decode", "beam")
+        return result
+    
+    def _decode_options(self, beam: bool, initial_prompt: Optional[str] = None) -> Dict[str, Any]:
+        """Backend decode options; ``beam=False`` selects greedy decoding."""
+        return {
+            "language": self.config.language,
+            "temperature": self.config.temperature,
+            "best_of": self.config.best_of if beam else None,
+            "beam_size": self.config.beam_size if beam else None,
+            "condition_on_previous_text": self.config.condition_on_previous_text,
+            "initial_prompt": initial_prompt or self.config.initial_prompt
+        }
+    
+    def _needs_redecode(self, segment: Dict[str, Any]) -> bool:
+        """Whether a greedy segment fails the confidence thresholds."""
+        low_logprob = segment["avg_logprob"] < self.config.logprob_threshold
+        if low_logprob and segment.get("no_speech_prob", 0.0) > self.config.no_speech_threshold:
+            return False  # silence, which beam search will not improve
+        return low_logprob or segment["compression_ratio"] > self.config.compression_ratio_threshold
+    
+    def _low_confidence_spans(self, segments: List[Dict[str, Any]]) -> List[Tuple[int, int]]:
+        """Runs of adjacent failing segments, as inclusive index pairs."""
+        spans: List[Tuple[int, int]] = []
+        for i, segment in enumerate(segments):
+            if not self._needs_redecode(segment):
+                continue
+            if spans and spans[-1][1] == i - 1:
+                spans[-1] = (spans[-1][0], i)
+            else:
+                spans.append((i, i))
+        return spans
+    
+    def _transcribe_adaptive(self, audio: Any) -> Dict[str, Any]:
+        """
+        Greedy decode, then re-decode only low-confidence segments with beam search.
+        
+        Adjacent failing segments are re-decoded together so beam search
+        sees the whole span; the beam result replaces the greedy one only
+        if its average log-probability is at least as good.
+        """
+        from .audio import SAMPLE_RATE
+        
+        result = self.model.transcribe(audio, **self._decode_options(beam=False))
+        segments = result["segments"]
+        for segment in segments:
+            segment["decode"] = "greedy"
+        
+        # Right to left so replacing a span keeps earlier indices valid
+        for first, last in reversed(self._low_confidence_spans(segments)):
+            span = segments[first:last + 1]
+            offset = span[0]["start"]
+            clip = audio[int(offset * SAMPLE_RATE):int(span[-1]["end"] * SAMPLE_RATE)]
+            prompt = segments[first - 1]["text"] if first > 0 and self.config.condition_on_previous_text else None
+            with metrics.span("whisper_redecode"):
+                retry = self.model.transcribe(clip, **self._decode_options(beam=True, initial_prompt=prompt))
+            greedy_logprob = sum(s["avg_logprob"] for s in span) / len(span)
+            beam_segments = retry["segments"]
+            if not beam_segments:
+                continue
+            beam_logprob = sum(s["avg_logprob"] for s in beam_segments) / len(beam_segments)
+            if beam_logprob < greedy_logprob:
+                continue
+            for segment in beam_segments:
+                segment["start"] += offset
+                segment["end"] += offset
+                segment["decode"] = "beam"
+                segment["greedy_avg_logprob"] = greedy_logprob
+            segments[first:last + 1] = beam_segments
+        
+        for i, segment in enumerate(segments):
+            segment["id"] = i
+            metrics.inc("whisper_segments_total", labels={"decode": segment["decode"]})
+        result["text"] = "".join(segment["text"] for segment in segments)
+        return result
+            
+    def _transcribe_chunked(self, wav: Any) -> Dict[str, Any]:
+        """
+        Transcribe a long recording as overlapping chunks in parallel.
+        
+        The recording is cut in pauses near every ``chunk_seconds``; each
+        chunk is read from the memory-mapped file with ``chunk_overlap``
+        seconds of context on both sides. Up to ``chunk_workers`` chunks are
+        decoded at once, as many as the backend's ``max_concurrency`` allows. A segment is kept only by the
+        chunk that owns its midpoint, so speech in the overlap appears once,
+        and timestamps are shifted to the start of the recording.
+        """
+        boundaries = wav.split_at_silence(self.config.chunk_seconds, self.config.chunk_search_seconds)
+        overlap = self.config.chunk_overlap
+        chunks = [
+            (max(0.0, start - overlap), min(wav.duration, end + overlap), start, end)
+            for start, end in zip(boundaries, boundaries[1:])
+        ]
+        metrics.inc("whisper_chunks_total", len(chunks))
+        
+        def run_chunk(chunk: Tuple[float, float, float, float]) -> Dict[str, Any]:
+            read_from, read_to, _, _ = chunk
+            deadline = current_deadline()
+            if deadline is not None:
+                deadline.check("whisper_chunk")
+            with metrics.span("whisper_transcribe_chunk"):
+                return self._decode(wav.read(read_from, read_to))
+        
+        # Backends that cannot decode concurrently get their chunks one at a time;
+        # worker threads run in a copy of this context so deadlines apply to them
+        workers = max(1, min(self.config.chunk_workers, getattr(self.model, "max_concurrency", 1)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(
+                lambda chunk: contextvars.copy_context().run(run_chunk, chunk),
+                chunks
+            ))
+        
+        segments: List[Dict[str, Any]] = []
+        previous: List[Dict[str, Any]] = []
+        for (read_from, _, owns_from, owns_to), result in zip(chunks, results):
+            # A segment cut differently by both chunks can survive twice, so the
+            # leading segments in the overlap are checked against the previous chunk's tail
+            tail = [kept["text"] for kept in previous if kept["end"] > owns_from - overlap]
+            kept_here: List[Dict[str, Any]] = []
+            for segment in result["segments"]:
+                segment["start"] += read_from
+                segment["end"] += read_from
+                midpoint = (segment["start"] + segment["end"]) / 2
+                if not owns_from <= midpoint < owns_to:
+                    continue
+                if (
+                    not kept_here and segment["start"] < owns_from + overlap
+                    and any(self._same_text(text, segment["text"]) for text in tail)
+                ):
+                    continue
+                kept_here.append(segment)
+            segments.extend(kept_here)
+            previous = kept_here
+        for i, segment in enumerate(segments):
+            segment["id"] = i
+        return {
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": results[0].get("language") if results else self.config.language
+        }
+    
+    @staticmethod
+    def _same_text(a: str, b: str) -> bool:
+        """Whether two segment texts match, ignoring case and punctuation."""
+        normalize = lambda text: re.sub(r"[^\w\s]", "", text).lower().split()
+        return normalize(a) == normalize(b)
+            
+    def _record_decode_time(self, seconds: float, size: int) -> None:
+        """Fold a decode measurement into the seconds-per-byte estimate."""
+        if size <= 0:
+            return
+        sample = seconds / size
+        if self._seconds_per_byte is None:
+            self._seconds_per_byte = sample
+        else:
+            self._seconds_per_byte = 0.8 * self._seconds_per_byte + 0.2 * sample
+            
+    def transcribe_audio_data(
+        self,
+        audio_data: BinaryIO,
+        call_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> str:
         """
         Transcribe audio from binary data.
         
         Args:
             audio_data: Binary audio data
+            call_id: Id to index the transcript under; without one it is not indexed
+            metadata: Indexed with the transcript
             
         Returns:
             str: Transcribed text
@@ -83,9 +409,10 @@ class WhisperClient:
         """
         try:
             with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-                temp_file.write(audio_data.read())
-                temp_file.flush()
-                return self.transcribe_audio_file(temp_file.name)
+                with metrics.span("whisper_spool_audio"):
+                    temp_file.write(audio_data.read())
+                    temp_file.flush()
+                return self._transcribe_file(temp_file.name, call_id, metadata)["text"]
         finally:
             if 'temp_file' in locals():
                 os.unlink(temp_file.name)